@@ -0,0 +1,242 @@
+"""
+Benchmarks of the data quality operators against a throwaway local Postgres
+(testing.postgresql). Every benchmark prints one JSON object per line with
+latency statistics in milliseconds, so results can be diffed across commits.
+
+Run from the repository root, with the plugins directory on the path:
+
+    PYTHONPATH=plugins python benchmarks/bench_data_quality.py --output bench_output.txt
+"""
+import argparse
+import importlib.util
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from unittest.mock import patch
+
+import psycopg2
+import testing.postgresql
+import yaml
+
+from airflow import DAG
+from airflow.hooks.base_hook import BaseHook
+from airflow.hooks.postgres_hook import PostgresHook
+from airflow.models import Connection
+
+REPO_PATH = Path(__file__).parents[1]
+sys.path.insert(0, str(REPO_PATH / "plugins"))
+
+from base_data_quality_operator import get_sql_value, hook_cache
+from data_quality_config_loader import ConfigLoader
+from data_quality_threshold_check_operator import DataQualityThresholdCheckOperator
+from data_quality_threshold_sql_check_operator import DataQualityThresholdSQLCheckOperator
+
+CONN_ID = "bench_conn"
+CHECK_SQL = "SELECT AVG(value) FROM bench;"
+SETUP_SQL = """
+CREATE TABLE bench(id SERIAL PRIMARY KEY, value DOUBLE PRECISION, day DATE);
+INSERT INTO bench(value, day)
+SELECT random() * 100, DATE '2020-01-01' + (i % 365)
+FROM generate_series(1, {rows}) AS i;
+ANALYZE bench;
+"""
+
+def measure(name, function, repeat, **labels):
+    """Runs function repeat times and returns its latency statistics in milliseconds."""
+    function()
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return dict({
+        "benchmark" : name,
+        "repeat" : repeat,
+        "min_ms" : timings[0],
+        "median_ms" : statistics.median(timings),
+        "p95_ms" : timings[min(len(timings) - 1, int(len(timings) * 0.95))],
+        "mean_ms" : statistics.mean(timings)
+    }, **labels)
+
+@contextmanager
+def hook_cache_enabled(enabled):
+    previous = os.environ.get("AIRFLOW__DATA_QUALITY__HOOK_CACHE")
+    os.environ["AIRFLOW__DATA_QUALITY__HOOK_CACHE"] = str(enabled)
+    hook_cache.clear()
+    try:
+        yield
+    finally:
+        hook_cache.clear()
+        if previous is None:
+            del os.environ["AIRFLOW__DATA_QUALITY__HOOK_CACHE"]
+        else:
+            os.environ["AIRFLOW__DATA_QUALITY__HOOK_CACHE"] = previous
+
+def bench_queries(dsn, repeat):
+    """Raw query latency against get_sql_value() with and without the hook cache."""
+    results = []
+    with psycopg2.connect(**dsn) as conn:
+        def raw_query():
+            with conn.cursor() as cursor:
+                cursor.execute(CHECK_SQL)
+                cursor.fetchall()
+        results.append(measure("raw_query", raw_query, repeat))
+
+    results.append(measure(
+        "hook_connect",
+        lambda: PostgresHook(postgres_conn_id=CONN_ID).get_conn().close(),
+        repeat))
+    for enabled in (False, True):
+        with hook_cache_enabled(enabled):
+            results.append(measure(
+                "get_sql_value",
+                lambda: get_sql_value(CONN_ID, CHECK_SQL),
+                repeat,
+                hook_cache=enabled))
+    return results
+
+def bench_operators(repeat):
+    """Latency of execute() of both threshold operators."""
+    context = {"execution_date": datetime(2020, 1, 1)}
+    operators = {
+        "threshold_check_execute" : DataQualityThresholdCheckOperator(
+            task_id="bench_threshold_check",
+            conn_id=CONN_ID,
+            sql=CHECK_SQL,
+            min_threshold=0,
+            max_threshold=100),
+        "threshold_sql_check_execute" : DataQualityThresholdSQLCheckOperator(
+            task_id="bench_threshold_sql_check",
+            conn_id=CONN_ID,
+            threshold_conn_id=CONN_ID,
+            sql=CHECK_SQL,
+            min_threshold_sql="SELECT MIN(value) FROM bench;",
+            max_threshold_sql="SELECT MAX(value) FROM bench;")
+    }
+    results = []
+    for enabled in (False, True):
+        with hook_cache_enabled(enabled):
+            for name, operator in operators.items():
+                results.append(measure(name, lambda: operator.execute(context), repeat, hook_cache=enabled))
+    return results
+
+IMPORT_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+import data_quality_threshold_check_operator
+elapsed = (time.perf_counter() - start) * 1000
+hooks = [module for module in ("airflow.hooks.postgres_hook", "airflow.hooks.mysql_hook", "airflow.hooks.hive_hooks")
+         if module in sys.modules]
+print(json.dumps({"ms": elapsed, "hook_modules": hooks}))
+"""
+
+def bench_import(repeat):
+    """
+    Time a fresh interpreter takes to import the operators once Airflow
+    itself is imported, as paid by every DAG file that uses them, along with
+    the hook modules that importing them pulled in.
+    """
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [
+        str(REPO_PATH / "plugins"), os.environ.get("PYTHONPATH")])))
+    timings, hook_modules = [], None
+    for _ in range(repeat):
+        output = subprocess.run(
+            [sys.executable, "-c", "import airflow\n" + IMPORT_SCRIPT],
+            env=env, check=True, stdout=subprocess.PIPE, universal_newlines=True).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        timings.append(result["ms"])
+        hook_modules = result["hook_modules"]
+    timings.sort()
+    return [{
+        "benchmark" : "operator_import",
+        "repeat" : repeat,
+        "min_ms" : timings[0],
+        "median_ms" : statistics.median(timings),
+        "p95_ms" : timings[min(len(timings) - 1, int(len(timings) * 0.95))],
+        "mean_ms" : statistics.mean(timings),
+        "hook_modules" : hook_modules
+    }]
+
+def bench_dag_parse(config_counts, repeat):
+    """Time to load YAML configs and build the YAML DAG's operators, cold and warm."""
+    spec = importlib.util.spec_from_file_location(
+        "yaml_data_quality_check_dag", str(REPO_PATH / "example_dags" / "yaml_data_quality_check_dag.py"))
+    dag_module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(dag_module)
+    template = yaml.safe_load((REPO_PATH / "tests" / "configs" / "yaml_configs" / "test_inside_threshold_sql.yaml").read_text())
+
+    results = []
+    for count in config_counts:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            yaml_dir = Path(tmp_dir) / "configs"
+            yaml_dir.mkdir()
+            for index in range(count):
+                template["test_name"] = f"bench_check_{index}"
+                (yaml_dir / f"bench_check_{index}.yaml").write_text(yaml.safe_dump(template))
+
+            def parse(cache_dir):
+                dag = DAG(f"bench_parse_{count}", start_date=datetime(2020, 1, 1))
+                for conf in ConfigLoader(cache_dir=cache_dir).load(yaml_dir):
+                    dag_module.get_data_quality_operator(conf, dag)
+
+            cold_runs = iter(range(repeat + 1))
+            results.append(measure(
+                "dag_parse",
+                lambda: parse(os.path.join(tmp_dir, f"cache_{next(cold_runs)}")),
+                repeat,
+                configs=count,
+                config_cache="cold"))
+            results.append(measure(
+                "dag_parse",
+                lambda: parse(os.path.join(tmp_dir, "cache_warm")),
+                repeat,
+                configs=count,
+                config_cache="warm"))
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=20, help="timed runs per benchmark")
+    parser.add_argument("--rows", type=int, default=100000, help="rows of the benchmark table")
+    parser.add_argument("--config-counts", type=int, nargs="+", default=[10, 100, 1000, 10000],
+                        help="numbers of YAML configs to parse")
+    parser.add_argument("--output", help="file to append results to instead of stdout")
+    args = parser.parse_args()
+
+    with testing.postgresql.Postgresql() as postgresql:
+        dsn = postgresql.dsn()
+        with psycopg2.connect(**dsn) as conn:
+            with conn.cursor() as cursor:
+                cursor.execute(SETUP_SQL.format(rows=args.rows))
+        connection = Connection(
+            conn_id=CONN_ID,
+            conn_type="postgres",
+            host=dsn["host"],
+            port=dsn["port"],
+            login=dsn["user"],
+            schema=dsn["database"])
+
+        with patch.object(BaseHook, "get_connection", return_value=connection):
+            results = bench_queries(dsn, args.repeat)
+            results += bench_operators(args.repeat)
+        results += bench_dag_parse(args.config_counts, max(1, args.repeat // 10))
+    results += bench_import(max(1, args.repeat // 4))
+
+    output = open(args.output, "a") if args.output else sys.stdout
+    try:
+        for result in results:
+            output.write(json.dumps(dict(result, timestamp=datetime.utcnow().isoformat())) + "\n")
+    finally:
+        if args.output:
+            output.close()
+
+if __name__ == "__main__":
+    main()
@@ -3,6 +3,7 @@ from datetime import datetime, timedelta
 from airflow import DAG
 from airflow.operators.data_quality_threshold_check_operator import DataQualityThresholdCheckOperator
 from airflow.operators.data_quality_threshold_sql_check_operator import DataQualityThresholdSQLCheckOperator
+from airflow.operators.data_quality_result_sink import DataQualityResultFlushOperator
 from airflow.operators.postgres_operator import PostgresOperator
 from airflow.operators.dummy_operator import DummyOperator
 from airflow.utils.trigger_rule import TriggerRule
@@ -51,8 +52,7 @@ task_check_from_last_month = DataQualityThresholdSQLCheckOperator(
     sql="SELECT AVG(cost) FROM Costs;",
     conn_id="test_conn",
     threshold_conn_id="test_id",
-    min_threshold_sql="SELECT MIN(sale_price) FROM Sales WHERE date>=(DATE('{{ ds }}') - INTERVAL '1 month');",
-    max_threshold_sql="SELECT MAX(sale_price) FROM Sales WHERE date>=(DATE('{{ ds }}') - INTERVAL '1 month');",
+    threshold_sql="SELECT MIN(sale_price), MAX(sale_price) FROM Sales WHERE date>=(DATE('{{ ds }}') - INTERVAL '1 month');",
     push_conn_id="push_conn",
     check_description="test to of whether the average of Price table of last month is between low and high of Sales table from the last month",
     dag=dag
@@ -66,6 +66,15 @@ task_after_dq = DummyOperator(
     dag=dag
 )
 
+"""Task to ship the spooled results of all checks to the result history table"""
+task_flush_results = DataQualityResultFlushOperator(
+    task_id="flush_data_quality_results",
+    push_conn_id="push_conn",
+    trigger_rule=TriggerRule.ALL_DONE,
+    dag=dag
+)
+
 task_load_test_data.set_downstream(task_before_dq)
 task_before_dq.set_downstream(data_quality_checks)
 task_after_dq.set_upstream(data_quality_checks)
+task_after_dq.set_downstream(task_flush_results)
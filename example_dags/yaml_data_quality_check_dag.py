@@ -1,14 +1,14 @@
 from datetime import datetime, timedelta
-from collections import defaultdict
-import os
-import glob
-import yaml
 
 from airflow import DAG
 from airflow.operators.data_quality_threshold_check_operator import DataQualityThresholdCheckOperator
 from airflow.operators.data_quality_threshold_sql_check_operator import DataQualityThresholdSQLCheckOperator
 from airflow.operators.dummy_operator import DummyOperator
+from airflow.operators.python_operator import PythonOperator
 from airflow.utils.trigger_rule import TriggerRule
+from data_quality_result_cache import LocalDiskResultCache
+from data_quality_config_loader import load_configs
+from data_quality_check_scheduler import chain_checks, get_cached_task_runtimes, refresh_task_runtimes
 
 YAML_DIR = "./tests/configs/yaml_configs"
 
@@ -26,17 +26,7 @@ dag = DAG(
     schedule_interval="@daily"
 )
 
-def recursive_make_defaultdict(conf):
-    """
-    recursive_make_defaultdict takes in a configuration dictionary
-    and recursively converts all nested dictionaries into a defaultdict
-    data structure with a default value as None.
-    """
-    if isinstance(conf, dict):
-        for key in conf.keys():
-            conf[key] = recursive_make_defaultdict(conf[key])
-        return defaultdict(lambda: None, conf)
-    return conf
+threshold_cache = LocalDiskResultCache(ttl=24 * 60 * 60)
 
 def get_data_quality_operator(conf, dag):
     kwargs = {
@@ -44,15 +34,19 @@ def get_data_quality_operator(conf, dag):
         "sql" : conf["fields"]["sql"],
         "push_conn_id" : conf["push_conn_id"],
         "check_description" : conf["check_description"],
-        "email" : conf["notification_emails"]
+        "email" : conf["notification_emails"],
+        "incremental" : conf["incremental"],
+        "query_timeout" : conf["query_timeout"]
     }
 
-    if conf["threshold"]["min_threshold_sql"]:
+    if conf["threshold"]["min_threshold_sql"] or conf["threshold"]["threshold_sql"]:
         task = DataQualityThresholdSQLCheckOperator(
             task_id=conf["test_name"],
             min_threshold_sql=conf["threshold"]["min_threshold_sql"],
             max_threshold_sql=conf["threshold"]["max_threshold_sql"],
+            threshold_sql=conf["threshold"]["threshold_sql"],
             threshold_conn_id=conf["threshold"]["threshold_conn_id"],
+            threshold_cache=threshold_cache if conf["threshold"]["cache"] else None,
             dag=dag,
             **kwargs)
     else:
@@ -64,11 +58,12 @@ def get_data_quality_operator(conf, dag):
             **kwargs)
     return task
 
-data_quality_check_tasks = []
-for test_conf in glob.glob(os.path.join(str(YAML_DIR), "*.yaml")):
-    with open(test_conf) as config:
-        conf = recursive_make_defaultdict(yaml.safe_load(config))
-    data_quality_check_tasks.append(get_data_quality_operator(conf, dag))
+configs = load_configs(YAML_DIR)
+data_quality_check_tasks = {conf["test_name"]: get_data_quality_operator(conf, dag) for conf in configs}
+
+# Checks run in the tiers of their YAML files, cheapest first, and later tiers only run once earlier tiers pass.
+# Runtimes come from a Variable refreshed by the last task, so parsing this file never aggregates task instances.
+check_tiers = chain_checks(data_quality_check_tasks, configs, get_cached_task_runtimes(dag.dag_id))
 
 task_before_dq = DummyOperator(
     task_id="task_before_data_quality_checks",
@@ -81,5 +76,17 @@ task_after_dq = DummyOperator(
     dag=dag
 )
 
-task_before_dq.set_downstream(data_quality_check_tasks)
-task_after_dq.set_upstream(data_quality_check_tasks)
\ No newline at end of file
+task_refresh_runtimes = PythonOperator(
+    task_id="refresh_data_quality_check_runtimes",
+    python_callable=refresh_task_runtimes,
+    op_kwargs={"dag_id" : dag.dag_id},
+    trigger_rule=TriggerRule.ALL_DONE,
+    dag=dag
+)
+
+if check_tiers:
+    task_before_dq.set_downstream(check_tiers[0])
+    task_after_dq.set_upstream(list(data_quality_check_tasks.values()))
+else:
+    task_before_dq.set_downstream(task_after_dq)
+task_after_dq.set_downstream(task_refresh_runtimes)
\ No newline at end of file
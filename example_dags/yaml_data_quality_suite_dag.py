@@ -0,0 +1,45 @@
+from datetime import datetime, timedelta
+
+from airflow import DAG
+from airflow.operators.data_quality_suite_operator import DataQualitySuiteOperator
+from airflow.operators.dummy_operator import DummyOperator
+from airflow.utils.trigger_rule import TriggerRule
+
+YAML_DIR = "./tests/configs/yaml_configs"
+
+default_args = {
+    "owner" : "airflow",
+    "start_date" : datetime(2020,1,16),
+    "retries" : 0,
+    "retry_delay" : timedelta(minutes=5),
+    "email_on_failure" : True
+}
+
+dag = DAG(
+    "yaml_data_quality_suite_dag",
+    default_args=default_args,
+    schedule_interval="@daily"
+)
+
+task_before_dq = DummyOperator(
+    task_id="task_before_data_quality_checks",
+    dag=dag
+)
+
+"""Task to run every YAML configured check in one worker, at most 2 queries at a time per connection"""
+task_data_quality_suite = DataQualitySuiteOperator(
+    task_id="data_quality_suite",
+    yaml_dir=YAML_DIR,
+    max_workers=8,
+    default_conn_concurrency=2,
+    dag=dag
+)
+
+task_after_dq = DummyOperator(
+    task_id="task_after_data_quality_checks",
+    trigger_rule=TriggerRule.ALL_DONE,
+    dag=dag
+)
+
+task_before_dq.set_downstream(task_data_quality_suite)
+task_after_dq.set_upstream(task_data_quality_suite)
@@ -1,13 +1,27 @@
+import datetime
+import decimal
+import functools
 import logging
+import re
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor, FIRST_EXCEPTION, wait
+from contextlib import closing, contextmanager
 
 from airflow.utils.decorators import apply_defaults
-from airflow.models import BaseOperator
-from airflow.hooks.base_hook import BaseHook
-from airflow.hooks.postgres_hook import PostgresHook
-from airflow.hooks.mysql_hook import MySqlHook
-from airflow.hooks.hive_hooks import HiveServer2Hook
+from airflow.models import BaseOperator, Variable
+from airflow.configuration import conf
 from airflow import AirflowException
 
+from data_quality_aggregates import AGGREGATES, AggregateState
+from data_quality_hook_cache import hook_cache
+from data_quality_hooks import hook_registry
+from data_quality_preflight import ACTIONS as PREFLIGHT_ACTIONS, MAX_PLAN_ROWS, decide, get_explain_sql, parse_plan
+from data_quality_timing import PhaseTimer, TaskProfiler, activate, current_timer, timed
+
+# connection types whose database client takes qmark ("?") query parameters
+QMARK_CONN_TYPES = ("local_file", "duckdb")
+
 class BaseDataQualityOperator(BaseOperator):
     """
     BaseDataQualityOperator is an abstract base operator class to
@@ -25,9 +39,55 @@ class BaseDataQualityOperator(BaseOperator):
     :type push_conn_id: str
     :param check_description: (optional) description of data quality sql statement
     :type check_description: str
+    :param incremental: (optional) evaluate the check incrementally over an
+        append-only table instead of running sql, given as a dict with keys
+        "table", "column", "aggregate" (one of count, sum, avg, min, max,
+        variance, stddev) and "watermark_column". Partial aggregates and the
+        watermark are kept in an Airflow Variable, so each run only scans the
+        rows past the watermark.
+    :type incremental: dict
+    :param partitioned: (optional) evaluate the check as concurrent range
+        queries over a large table instead of running sql, given as a dict
+        with keys "table", "column", "aggregate" (one of count, sum, avg, min,
+        max, variance, stddev) and "partition_column", and optionally
+        "partitions" (number of ranges, default 8), "max_workers" (concurrent
+        queries, default partitions) and "bounds" (lowest and highest value
+        of partition_column, queried when not given). Partial aggregates of
+        the ranges are merged client-side.
+    :type partitioned: dict
+    :param query_timeout: (optional) seconds each query of the check may run.
+        The database is asked to abort longer queries (statement_timeout on
+        Postgres, MAX_EXECUTION_TIME on MySQL, hive.query.timeout.seconds on
+        Hive) and they are cancelled from the client once the time is up. A
+        check that times out is pushed with "timed_out" and fails the task,
+        unless fallback_sql is given.
+    :type query_timeout: int
+    :param fallback_sql: (optional) cheaper sql statement evaluated instead
+        of the check when it times out
+    :type fallback_sql: str
+    :param collect_timings: (optional) time each phase of the check (connection
+        lookup, connect, threshold and check queries, push), add the timings
+        in milliseconds to the info_dict under "timings" and send them to
+        StatsD. Defaults to the ``[data_quality] collect_timings`` setting.
+    :type collect_timings: bool
+    :param profile: (optional) run cProfile over the check and log the profile
+    :type profile: bool
+    :param history_store: (optional) local store push() records every result
+        in, see HistoryStore
+    :type history_store: HistoryStore
+    :param preflight: (optional) ask the database for the estimated plan of
+        sql (EXPLAIN on Postgres, MySQL and Hive) before running it, given as
+        a dict with limits "max_cost" (planner cost units) and/or "max_rows"
+        (rows read by the largest step of the plan), and the "action" taken
+        when the estimate exceeds them: "fail" (default) refuses to run the
+        check, "warn" logs a warning and runs it, "fallback" evaluates
+        fallback_sql instead. The estimates and the decision are added to
+        the info_dict under "preflight". Incremental and partitioned checks
+        have no pre-flight.
+    :type preflight: dict
     """
 
-    template_fields = ('sql',)
+    template_fields = ('sql', 'fallback_sql')
     template_ext = ('.sql',)
 
     @apply_defaults
@@ -36,67 +96,753 @@ class BaseDataQualityOperator(BaseOperator):
                  conn_id,
                  push_conn_id=None,
                  check_description=None,
+                 incremental=None,
+                 partitioned=None,
+                 query_timeout=None,
+                 fallback_sql=None,
+                 collect_timings=None,
+                 profile=False,
+                 history_store=None,
+                 preflight=None,
                  *args,
                  **kwargs
                  ):
         super().__init__(*args, **kwargs)
+        if incremental:
+            missing_keys = {"table", "column", "aggregate", "watermark_column"} - set(incremental)
+            if missing_keys:
+                raise ValueError(f"Incremental check is missing {sorted(missing_keys)}")
+            if incremental["aggregate"] not in AGGREGATES:
+                raise ValueError(f"""Aggregate "{incremental['aggregate']}" not currently supported""")
+        if partitioned:
+            if incremental:
+                raise ValueError("incremental cannot be combined with partitioned")
+            missing_keys = {"table", "column", "aggregate", "partition_column"} - set(partitioned)
+            if missing_keys:
+                raise ValueError(f"Partitioned check is missing {sorted(missing_keys)}")
+            if partitioned["aggregate"] not in AGGREGATES:
+                raise ValueError(f"""Aggregate "{partitioned['aggregate']}" not currently supported""")
+            if partitioned.get("partitions", 8) < 1:
+                raise ValueError("Partitioned check needs at least one partition")
+        if preflight:
+            if not {"max_cost", "max_rows"} & set(preflight):
+                raise ValueError("Preflight needs max_cost or max_rows")
+            if preflight.get("action", "fail") not in PREFLIGHT_ACTIONS:
+                raise ValueError(f"""Preflight action "{preflight['action']}" not currently supported""")
+            if preflight.get("action") == "fallback" and fallback_sql is None:
+                raise ValueError("Preflight action fallback requires fallback_sql")
         self.conn_id = conn_id
         self.push_conn_id = push_conn_id
         self.sql = sql
         self.check_description = check_description
+        self.incremental = incremental
+        self.partitioned = partitioned
+        self.query_timeout = query_timeout
+        self.fallback_sql = fallback_sql
+        self.collect_timings = collect_timings
+        self.profile = profile
+        self.history_store = history_store
+        self.preflight = preflight
+        self.result_info = {}
+        self.timer = None
+        self.profiler = None
+        self.pushed_conn_ids = set()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        for name in ("execute", "execute_complete"):
+            if name in cls.__dict__:
+                setattr(cls, name, _finishing(cls.__dict__[name]))
 
     def execute(self, context):
         """Method where data quality check is performed """
         raise NotImplementedError
 
+    def finish(self):
+        """
+        Runs when execute() (or execute_complete() of a deferred check)
+        returns or raises. Stops timing and profiling if execute() raised
+        before recording them, and ships the results spooled by push() to
+        the result history unless push_flush_on_task_end is off, as the spool
+        is local to the worker and the next task to flush it may run
+        elsewhere.
+        """
+        if self.timer is not None or self.profiler is not None:
+            self.record_timings()
+        pushed_conn_ids, self.pushed_conn_ids = self.pushed_conn_ids, set()
+        if not pushed_conn_ids or not conf.getboolean("data_quality", "push_flush_on_task_end", fallback=True):
+            return
+        from data_quality_result_sink import ResultSpool
+        spool = ResultSpool()
+        for push_conn_id in sorted(pushed_conn_ids):
+            try:
+                spool.flush(push_conn_id)
+            except Exception:
+                logging.exception("Failed to flush data quality results of %s", push_conn_id)
+
+    def reject_options(self, *names):
+        """
+        Raises ValueError if any of the named options of the base operator is
+        set, for operators that do not evaluate their checks through
+        get_result() and would otherwise ignore them.
+        """
+        given = [name for name in names if getattr(self, name)]
+        if given:
+            raise ValueError(f"{type(self).__name__} does not support {', '.join(given)}")
+
+    def start_timing(self):
+        """
+        Starts timing the phases of the check in the current thread, and
+        profiling it if requested. Operators call it first thing in execute().
+        """
+        collect_timings = self.collect_timings
+        if collect_timings is None:
+            collect_timings = conf.getboolean("data_quality", "collect_timings", fallback=False)
+        self.timer = PhaseTimer() if collect_timings else None
+        activate(self.timer)
+        if self.profile:
+            self.profiler = TaskProfiler(self.dag_id, self.task_id)
+            self.profiler.start()
+
+    def record_timings(self, *info_dicts):
+        """
+        Stops timing and profiling the check, adds the phase timings to
+        info_dicts and sends them to StatsD. Timings are recorded once per
+        start_timing(); finish() records them if execute() did not.
+        """
+        activate(None)
+        if self.profiler is not None:
+            self.profiler.stop()
+            self.profiler = None
+        if self.timer is None:
+            return
+        timer, self.timer = self.timer, None
+        timings = timer.totals()
+        for info_dict in info_dicts:
+            info_dict["timings"] = dict(timings)
+        timer.emit(self.dag_id, self.task_id)
+        logging.info("Timings of %s: %s", self.task_id, timings)
+
+    def get_result(self, context):
+        """
+        Evaluates the data quality check and returns its result. Details on how
+        the result was obtained are left in self.result_info, which operators
+        add to the info_dict of the check.
+        """
+        self.result_info = {}
+        if self.preflight and self.sql and not (self.incremental or self.partitioned):
+            if self.run_preflight(context) == "fallback":
+                logging.info("Check %s exceeds its preflight limits, evaluating fallback sql", self.task_id)
+                self.result_info["fallback"] = True
+                with statement_timeout(self.query_timeout):
+                    return get_sql_value(self.conn_id, self.fallback_sql)
+        try:
+            with statement_timeout(self.query_timeout):
+                return self.evaluate(context)
+        except QueryTimeout:
+            self.result_info["timed_out"] = True
+            if self.fallback_sql is None:
+                raise
+        logging.info("Check %s timed out, evaluating fallback sql", self.task_id)
+        self.result_info["fallback"] = True
+        with statement_timeout(self.query_timeout):
+            return get_sql_value(self.conn_id, self.fallback_sql)
+
+    def run_preflight(self, context):
+        """
+        Estimates the cost of sql from the plan of the database and decides
+        whether to run it, see the preflight parameter. Returns the decision,
+        "run", "warn" or "fallback", and fails the task on "fail".
+        """
+        conn_type = get_conn_type(self.conn_id)
+        explain_sql = get_explain_sql(conn_type, self.sql)
+        cost, rows = None, None
+        if explain_sql is None:
+            logging.info("No cost estimates on %s connections, running check %s", conn_type, self.task_id)
+        else:
+            with timed("preflight", self.conn_id), statement_timeout(self.query_timeout):
+                cost, rows = parse_plan(conn_type, get_sql_rows(self.conn_id, explain_sql, MAX_PLAN_ROWS,
+                                                                stream=False))
+        decision = decide(self.preflight, cost, rows)
+        self.result_info["preflight"] = {"cost" : cost, "rows" : rows, "decision" : decision}
+        if decision == "warn":
+            logging.warning("Check %s exceeds its preflight limits with estimated cost %s and rows %s",
+                            self.task_id, cost, rows)
+        elif decision == "fail":
+            self.fail_on_preflight(context)
+        return decision
+
+    def evaluate(self, context):
+        """Runs the queries of the check and returns its result."""
+        if self.incremental:
+            return self.get_incremental_result()
+        if self.partitioned:
+            return self.get_partitioned_result()
+        return get_sql_value(self.conn_id, self.sql)
+
+    def check_result(self, context, result, **extra_info):
+        """
+        Compares the result of the check against self.min_threshold and
+        self.max_threshold, pushes the outcome along with self.result_info and
+        extra_info, and fails the task if the result is outside the thresholds.
+        """
+        info_dict = {
+            "result" : result,
+            "description" : self.check_description,
+            "task_id" : self.task_id,
+            "execution_date" : context.get("execution_date"),
+            "min_threshold" : self.min_threshold,
+            "max_threshold" : self.max_threshold,
+            "within_threshold" : self.min_threshold <= result <= self.max_threshold
+        }
+        info_dict.update(self.result_info)
+        info_dict.update(extra_info)
+
+        self.push(info_dict)
+        self.record_timings(info_dict)
+        if not info_dict["within_threshold"]:
+            context["ti"].xcom_push(key=f"""result data from task {self.task_id}""", value=info_dict)
+            self.send_failure_notification(info_dict)
+        return info_dict
+
+    def fail_on_timeout(self, context, error):
+        """
+        Pushes the timeout outcome of the check, which has no result, and
+        fails the task.
+        """
+        info_dict = {
+            "result" : None,
+            "description" : self.check_description,
+            "task_id" : self.task_id,
+            "execution_date" : context.get("execution_date"),
+            "min_threshold" : getattr(self, "min_threshold", None),
+            "max_threshold" : getattr(self, "max_threshold", None),
+            "within_threshold" : False
+        }
+        info_dict.update(self.result_info)
+        info_dict["timed_out"] = True
+        self.push(info_dict)
+        self.record_timings(info_dict)
+        raise AirflowException(f"""Data Quality Check "{self.task_id}" timed out: {error}""") from error
+
+    def fail_on_preflight(self, context):
+        """
+        Pushes the outcome of a check refused by its pre-flight, which has no
+        result, and fails the task.
+        """
+        info_dict = {
+            "result" : None,
+            "description" : self.check_description,
+            "task_id" : self.task_id,
+            "execution_date" : context.get("execution_date"),
+            "min_threshold" : getattr(self, "min_threshold", None),
+            "max_threshold" : getattr(self, "max_threshold", None),
+            "within_threshold" : False
+        }
+        info_dict.update(self.result_info)
+        self.push(info_dict)
+        self.record_timings(info_dict)
+        preflight = self.result_info["preflight"]
+        raise AirflowException(
+            f"""Data Quality Check "{self.task_id}" refused by preflight: estimated cost {preflight["cost"]} """
+            f"""and rows {preflight["rows"]} exceed limits max_cost {self.preflight.get("max_cost")} """
+            f"""and max_rows {self.preflight.get("max_rows")}""")
+
+    def get_incremental_result(self):
+        """
+        Computes partial aggregates over the rows of the incremental table past
+        the stored watermark, merges them into the stored state and returns the
+        aggregate over the whole table.
+        """
+        table = self.incremental["table"]
+        column = self.incremental["column"]
+        watermark_column = self.incremental["watermark_column"]
+        key = f"data_quality_incremental__{self.dag_id}__{self.task_id}"
+
+        stored = Variable.get(key, default_var=None, deserialize_json=True)
+        state = AggregateState.from_dict(stored["state"]) if stored else AggregateState()
+        watermark = stored["watermark"] if stored else None
+
+        conn_type = get_conn_type(self.conn_id)
+        expressions = AggregateState.select_expressions(column, conn_type)
+        sql = f"SELECT {expressions}, MAX({watermark_column}) FROM {table}"
+        parameters = None
+        if watermark is not None:
+            sql += f" WHERE {watermark_column} > {get_placeholder(conn_type)}"
+            parameters = (watermark,)
+        row = get_sql_row(self.conn_id, sql, 6, parameters)
+
+        delta = AggregateState.from_row(row[:5])
+        state = state.merge(delta)
+        if row[5] is not None:
+            watermark = _to_json_value(row[5])
+        Variable.set(key, {"state": state.to_dict(), "watermark": watermark}, serialize_json=True)
+
+        self.result_info.update({
+            "watermark" : watermark,
+            "incremental_rows" : delta.count
+        })
+        return state.value(self.incremental["aggregate"])
+
+    def get_partitioned_result(self):
+        """
+        Splits the range of the partition column into ranges, computes partial
+        aggregates of every range (and of rows without a partition value) in
+        concurrent queries, and returns the aggregate of the merged partials.
+        """
+        table = self.partitioned["table"]
+        column = self.partitioned["column"]
+        partition_column = self.partitioned["partition_column"]
+        partitions = self.partitioned.get("partitions", 8)
+
+        bounds = self.partitioned.get("bounds")
+        if bounds is None:
+            bounds = get_sql_row(self.conn_id, f"SELECT MIN({partition_column}), MAX({partition_column}) FROM {table}", 2)
+        conn_type = get_conn_type(self.conn_id)
+        placeholder = get_placeholder(conn_type)
+        select = f"SELECT {AggregateState.select_expressions(column, conn_type)} FROM {table}"
+        queries = {
+            "null partition" : (f"{select} WHERE {partition_column} IS NULL", None)
+        }
+        if bounds[0] is not None:
+            boundaries = _split_range(bounds[0], bounds[1], partitions)
+            for index, (lower, upper) in enumerate(zip(boundaries, boundaries[1:])):
+                last = index == len(boundaries) - 2
+                operator = "<=" if last else "<"
+                queries[f"partition {index}"] = (
+                    f"{select} WHERE {partition_column} >= {placeholder} "
+                    f"AND {partition_column} {operator} {placeholder}",
+                    (lower, upper))
+
+        calls = {
+            name: (lambda sql=sql, parameters=parameters: get_sql_row(self.conn_id, sql, 5, parameters))
+            for name, (sql, parameters) in queries.items()
+        }
+        rows = run_concurrently(calls, max_workers=self.partitioned.get("max_workers"))
+        state = AggregateState()
+        for row in rows.values():
+            state = state.merge(AggregateState.from_row(row))
+
+        self.result_info["partitions"] = len(queries) - 1
+        return state.value(self.partitioned["aggregate"])
+
     def push(self, info_dict):
-        """Send data check info and metadata to an external database."""
-        pass
+        """
+        Send data check info and metadata to an external database. Results are
+        appended to a local spool and shipped to the result history table of
+        push_conn_id in bulk, see ResultSpool. Failing to ship results is
+        logged and does not fail the check, but a push_conn_id that is not a
+        supported result history database raises ValueError right away.
+        Results are also recorded in history_store when one is given.
+        """
+        if self.history_store is not None:
+            with timed("push"):
+                self.history_store.append(self.dag_id, info_dict)
+        if self.push_conn_id is None:
+            return
+        from data_quality_result_sink import ResultSpool
+        with timed("push", self.push_conn_id):
+            spool = ResultSpool()
+            spool.append(self.push_conn_id, dict(info_dict, dag_id=self.dag_id))
+            self.pushed_conn_ids.add(self.push_conn_id)
+            try:
+                spool.maybe_flush(self.push_conn_id)
+            except Exception:
+                logging.exception("Failed to flush data quality results of %s", self.push_conn_id)
 
     def send_failure_notification(self, info_dict):
         """
         send_failure_notification will throw an AirflowException with logging 
         information and dq check results from the failed task that was just run.
         """
+        result = info_dict.get("result")
         body = f"""Data Quality Check: "{info_dict.get("task_id")}" failed.
 DAG: {self.dag_id}
 Task_id: {info_dict.get("task_id")}
 Check description: {info_dict.get("description")}
 Execution date: {info_dict.get("execution_date")}
 SQL: {self.sql}
-Result: {round(info_dict.get("result"), 2)} is not within thresholds {info_dict.get("min_threshold")} and {info_dict.get("max_threshold")}"""
+Result: {"NULL" if result is None else round(result, 2)} is not within thresholds {info_dict.get("min_threshold")} and {info_dict.get("max_threshold")}"""
         raise AirflowException(body)
 
 def _get_hook(conn_id):
     """
     _get_hook is a helper function for get_sql_value. Returns a database
     hook depending on the conn_type and conn_id specified. Method will raise
-    an exception if hook is not supported.
+    an exception if hook is not supported. Connection metadata and hooks are
+    served from the process-level hook_cache when it is enabled.
     """
+    return _resolve_hook(conn_id)[1]
+
+def get_conn_type(conn_id):
+    """Returns the conn_type of conn_id, e.g. to pick a sql dialect."""
+    return hook_cache.get_connection(conn_id).conn_type
+
+def get_placeholder(conn_type):
+    """
+    Returns the query parameter placeholder of conn_type: "?" for the qmark
+    paramstyle of sqlite3 and DuckDB behind local_file connections, "%s"
+    for the format paramstyle of the other database clients.
+    """
+    return "?" if conn_type in QMARK_CONN_TYPES else "%s"
+
+def _resolve_hook(conn_id):
+    """Returns the conn_type of conn_id along with its hook."""
+    with timed("get_connection", conn_id):
+        conn_type = get_conn_type(conn_id)
+        return conn_type, hook_cache.get_hook(conn_id, lambda: _make_hook(conn_type, conn_id))
 
-    conn_type = BaseHook.get_connection(conn_id).conn_type
+def _make_hook(conn_type, conn_id):
+    """Builds the hook of conn_id through the hook_registry."""
+    return hook_registry.make_hook(conn_type, conn_id)
+
+def _open_cursor(conn_type, conn, sql=None, stream=True):
+    """
+    _open_cursor returns a cursor of conn that streams rows from the server
+    instead of materialising the whole result set on the client: a named
+    (server-side) cursor on Postgres and an SSCursor on MySQL. HiveServer2
+    cursors already fetch rows from the server in batches. Postgres named
+    cursors can only run a single SELECT, so any other sql gets a plain
+    cursor, as does any sql when stream is False.
+    """
+    if not stream:
+        return conn.cursor()
     if conn_type == "postgres":
-        return PostgresHook(postgres_conn_id=conn_id)
+        if sql is not None and not _is_single_select(sql):
+            return conn.cursor()
+        return conn.cursor(name=f"data_quality_{uuid.uuid4().hex}")
     if conn_type == "mysql":
-        return MySqlHook(mysql_conn_id=conn_id)
-    if conn_type == "hive":
-        return HiveServer2Hook(hiveserver2_conn_id=conn_id)
+        from MySQLdb.cursors import SSCursor
+        return conn.cursor(SSCursor)
+    return conn.cursor()
+
+_SQL_COMMENTS = re.compile(r"--[^\n]*|/\*.*?\*/", re.DOTALL)
+
+def _is_single_select(sql):
+    """
+    Whether sql is a single SELECT (or WITH, VALUES, TABLE) statement. A
+    semicolon anywhere but at the end, even in a string literal, counts as
+    a second statement.
+    """
+    statement = _SQL_COMMENTS.sub(" ", sql).strip().rstrip(";").strip()
+    if not statement or ";" in statement:
+        return False
+    return statement.split(None, 1)[0].upper().lstrip("(") in ("SELECT", "WITH", "VALUES", "TABLE")
+
+def _close_cursor(conn_type, conn, cursor, exhausted):
+    """
+    Closes cursor and returns whether conn can still be used. Closing a
+    MySQL SSCursor reads every row left in its result, so unless the result
+    was read to the end the connection is discarded instead: closing it
+    aborts the query on the server without reading the rest.
+    """
+    if conn_type == "mysql" and not exhausted:
+        hook_cache.discard(conn)
+        return False
+    cursor.close()
+    return True
+
+def _get_records(conn_id, sql, max_rows=2, parameters=None, stream=True):
+    """
+    _get_records is a helper function for the get_sql_* functions. Runs sql
+    over a connection of the hook_cache and returns at most max_rows rows,
+    so a query returning millions of rows neither reaches nor fills the
+    memory of the worker before it is rejected.
+    """
+    conn_type, hook = _resolve_hook(conn_id)
+    with hook_cache.connection(conn_id, hook) as conn, timed("query", conn_id):
+        return _fetch_records(conn_type, hook, conn, sql, max_rows, parameters, stream)
+
+def _fetch_records(conn_type, hook, conn, sql, max_rows, parameters=None, stream=True):
+    timeout = getattr(_query_scope, "timeout", None)
+    if timeout is not None:
+        _set_statement_timeout(conn_type, conn, timeout)
+    expired = threading.Event()
+    rows = None
+    cursor = _open_cursor(conn_type, conn, sql, stream)
+    try:
+        with _running_query(hook, conn, cursor):
+            def cancel():
+                expired.set()
+                logging.info("Query exceeded its timeout of %s seconds, cancelling it", timeout)
+                _cancel_query(hook, conn, cursor)
+
+            timer = None
+            if timeout is not None:
+                timer = threading.Timer(timeout, cancel)
+                timer.daemon = True
+                timer.start()
+            try:
+                _execute(cursor, sql, parameters)
+                rows = cursor.fetchmany(max_rows)
+            except Exception as error:
+                if timeout is not None and (expired.is_set() or _is_timeout_error(error)):
+                    raise QueryTimeout(f"Query exceeded its timeout of {timeout} seconds") from error
+                raise
+            finally:
+                if timer is not None:
+                    timer.cancel()
+    finally:
+        usable = _close_cursor(conn_type, conn, cursor, rows is not None and len(rows) < max_rows)
+    if timeout is not None and usable:
+        _set_statement_timeout(conn_type, conn, None)
+    return rows
+
+def _execute(cursor, sql, parameters):
+    # sqlite3 cursors reject parameters=None
+    if parameters is None:
+        cursor.execute(sql)
     else:
-        raise ValueError(f"""Connection type of "{conn_type}" not currently supported""")
+        cursor.execute(sql, parameters)
+
+class QueryTimeout(AirflowException):
+    """Raised when a query of a check runs longer than its timeout."""
 
-def get_sql_value(conn_id, sql):
+@contextmanager
+def statement_timeout(seconds):
     """
-    get_sql_value executes a sql query given proper connection parameters.
-    The result of the sql query should be one and only one numeric value.
+    Context manager limiting every query run by the get_sql_* functions in the
+    current thread to `seconds`, see _fetch_records. None lifts the limit.
+    """
+    previous = getattr(_query_scope, "timeout", None)
+    _query_scope.timeout = seconds
+    try:
+        yield
+    finally:
+        _query_scope.timeout = previous
+
+def _set_statement_timeout(conn_type, conn, seconds):
+    """
+    Sets (or, given None, resets) the server-side timeout of the next queries
+    on conn. On Postgres the timeout is local to the current transaction,
+    which ends when the connection goes back to the hook_cache.
+    """
+    if conn_type == "postgres":
+        if seconds is None:
+            return
+        statement = f"SET LOCAL statement_timeout = {int(seconds * 1000)}"
+    elif conn_type == "mysql":
+        statement = f"SET SESSION MAX_EXECUTION_TIME = {int(seconds * 1000) if seconds else 0}"
+    elif conn_type == "hive":
+        statement = f"SET hive.query.timeout.seconds={int(seconds) if seconds else 0}s"
+    else:
+        return
+    with closing(conn.cursor()) as cursor:
+        cursor.execute(statement)
+
+def _is_timeout_error(error):
+    """Whether error is the database aborting a query at its statement timeout."""
+    # 57014 is Postgres' query_canceled, 3024 MySQL's ER_QUERY_TIMEOUT
+    return getattr(error, "pgcode", None) == "57014" or (bool(error.args) and error.args[0] == 3024)
+
+def _split_range(lower, upper, partitions):
+    """
+    Returns the boundaries splitting [lower, upper] into at most `partitions`
+    contiguous ranges. Integer ranges are split on integers, dates and
+    timestamps on their timedeltas.
+    """
+    if lower == upper:
+        return [lower, upper]
+    if isinstance(lower, int) and isinstance(upper, int):
+        boundaries = [lower + (upper - lower) * index // partitions for index in range(partitions + 1)]
+    else:
+        width = upper - lower
+        boundaries = [lower + width * index / partitions for index in range(partitions + 1)]
+        boundaries[-1] = upper
+    # narrow integer or date ranges split into fewer, non-empty ranges
+    unique = boundaries[:1]
+    for boundary in boundaries[1:]:
+        if boundary != unique[-1]:
+            unique.append(boundary)
+    return unique
+
+def _finishing(execute):
+    """Wraps an execute method of an operator class to call finish() however it ends."""
+    @functools.wraps(execute)
+    def wrapper(self, context, *args, **kwargs):
+        try:
+            return execute(self, context, *args, **kwargs)
+        finally:
+            self.finish()
+    return wrapper
+
+def _to_json_value(value):
+    """Converts a watermark value read from a database into a JSON value."""
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return value.isoformat()
+    if isinstance(value, decimal.Decimal):
+        return str(value)
+    return value
+
+def _check_result(result, width=1):
+    """
+    _check_result is a helper function for the get_sql_* functions. Returns
+    the only row of a query result after checking that it is one and only
+    one row of exactly `width` columns.
     """
-    hook = _get_hook(conn_id)
-    result = hook.get_records(sql)
     if len(result) > 1:
         logging.info("Result: %s contains more than 1 entry", str(result))
         raise ValueError("Result from sql query contains more than 1 entry")
     if len(result) < 1:
         raise ValueError("No result returned from sql query")
-    if len(result[0]) != 1:
-        logging.info("Result: %s does not contain exactly 1 column", str(result[0]))
-        raise ValueError("Result from sql query does not contain exactly 1 column")
-    return result[0][0]
+    if len(result[0]) != width:
+        logging.info("Result: %s does not contain exactly %s column(s)", str(result[0]), width)
+        raise ValueError(f"Result from sql query does not contain exactly {width} column(s)")
+    return result[0]
+
+def get_sql_value(conn_id, sql, parameters=None):
+    """
+    get_sql_value executes a sql query given proper connection parameters.
+    The result of the sql query should be one and only one numeric value.
+    """
+    result = _get_records(conn_id, sql, parameters=parameters)
+    return _check_result(result)[0]
+
+def get_sql_row(conn_id, sql, width, parameters=None):
+    """
+    get_sql_row executes a sql query given proper connection parameters.
+    The result of the sql query should be one and only one row of exactly
+    `width` values, which is returned as a tuple.
+    """
+    result = _get_records(conn_id, sql, parameters=parameters)
+    return tuple(_check_result(result, width))
+
+def get_sql_rows(conn_id, sql, max_rows, parameters=None, stream=True):
+    """
+    get_sql_rows executes a sql query given proper connection parameters and
+    returns at most max_rows of its rows as a list of tuples. With stream
+    False the query runs on a plain cursor instead of a server-side one, for
+    statements such as EXPLAIN that server-side cursors cannot run.
+    """
+    return [tuple(row) for row in _get_records(conn_id, sql, max_rows, parameters, stream)]
+
+def get_sql_values(conn_id, sqls):
+    """
+    get_sql_values executes several sql queries in order over a single
+    database connection. Each query is held to the same one value rule as
+    get_sql_value, and the values are returned in the order of `sqls`.
+    """
+    conn_type, hook = _resolve_hook(conn_id)
+    values = []
+    with hook_cache.connection(conn_id, hook) as conn:
+        for sql in sqls:
+            with timed("query", conn_id):
+                result = _fetch_records(conn_type, hook, conn, sql, 2)
+            values.append(_check_result(result)[0])
+    return values
+
+class _QueryGroup:
+    """
+    _QueryGroup keeps track of the queries running on behalf of one
+    run_concurrently() call so that they can be cancelled together.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._running = {}
+        self.cancelled = False
+
+    def add(self, hook, conn, cursor):
+        with self._lock:
+            self._running[id(cursor)] = (hook, conn, cursor)
+            cancelled = self.cancelled
+        if cancelled:
+            _cancel_query(hook, conn, cursor)
+
+    def remove(self, cursor):
+        with self._lock:
+            self._running.pop(id(cursor), None)
+
+    def cancel(self):
+        with self._lock:
+            self.cancelled = True
+            running = list(self._running.values())
+        for hook, conn, cursor in running:
+            _cancel_query(hook, conn, cursor)
+
+_query_scope = threading.local()
+
+@contextmanager
+def _running_query(hook, conn, cursor):
+    """Registers the query on cursor with the _QueryGroup of the current thread, if any."""
+    group = getattr(_query_scope, "group", None)
+    if group is None:
+        yield
+        return
+    group.add(hook, conn, cursor)
+    try:
+        yield
+    finally:
+        group.remove(cursor)
+
+def _cancel_query(hook, conn, cursor):
+    """
+    _cancel_query asks the database to cancel the query running on cursor:
+    psycopg2 connections and pyhive cursors cancel natively, DuckDB and
+    SQLite connections are interrupted, MySQL queries are killed from a
+    second connection.
+    """
+    try:
+        if hasattr(conn, "cancel"):
+            conn.cancel()
+        elif hasattr(cursor, "cancel"):
+            cursor.cancel()
+        elif hasattr(cursor, "interrupt"):
+            cursor.interrupt()
+        elif hasattr(conn, "interrupt"):
+            conn.interrupt()
+        elif hasattr(conn, "thread_id"):
+            with closing(hook.get_conn()) as killer:
+                with closing(killer.cursor()) as kill_cursor:
+                    kill_cursor.execute(f"KILL QUERY {conn.thread_id()}")
+        else:
+            logging.info("Query on %s cannot be cancelled", type(conn).__name__)
+    except Exception as error:
+        logging.warning("Failed to cancel running query: %s", error)
+
+def run_concurrently(calls, max_workers=None):
+    """
+    run_concurrently evaluates several get_sql_* calls in parallel threads,
+    so that their latency is that of the slowest call instead of the sum.
+    If any call fails, the calls that have not started are cancelled, the
+    queries still running are cancelled on the database, and an
+    AirflowException naming the failed call is raised.
+
+    :param calls: mapping of a name to a function taking no arguments
+    :type calls: dict
+    :param max_workers: (optional) number of calls run at the same time,
+        defaults to all of them
+    :type max_workers: int
+    :return: mapping of each name to the return value of its function
+    """
+    group = _QueryGroup()
+    timer = current_timer()
+    timeout = getattr(_query_scope, "timeout", None)
+
+    def run(call):
+        _query_scope.group = group
+        activate(timer)
+        try:
+            with statement_timeout(timeout):
+                return call()
+        finally:
+            _query_scope.group = None
+            activate(None)
+
+    executor = ThreadPoolExecutor(max_workers=max_workers or len(calls))
+    try:
+        futures = {executor.submit(run, call): name for name, call in calls.items()}
+        done, _ = wait(futures, return_when=FIRST_EXCEPTION)
+        for future in done:
+            error = future.exception()
+            if error is not None:
+                for other in futures:
+                    other.cancel()
+                group.cancel()
+                if isinstance(error, QueryTimeout):
+                    raise error
+                raise AirflowException(
+                    f"""Query "{futures[future]}" failed, remaining queries were cancelled: {error}""") from error
+        return {name: future.result() for future, name in futures.items()}
+    finally:
+        executor.shutdown(wait=False)
@@ -0,0 +1,140 @@
+import math
+
+AGGREGATES = ("count", "sum", "avg", "min", "max", "variance", "stddev")
+SAMPLED_AGGREGATES = ("count", "sum", "avg")
+
+class AggregateState:
+    """
+    AggregateState holds mergeable partial aggregates of a numeric column:
+    count, sum, sum of squares, min and max. States computed over disjoint
+    slices of a table merge into the state of their union, from which
+    count, sum, avg, min, max, variance and stddev are derived.
+    """
+
+    def __init__(self, count=0, total=0.0, total_squares=0.0, minimum=None, maximum=None):
+        self.count = count
+        self.total = total
+        self.total_squares = total_squares
+        self.minimum = minimum
+        self.maximum = maximum
+
+    @staticmethod
+    def select_expressions(column, conn_type=None):
+        """
+        Returns the sql select list computing a state over column, see
+        from_row(). Squares are computed as floating point numbers in the
+        dialect of conn_type, as the square of an integer column overflows
+        its integer type long before the column itself does.
+        """
+        square = f"{_to_double(column, conn_type)} * {column}"
+        return f"COUNT({column}), SUM({column}), SUM({square}), MIN({column}), MAX({column})"
+
+    @classmethod
+    def from_row(cls, row):
+        """Builds a state from a row of the select_expressions() columns."""
+        count, total, total_squares, minimum, maximum = row
+        return cls(
+            count=int(count or 0),
+            total=float(total or 0),
+            total_squares=float(total_squares or 0),
+            minimum=None if minimum is None else float(minimum),
+            maximum=None if maximum is None else float(maximum))
+
+    @classmethod
+    def from_dict(cls, state):
+        return cls(**state)
+
+    def to_dict(self):
+        return {
+            "count" : self.count,
+            "total" : self.total,
+            "total_squares" : self.total_squares,
+            "minimum" : self.minimum,
+            "maximum" : self.maximum
+        }
+
+    def merge(self, other):
+        """Returns the state of the union of the slices of self and other."""
+        return AggregateState(
+            count=self.count + other.count,
+            total=self.total + other.total,
+            total_squares=self.total_squares + other.total_squares,
+            minimum=_pick(min, self.minimum, other.minimum),
+            maximum=_pick(max, self.maximum, other.maximum))
+
+    def value(self, aggregate):
+        """Returns the value of aggregate, one of AGGREGATES, over the state."""
+        if aggregate == "count":
+            return self.count
+        if aggregate == "sum":
+            return self.total
+        if self.count == 0:
+            raise ValueError(f"""Aggregate "{aggregate}" is undefined over no rows""")
+        if aggregate == "avg":
+            return self.total / self.count
+        if aggregate == "min":
+            return self.minimum
+        if aggregate == "max":
+            return self.maximum
+        if aggregate in ("variance", "stddev"):
+            if self.count < 2:
+                raise ValueError(f"""Aggregate "{aggregate}" is undefined over less than 2 rows""")
+            # sample variance, as VAR_SAMP/STDDEV_SAMP
+            variance = max(self.total_squares - self.total * self.total / self.count, 0.0) / (self.count - 1)
+            return variance if aggregate == "variance" else math.sqrt(variance)
+        raise ValueError(f"""Aggregate "{aggregate}" not currently supported""")
+
+    def estimate(self, aggregate, fraction, confidence, design_effect=1):
+        """
+        Treats the state as a random sample of the given fraction of a table
+        and returns (estimate, lower, upper): the estimate of aggregate, one of
+        SAMPLED_AGGREGATES, over the whole table along with its normal
+        approximation confidence interval at the given confidence level.
+        The interval assumes rows were sampled independently; design_effect
+        is the factor by which a sample of whole blocks or key ranges
+        inflates the variance over that of a row sample.
+        """
+        if self.count < 2:
+            raise ValueError("Sample contains less than 2 rows")
+        z_score = _z_score(confidence)
+        if aggregate == "avg":
+            estimate = self.total / self.count
+            standard_error = math.sqrt(self.value("variance") / self.count)
+        elif aggregate == "sum":
+            estimate = self.total / fraction
+            standard_error = math.sqrt((1 - fraction) * self.total_squares) / fraction
+        elif aggregate == "count":
+            estimate = self.count / fraction
+            standard_error = math.sqrt((1 - fraction) * self.count) / fraction
+        else:
+            raise ValueError(f"""Aggregate "{aggregate}" cannot be estimated from a sample""")
+        standard_error *= math.sqrt(design_effect)
+        return estimate, estimate - z_score * standard_error, estimate + z_score * standard_error
+
+def _z_score(confidence):
+    """Returns the two-sided standard normal quantile of a confidence level."""
+    target = (1 + confidence) / 2
+    low, high = 0.0, 10.0
+    for _ in range(60):
+        middle = (low + high) / 2
+        if 0.5 * (1 + math.erf(middle / math.sqrt(2))) < target:
+            low = middle
+        else:
+            high = middle
+    return (low + high) / 2
+
+def _pick(function, left, right):
+    if left is None:
+        return right
+    if right is None:
+        return left
+    return function(left, right)
+
+def _to_double(column, conn_type):
+    if conn_type == "postgres":
+        return f"CAST({column} AS DOUBLE PRECISION)"
+    if conn_type == "mysql":
+        # CAST(... AS DOUBLE) needs MySQL 8.0.17, multiplying by a double literal works on every version
+        return f"({column} * 1e0)"
+    # Hive, DuckDB and SQLite
+    return f"CAST({column} AS DOUBLE)"
@@ -0,0 +1,131 @@
+from airflow.utils.decorators import apply_defaults
+from airflow.plugins_manager import AirflowPlugin
+from airflow import AirflowException
+
+from base_data_quality_operator import (BaseDataQualityOperator, QueryTimeout, get_sql_row, get_sql_values,
+                                        statement_timeout)
+from data_quality_timing import timed
+
+class DataQualityBatchCheckOperator(BaseDataQualityOperator):
+    """
+    DataQualityBatchCheckOperator builds off BaseDataQualityOperator and
+    executes many data quality checks against one connection in a single
+    task, comparing each result against its own high & low threshold values.
+
+    If a table is given, the sql of every check is an aggregate expression
+    over that table (e.g. "AVG(cost)") and all checks are fused into one
+    statement, so the table is scanned once. Otherwise every check is a full
+    sql statement and all of them run in order over one database connection.
+    A query exceeding query_timeout fails the whole batch, with a timeout
+    outcome pushed for every check. A check with a
+    NULL result (e.g. AVG over an empty table) is outside its thresholds.
+    The incremental, partitioned, fallback_sql and preflight options of the
+    base operator do not apply to batches and are rejected.
+
+    :param checks: checks to run, each a dict with keys "check_name", "sql",
+        "min_threshold", "max_threshold" and optionally "check_description"
+    :type checks: list
+    :param table: (optional) table that every check expression aggregates over
+    :type table: str
+    """
+
+    template_fields = ('checks',)
+    template_ext = ('.sql',)
+
+    @apply_defaults
+    def __init__(self,
+                 checks,
+                 table=None,
+                 *args,
+                 **kwargs):
+        super().__init__(sql=None, *args, **kwargs)
+        self.reject_options("incremental", "partitioned", "fallback_sql", "preflight")
+        check_names = [check["check_name"] for check in checks]
+        if len(set(check_names)) != len(check_names):
+            raise ValueError("Check names of a batch check must be unique")
+        self.checks = checks
+        self.table = table
+
+    def execute(self, context):
+        self.start_timing()
+        try:
+            with timed("check", self.conn_id), statement_timeout(self.query_timeout):
+                if self.table:
+                    results = get_sql_row(self.conn_id, self.get_fused_sql(), len(self.checks))
+                else:
+                    results = get_sql_values(self.conn_id, [check["sql"] for check in self.checks])
+        except QueryTimeout as error:
+            self.fail_on_timeout(context, error)
+
+        info_dicts = []
+        for check, result in zip(self.checks, results):
+            info_dict = {
+                "result" : result,
+                "check_name" : check["check_name"],
+                "description" : check.get("check_description", self.check_description),
+                "task_id" : self.task_id,
+                "execution_date" : context.get("execution_date"),
+                "min_threshold" : check["min_threshold"],
+                "max_threshold" : check["max_threshold"],
+                "within_threshold" : result is not None and check["min_threshold"] <= result <= check["max_threshold"]
+            }
+            self.push(info_dict)
+            info_dicts.append(info_dict)
+        self.record_timings(*info_dicts)
+
+        failed_checks = [info_dict for info_dict in info_dicts if not info_dict["within_threshold"]]
+        if failed_checks:
+            context["ti"].xcom_push(key=f"""result data from task {self.task_id}""", value=info_dicts)
+            self.send_failure_notification(failed_checks)
+        return info_dicts
+
+    def fail_on_timeout(self, context, error):
+        """
+        Pushes the timeout outcome of every check of the batch, none of which
+        has a result, and fails the task.
+        """
+        info_dicts = []
+        for check in self.checks:
+            info_dict = {
+                "result" : None,
+                "check_name" : check["check_name"],
+                "description" : check.get("check_description", self.check_description),
+                "task_id" : self.task_id,
+                "execution_date" : context.get("execution_date"),
+                "min_threshold" : check["min_threshold"],
+                "max_threshold" : check["max_threshold"],
+                "within_threshold" : False,
+                "timed_out" : True
+            }
+            self.push(info_dict)
+            info_dicts.append(info_dict)
+        self.record_timings(*info_dicts)
+        raise AirflowException(f"""Data Quality Batch Check "{self.task_id}" timed out: {error}""") from error
+
+    def get_fused_sql(self):
+        """Fuses the expressions of all checks into one statement over self.table."""
+        expressions = ",\n       ".join(check["sql"].strip().rstrip(";") for check in self.checks)
+        return f"SELECT {expressions}\nFROM {self.table};"
+
+    def send_failure_notification(self, info_dicts):
+        """
+        send_failure_notification will throw an AirflowException listing every
+        failed check of the batch along with its result and thresholds.
+        """
+        failures = "\n".join(
+            f"""Check "{info_dict.get("check_name")}": Result: {_format_result(info_dict.get("result"))} """
+            f"""is not within thresholds {info_dict.get("min_threshold")} and {info_dict.get("max_threshold")}"""
+            for info_dict in info_dicts)
+        body = f"""Data Quality Batch Check: "{self.task_id}" failed {len(info_dicts)} of {len(self.checks)} checks.
+DAG: {self.dag_id}
+Task_id: {self.task_id}
+Execution date: {info_dicts[0].get("execution_date")}
+{failures}"""
+        raise AirflowException(body)
+
+def _format_result(result):
+    return "NULL" if result is None else round(result, 2)
+
+class DataQualityBatchCheckPlugin(AirflowPlugin):
+    name = "data_quality_batch_check_operator"
+    operators = [DataQualityBatchCheckOperator]
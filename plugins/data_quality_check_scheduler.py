@@ -0,0 +1,135 @@
+import datetime
+import logging
+import math
+
+from airflow.models import Variable
+
+TASK_RUNTIMES_KEY = "data_quality_task_runtimes__{dag_id}"
+
+def get_task_runtimes(dag_id, days=30):
+    """
+    Returns the mean duration in seconds of the successful runs of every
+    task of dag_id over the last days, read from the task instances of the
+    Airflow metadata database. Returns an empty mapping when the database
+    cannot be read. This aggregates over the task instance table, so DAG
+    files should read get_cached_task_runtimes() instead.
+    """
+    try:
+        from sqlalchemy import func
+        from airflow.models import TaskInstance
+        from airflow.utils.db import create_session
+        from airflow.utils.state import State
+
+        since = datetime.datetime.utcnow() - datetime.timedelta(days=days)
+        with create_session() as session:
+            rows = session.query(TaskInstance.task_id, func.avg(TaskInstance.duration)).filter(
+                TaskInstance.dag_id == dag_id,
+                TaskInstance.state == State.SUCCESS,
+                TaskInstance.execution_date >= since
+            ).group_by(TaskInstance.task_id).all()
+    except Exception:
+        logging.exception("Failed to read the task runtimes of %s, checks are ordered without them", dag_id)
+        return {}
+    return {task_id: float(duration) for task_id, duration in rows if duration is not None}
+
+def refresh_task_runtimes(dag_id, days=30):
+    """
+    Stores the get_task_runtimes() of dag_id in an Airflow Variable, read by
+    get_cached_task_runtimes(). Meant to run in a task, e.g. the callable of
+    a PythonOperator at the end of the DAG, never while the DAG file is
+    parsed. Returns the runtimes.
+    """
+    runtimes = get_task_runtimes(dag_id, days)
+    Variable.set(TASK_RUNTIMES_KEY.format(dag_id=dag_id), runtimes, serialize_json=True)
+    return runtimes
+
+def get_cached_task_runtimes(dag_id):
+    """
+    Returns the runtimes of the tasks of dag_id last stored by
+    refresh_task_runtimes(), a single Variable lookup cheap enough for DAG
+    files. Returns an empty mapping before the first refresh or when the
+    Variable cannot be read, so DAG files still parse without it.
+    """
+    try:
+        return Variable.get(TASK_RUNTIMES_KEY.format(dag_id=dag_id), default_var=None, deserialize_json=True) or {}
+    except Exception:
+        logging.exception("Failed to read the cached task runtimes of %s, checks are ordered without them", dag_id)
+        return {}
+
+def plan_checks(configs, runtimes=None):
+    """
+    Orders YAML check configurations into tiers, run one after the other
+    with later tiers gated on earlier ones. A check is in the tier of its
+    "tier" key (default 0), and in a later tier than every check named in its
+    "depends_on" list. Within a tier checks are sorted by runtime, cheapest
+    first: the runtime of runtimes (a mapping of test_name to seconds, e.g.
+    from get_task_runtimes()), else the "estimated_runtime" key of the check,
+    checks of unknown runtime going last.
+
+    :param configs: check configurations, as returned by load_configs()
+    :type configs: list
+    :param runtimes: (optional) mapping of a test_name to its runtime in seconds
+    :type runtimes: dict
+    :return: list of tiers, each a list of configurations
+    """
+    runtimes = runtimes or {}
+    configs_by_name = {conf["test_name"]: conf for conf in configs}
+    if len(configs_by_name) != len(configs):
+        raise ValueError("Test names of data quality checks must be unique")
+    for conf in configs:
+        unknown_checks = set(conf["depends_on"] or []) - set(configs_by_name)
+        if unknown_checks:
+            raise ValueError(f"""Check "{conf['test_name']}" depends on unknown checks {sorted(unknown_checks)}""")
+
+    tiers = {}
+    def get_tier(name, visiting=()):
+        if name in visiting:
+            raise ValueError(f"Dependencies of data quality checks form a cycle: {' -> '.join(visiting + (name,))}")
+        if name not in tiers:
+            conf = configs_by_name[name]
+            tiers[name] = max([conf["tier"] or 0] + [
+                get_tier(dependency, visiting + (name,)) + 1 for dependency in conf["depends_on"] or []
+            ])
+        return tiers[name]
+
+    def get_runtime(conf):
+        runtime = runtimes.get(conf["test_name"], conf["estimated_runtime"])
+        return math.inf if runtime is None else runtime
+
+    planned = []
+    for tier in sorted(set(get_tier(name) for name in configs_by_name)):
+        tier_configs = [conf for conf in configs if tiers[conf["test_name"]] == tier]
+        planned.append(sorted(tier_configs, key=get_runtime))
+    return planned
+
+def chain_checks(tasks, configs, runtimes=None):
+    """
+    Sets the dependencies of the check tasks of a YAML DAG factory following
+    plan_checks(): every task runs after its depends_on checks and after all
+    checks of the previous tier, so with the default all_success trigger rule
+    expensive checks of later tiers do not run once a cheap gating check has
+    failed. Within a tier, cheaper checks get a higher priority_weight and
+    are scheduled first.
+
+    :param tasks: mapping of a test_name to the task of its check
+    :type tasks: dict
+    :param configs: check configurations of the tasks
+    :type configs: list
+    :param runtimes: (optional) mapping of a test_name to its runtime in seconds
+    :type runtimes: dict
+    :return: list of tiers, each a list of tasks
+    """
+    tiers = plan_checks(configs, runtimes)
+    previous_tasks = []
+    task_tiers = []
+    for tier in tiers:
+        tier_tasks = []
+        for rank, conf in enumerate(tier):
+            task = tasks[conf["test_name"]]
+            task.priority_weight = len(tier) - rank
+            upstream_tasks = previous_tasks + [tasks[name] for name in conf["depends_on"] or []]
+            task.set_upstream(list(dict.fromkeys(upstream_tasks)))
+            tier_tasks.append(task)
+        task_tiers.append(tier_tasks)
+        previous_tasks = tier_tasks
+    return task_tiers
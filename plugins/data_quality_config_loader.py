@@ -0,0 +1,142 @@
+import glob
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import time
+from collections import defaultdict
+
+import yaml
+from airflow.configuration import conf as airflow_conf
+
+try:
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:
+    from yaml import SafeLoader
+
+from data_quality_result_cache import _decode, _encode, _remove_quietly, private_directory
+
+def recursive_make_defaultdict(conf):
+    """
+    recursive_make_defaultdict takes in a configuration dictionary
+    and recursively converts all nested dictionaries into a defaultdict
+    data structure with a default value as None. The given configuration
+    is left untouched.
+    """
+    if isinstance(conf, dict):
+        return defaultdict(lambda: None, {key: recursive_make_defaultdict(value) for key, value in conf.items()})
+    if isinstance(conf, list):
+        return [recursive_make_defaultdict(value) for value in conf]
+    return conf
+
+class ConfigLoader:
+    """
+    ConfigLoader loads the YAML check configurations of a directory. Parsed
+    configurations are cached by file path, modification time and size, in
+    memory and in a JSON file on local disk (the scheduler parses DAG files
+    in short-lived processes), so only new or changed files are parsed again.
+    Files are parsed with the C YAML loader when PyYAML was built with it.
+
+    The cache directory is created private to the current user and is not
+    used if it is not, see private_directory(). Configurations with
+    non-string keys, which JSON cannot keep, are only cached in memory.
+    Failing to read or write the disk cache is logged and never fails a load.
+
+    :param cache_dir: (optional) directory of the on-disk cache, defaults to
+        the ``[data_quality] config_cache_dir`` setting or a temporary directory
+    :type cache_dir: str
+    """
+
+    def __init__(self, cache_dir=None):
+        self.cache_dir = cache_dir or airflow_conf.get(
+            "data_quality",
+            "config_cache_dir",
+            fallback=os.path.join(tempfile.gettempdir(), "airflow_dq_config_cache"))
+        self._caches = {}
+        self.stats = {}
+
+    def load(self, yaml_dir, pattern="*.yaml"):
+        """
+        Returns the configurations of all files of yaml_dir matching pattern,
+        sorted by path, each as a defaultdict from recursive_make_defaultdict.
+        Timings of the load are logged and kept in self.stats.
+        """
+        start = time.perf_counter()
+        cache_path = os.path.join(
+            self.cache_dir, hashlib.sha1(os.path.abspath(yaml_dir).encode("utf-8")).hexdigest() + ".json")
+        cache = self._caches.get(cache_path)
+        if cache is None:
+            cache = self._caches[cache_path] = _read_cache(cache_path)
+
+        paths = sorted(glob.glob(os.path.join(str(yaml_dir), pattern)))
+        parsed = 0
+        parse_seconds = 0.0
+        configs = []
+        for path in paths:
+            stat = os.stat(path)
+            signature = (stat.st_mtime_ns, stat.st_size)
+            entry = cache.get(path)
+            if entry is None or entry[0] != signature:
+                parse_start = time.perf_counter()
+                with open(path) as config:
+                    entry = cache[path] = (signature, yaml.load(config, Loader=SafeLoader))
+                parse_seconds += time.perf_counter() - parse_start
+                parsed += 1
+            configs.append(recursive_make_defaultdict(entry[1]))
+
+        removed = set(cache) - set(paths)
+        for path in removed:
+            del cache[path]
+        if parsed or removed:
+            _write_cache(cache_path, cache)
+
+        self.stats = {
+            "files" : len(paths),
+            "parsed" : parsed,
+            "cached" : len(paths) - parsed,
+            "parse_seconds" : parse_seconds,
+            "total_seconds" : time.perf_counter() - start
+        }
+        logging.info(
+            "Loaded %(files)s data quality configs (%(parsed)s parsed, %(cached)s cached) "
+            "in %(total_seconds).3fs, %(parse_seconds).3fs parsing", self.stats)
+        return configs
+
+def _read_cache(cache_path):
+    if not private_directory(os.path.dirname(cache_path)):
+        return {}
+    try:
+        with open(cache_path) as cache_file:
+            return json.load(cache_file, object_hook=_decode)
+    except (OSError, ValueError):
+        return {}
+
+def _write_cache(cache_path, cache):
+    directory = os.path.dirname(cache_path)
+    if not private_directory(directory):
+        return
+    entries = {path: entry for path, entry in cache.items() if _has_string_keys(entry[1])}
+    tmp_path = None
+    try:
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        with os.fdopen(fd, "w") as cache_file:
+            json.dump(_encode(entries), cache_file)
+        os.replace(tmp_path, cache_path)
+    except Exception:
+        logging.warning("Failed to write the config cache %s", cache_path, exc_info=True)
+        if tmp_path is not None:
+            _remove_quietly(tmp_path)
+
+def _has_string_keys(value):
+    if isinstance(value, dict):
+        return all(isinstance(key, str) and _has_string_keys(item) for key, item in value.items())
+    if isinstance(value, list):
+        return all(_has_string_keys(item) for item in value)
+    return True
+
+config_loader = ConfigLoader()
+
+def load_configs(yaml_dir, pattern="*.yaml"):
+    """Loads the YAML check configurations of yaml_dir with the shared ConfigLoader."""
+    return config_loader.load(yaml_dir, pattern)
@@ -0,0 +1,190 @@
+from collections import OrderedDict
+from collections.abc import Mapping
+
+import numpy as np
+
+from airflow.utils.decorators import apply_defaults
+from airflow.plugins_manager import AirflowPlugin
+from airflow import AirflowException
+
+from base_data_quality_operator import BaseDataQualityOperator
+from data_quality_thresholds import within_thresholds
+from data_quality_timing import timed
+
+COLUMN_METRICS = ("null_count", "min", "max", "mean", "sum", "distinct_count")
+
+try:
+    from pandas import NA as _PANDAS_NA
+except ImportError:
+    _PANDAS_NA = None
+
+class DataQualityDataFrameCheckOperator(BaseDataQualityOperator):
+    """
+    DataQualityDataFrameCheckOperator builds off BaseDataQualityOperator and
+    checks data the pipeline already holds in memory, a pandas DataFrame, an
+    Arrow table or a mapping of column name to array, without writing it to a
+    database first. Metrics are computed with NumPy over each column once,
+    and all of them are compared against their thresholds at once. Every
+    metric is pushed as a check named after it, with the same info_dict as
+    the sql operators. The query_timeout, incremental, partitioned,
+    fallback_sql and preflight options of the base operator do not apply to
+    in-memory data and are rejected.
+
+    Metrics are named like the metrics of DataQualityProfileOperator:
+    "row_count", or "<column>.<metric>" where metric is one of null_count,
+    min, max, mean, sum or distinct_count. Nulls (None, NaN, NaT and pd.NA)
+    are left out of every metric but null_count. The min and max of
+    non-numeric columns (strings, dates) are only within open (None, None)
+    thresholds.
+
+    :param data: callable returning the data to check, or the path of a
+        Parquet or CSV file read with pandas
+    :type data: callable or str
+    :param thresholds: mapping of a metric name to its numeric (min_threshold,
+        max_threshold), either of which can be None for an open bound
+    :type thresholds: dict
+    """
+
+    template_fields = ('data',)
+
+    @apply_defaults
+    def __init__(self,
+                 data,
+                 thresholds,
+                 conn_id=None,
+                 *args,
+                 **kwargs):
+        super().__init__(sql=None, conn_id=conn_id, *args, **kwargs)
+        self.reject_options("query_timeout", "incremental", "partitioned", "fallback_sql", "preflight")
+        for metric_name in thresholds:
+            _parse_metric(metric_name)
+        self.data = data
+        self.thresholds = thresholds
+
+    def execute(self, context):
+        self.start_timing()
+        metric_names = list(self.thresholds)
+        with timed("check"):
+            results = compute_metrics(load_data(self.data), metric_names)
+
+        with timed("threshold"):
+            within = within_thresholds(
+                results,
+                [self.thresholds[metric_name] for metric_name in metric_names])
+
+        info_dicts = []
+        for metric_name, result, within_threshold in zip(metric_names, results, within):
+            min_threshold, max_threshold = self.thresholds[metric_name]
+            info_dict = {
+                "result" : result,
+                "check_name" : metric_name,
+                "description" : self.check_description,
+                "task_id" : self.task_id,
+                "execution_date" : context.get("execution_date"),
+                "min_threshold" : min_threshold,
+                "max_threshold" : max_threshold,
+                "within_threshold" : within_threshold
+            }
+            self.push(info_dict)
+            info_dicts.append(info_dict)
+        self.record_timings(*info_dicts)
+
+        failed_checks = [info_dict for info_dict in info_dicts if not info_dict["within_threshold"]]
+        if failed_checks:
+            context["ti"].xcom_push(key=f"""result data from task {self.task_id}""", value=info_dicts)
+            self.send_failure_notification(failed_checks)
+        return info_dicts
+
+    def send_failure_notification(self, info_dicts):
+        """
+        send_failure_notification will throw an AirflowException listing every
+        metric outside its thresholds.
+        """
+        failures = "\n".join(
+            f"""Metric "{info_dict.get("check_name")}": Result: {info_dict.get("result")} """
+            f"""is not within thresholds {info_dict.get("min_threshold")} and {info_dict.get("max_threshold")}"""
+            for info_dict in info_dicts)
+        body = f"""Data Quality DataFrame Check: "{self.task_id}" failed {len(info_dicts)} of {len(self.thresholds)} checks.
+DAG: {self.dag_id}
+Task_id: {self.task_id}
+Execution date: {info_dicts[0].get("execution_date")}
+{failures}"""
+        raise AirflowException(body)
+
+def load_data(data):
+    """Returns the data of a loader callable, or reads it from a Parquet or CSV file path."""
+    if callable(data):
+        return data()
+    import pandas as pd
+    if data.lower().endswith((".parquet", ".pq")):
+        return pd.read_parquet(data)
+    return pd.read_csv(data)
+
+def compute_metrics(data, metric_names):
+    """
+    Computes the metrics of metric_names over data, a DataFrame, Arrow table
+    or mapping of column name to array. Each column is converted to a NumPy
+    array and has its nulls masked once, however many of its metrics are
+    asked for. Returns the results in the order of metric_names, as Python
+    values, None for metrics of no non-null values.
+    """
+    metrics_by_column = OrderedDict()
+    for metric_name in metric_names:
+        column, metric = _parse_metric(metric_name)
+        if column is not None:
+            metrics_by_column.setdefault(column, set()).add(metric)
+
+    results = {"row_count" : _row_count(data)}
+    for column, metrics in metrics_by_column.items():
+        values = np.asarray(data[column])
+        nulls = _null_mask(values)
+        values = values[~nulls]
+        for metric in metrics:
+            results[f"{column}.{metric}"] = _compute(metric, values, nulls)
+    return [results[metric_name] for metric_name in metric_names]
+
+def _parse_metric(metric_name):
+    """Splits metric_name into its (column, metric), column being None for row_count."""
+    if metric_name == "row_count":
+        return None, metric_name
+    column, _, metric = metric_name.rpartition(".")
+    if not column or metric not in COLUMN_METRICS:
+        raise ValueError(f"""Metric "{metric_name}" not currently supported""")
+    return column, metric
+
+def _row_count(data):
+    if isinstance(data, Mapping):
+        return len(np.asarray(next(iter(data.values())))) if data else 0
+    return len(data)
+
+def _null_mask(values):
+    if values.dtype.kind == "f":
+        return np.isnan(values)
+    if values.dtype.kind in "mM":
+        return np.isnat(values)
+    if values.dtype.kind == "O":
+        # NaN is the only value not equal to itself, pd.NA compares to nothing
+        return np.fromiter((value is None or value is _PANDAS_NA or value != value for value in values),
+                           dtype=bool, count=len(values))
+    return np.zeros(len(values), dtype=bool)
+
+def _compute(metric, values, nulls):
+    if metric == "null_count":
+        return int(nulls.sum())
+    if metric == "distinct_count":
+        return len(set(values.tolist())) if values.dtype.kind == "O" else len(np.unique(values))
+    if not len(values):
+        return None
+    if metric == "min":
+        result = values.min()
+    elif metric == "max":
+        result = values.max()
+    elif metric == "mean":
+        result = values.mean()
+    else:
+        result = values.sum()
+    return result.item() if isinstance(result, np.generic) else result
+
+class DataQualityDataFrameCheckPlugin(AirflowPlugin):
+    name = "data_quality_dataframe_check_operator"
+    operators = [DataQualityDataFrameCheckOperator]
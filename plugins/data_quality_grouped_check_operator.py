@@ -0,0 +1,164 @@
+from airflow.utils.decorators import apply_defaults
+from airflow.plugins_manager import AirflowPlugin
+from airflow import AirflowException
+
+from base_data_quality_operator import (BaseDataQualityOperator, QueryTimeout, get_sql_rows, run_concurrently,
+                                        statement_timeout)
+from data_quality_thresholds import within_thresholds
+from data_quality_timing import timed
+
+class DataQualityGroupedCheckOperator(BaseDataQualityOperator):
+    """
+    DataQualityGroupedCheckOperator builds off BaseDataQualityOperator and
+    checks a metric of every segment of a table (region, customer, ...) in a
+    single task and query: sql returns one (group_key, value) row per group,
+    e.g. SELECT region, SUM(cost) FROM costs GROUP BY region.
+
+    Each group is compared against its own thresholds if it has any, taken
+    from the thresholds mapping or from the (group_key, min_threshold,
+    max_threshold) rows of threshold_sql, and against the global
+    min_threshold and max_threshold otherwise. All groups are compared at
+    once, every group is pushed as a check named after its group key, and
+    the task fails with a report of the failing groups only. The
+    incremental, partitioned, fallback_sql and preflight options of the base
+    operator do not apply to grouped results and are rejected.
+
+    :param sql: sql returning one (group_key, value) row per group
+    :type sql: str
+    :param min_threshold: (optional) lower bound of groups without their own thresholds
+    :type min_threshold: numeric
+    :param max_threshold: (optional) upper bound of groups without their own thresholds
+    :type max_threshold: numeric
+    :param thresholds: (optional) mapping of a group key to its
+        (min_threshold, max_threshold), either of which can be None for an
+        open bound
+    :type thresholds: dict
+    :param threshold_sql: (optional) sql returning one (group_key,
+        min_threshold, max_threshold) row per group, overriding thresholds
+    :type threshold_sql: str
+    :param threshold_conn_id: (optional) connection id of threshold_sql,
+        defaults to conn_id
+    :type threshold_conn_id: str
+    :param max_groups: number of groups above which the check fails instead
+        of loading every row
+    :type max_groups: int
+    :param max_reported_groups: number of failing groups listed in the failure report
+    :type max_reported_groups: int
+    """
+
+    template_fields = ('sql', 'threshold_sql')
+    template_ext = ('.sql',)
+
+    @apply_defaults
+    def __init__(self,
+                 sql,
+                 min_threshold=None,
+                 max_threshold=None,
+                 thresholds=None,
+                 threshold_sql=None,
+                 threshold_conn_id=None,
+                 max_groups=100000,
+                 max_reported_groups=20,
+                 *args,
+                 **kwargs):
+        super().__init__(sql=sql, *args, **kwargs)
+        self.reject_options("incremental", "partitioned", "fallback_sql", "preflight")
+        self.min_threshold = min_threshold
+        self.max_threshold = max_threshold
+        self.thresholds = thresholds or {}
+        self.threshold_sql = threshold_sql
+        self.threshold_conn_id = threshold_conn_id or self.conn_id
+        self.max_groups = max_groups
+        self.max_reported_groups = max_reported_groups
+
+    def execute(self, context):
+        self.start_timing()
+        queries = {"sql" : self.time_query("check", self.conn_id, self.sql)}
+        if self.threshold_sql:
+            queries["threshold_sql"] = self.time_query("threshold", self.threshold_conn_id, self.threshold_sql)
+        try:
+            with statement_timeout(self.query_timeout):
+                if len(queries) > 1:
+                    rows = run_concurrently(queries)
+                else:
+                    rows = {"sql" : queries["sql"]()}
+        except QueryTimeout as error:
+            self.fail_on_timeout(context, error)
+
+        group_keys = [row[0] for row in rows["sql"]]
+        if len(set(group_keys)) != len(group_keys):
+            raise AirflowException(f"Grouped check {self.task_id} returned more than one row per group")
+        thresholds = dict(self.thresholds)
+        thresholds.update((row[0], (row[1], row[2])) for row in rows.get("threshold_sql", []))
+        group_thresholds = [thresholds.get(key, (self.min_threshold, self.max_threshold)) for key in group_keys]
+        with timed("threshold"):
+            within = within_thresholds([row[1] for row in rows["sql"]], group_thresholds)
+
+        info_dicts = []
+        for (group_key, result), (min_threshold, max_threshold), within_threshold in zip(
+                rows["sql"], group_thresholds, within):
+            info_dict = {
+                "result" : result,
+                "check_name" : str(group_key),
+                "description" : self.check_description,
+                "task_id" : self.task_id,
+                "execution_date" : context.get("execution_date"),
+                "min_threshold" : min_threshold,
+                "max_threshold" : max_threshold,
+                "within_threshold" : within_threshold
+            }
+            self.push(info_dict)
+            info_dicts.append(info_dict)
+        self.record_timings(*info_dicts)
+
+        failed_groups = [info_dict for info_dict in info_dicts if not info_dict["within_threshold"]]
+        group_dict = {
+            "task_id" : self.task_id,
+            "execution_date" : context.get("execution_date"),
+            "description" : self.check_description,
+            "groups" : len(info_dicts),
+            "failed_groups" : failed_groups,
+            "within_threshold" : not failed_groups
+        }
+        if failed_groups:
+            context["ti"].xcom_push(key=f"""result data from task {self.task_id}""", value=group_dict)
+            self.send_failure_notification(group_dict)
+        return group_dict
+
+    def time_query(self, phase, conn_id, sql):
+        """
+        Returns the query of the (group_key, ...) rows of sql, timed as phase.
+        Fails if there are more than max_groups rows.
+        """
+        def query():
+            with timed(phase, conn_id):
+                rows = get_sql_rows(conn_id, sql, self.max_groups + 1)
+            if len(rows) > self.max_groups:
+                raise AirflowException(f"Grouped check {self.task_id} returned more than {self.max_groups} groups")
+            return rows
+        return query
+
+    def send_failure_notification(self, info_dict):
+        """
+        send_failure_notification will throw an AirflowException listing the
+        first max_reported_groups failing groups along with their result and
+        thresholds.
+        """
+        failed_groups = info_dict["failed_groups"]
+        failures = "\n".join(
+            f"""Group "{group.get("check_name")}": Result: {group.get("result")} """
+            f"""is not within thresholds {group.get("min_threshold")} and {group.get("max_threshold")}"""
+            for group in failed_groups[:self.max_reported_groups])
+        if len(failed_groups) > self.max_reported_groups:
+            failures += f"\n... and {len(failed_groups) - self.max_reported_groups} more groups"
+        body = f"""Data Quality Grouped Check: "{self.task_id}" failed {len(failed_groups)} of {info_dict["groups"]} groups.
+DAG: {self.dag_id}
+Task_id: {self.task_id}
+Check description: {self.check_description}
+Execution date: {info_dict.get("execution_date")}
+{failures}"""
+        raise AirflowException(body)
+
+class DataQualityGroupedCheckPlugin(AirflowPlugin):
+    name = "data_quality_grouped_check_operator"
+    operators = [DataQualityGroupedCheckOperator]
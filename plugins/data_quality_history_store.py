@@ -0,0 +1,265 @@
+import datetime
+import fcntl
+import hashlib
+import json
+import logging
+import os
+import tempfile
+from contextlib import contextmanager
+
+import numpy as np
+
+from airflow.configuration import conf
+
+from data_quality_result_cache import private_directory
+
+RECORD_DTYPE = np.dtype([
+    ("check_key", "<u8"),
+    ("execution_date", "<i8"),
+    ("result", "<f8"),
+    ("min_threshold", "<f8"),
+    ("max_threshold", "<f8"),
+    ("within_threshold", "i1")
+])
+
+EPOCH = datetime.datetime(1970, 1, 1)
+
+class HistoryStore:
+    """
+    HistoryStore keeps the results of data quality checks in local columnar
+    files, partitioned by dag_id and month of the execution date:
+
+        <directory>/<dag_id>/<YYYY-MM>/data.npy    compacted records
+        <directory>/<dag_id>/<YYYY-MM>/append.bin  records appended since
+        <directory>/<dag_id>/checks.json            check_key -> [task_id, check_name]
+
+    Records are fixed-size rows of RECORD_DTYPE: a 64-bit key of
+    (task_id, check_name), the execution date in microseconds since the
+    epoch (UTC), result, thresholds and within_threshold (1, 0 or -1 when
+    unknown); missing values are NaN. Compacted records are sorted by
+    check_key and execution date, so the results of one check are a
+    contiguous slice found by binary search of a memory-mapped file.
+    Partitions are compacted once their append log holds compact_rows
+    records, and when the first result of a new month rolls over to a new
+    partition, so a partition is never left with only an append log.
+    The store directory must be private to the current user, see
+    private_directory(): a directory others could plant records in is
+    neither written to nor read from, which is logged instead.
+
+    :param directory: (optional) store directory, defaults to the
+        ``[data_quality] history_store_dir`` setting or a temporary directory
+    :type directory: str
+    :param compact_rows: (optional) appended records that trigger compaction
+        of a partition, defaults to the ``[data_quality]
+        history_store_compact_rows`` setting or 1024
+    :type compact_rows: int
+    """
+
+    def __init__(self, directory=None, compact_rows=None):
+        self.directory = directory or conf.get(
+            "data_quality",
+            "history_store_dir",
+            fallback=os.path.join(tempfile.gettempdir(), "airflow_dq_history"))
+        self.compact_rows = compact_rows or conf.getint("data_quality", "history_store_compact_rows", fallback=1024)
+
+    @staticmethod
+    def check_key(task_id, check_name=None):
+        """Returns the 64-bit key of the results of a check."""
+        raw_key = "\x1f".join((task_id, check_name or ""))
+        return np.uint64(int.from_bytes(hashlib.blake2b(raw_key.encode("utf-8"), digest_size=8).digest(), "little"))
+
+    def append(self, dag_id, info_dict):
+        """
+        Appends the result of a check, given as its info_dict, to the store.
+        Results without an execution_date, e.g. of a check executed by hand,
+        are not stored.
+        """
+        execution_date = to_naive_utc(info_dict.get("execution_date"))
+        if execution_date is None:
+            logging.warning("Not storing the result of %s without an execution_date", info_dict.get("task_id"))
+            return
+        if not private_directory(self.directory):
+            return
+        task_id, check_name = info_dict["task_id"], info_dict.get("check_name")
+        key = self.check_key(task_id, check_name)
+        within_threshold = info_dict.get("within_threshold")
+        record = np.array([(
+            key,
+            _to_micros(execution_date),
+            _to_float(info_dict.get("result")),
+            _to_float(info_dict.get("min_threshold")),
+            _to_float(info_dict.get("max_threshold")),
+            -1 if within_threshold is None else int(bool(within_threshold))
+        )], dtype=RECORD_DTYPE)
+
+        self._register_check(dag_id, key, task_id, check_name)
+        partition = self._partition(dag_id, execution_date)
+        rollover = not os.path.isdir(partition)
+        os.makedirs(partition, exist_ok=True)
+        with self._locked(partition, fcntl.LOCK_EX):
+            with open(os.path.join(partition, "append.bin"), "ab") as append_file:
+                append_file.write(record.tobytes())
+                appended = append_file.tell() // RECORD_DTYPE.itemsize
+            if appended >= self.compact_rows:
+                self._compact(partition)
+        if rollover:
+            for other in self._partitions(dag_id):
+                if other != partition:
+                    with self._locked(other, fcntl.LOCK_EX):
+                        self._compact(other)
+
+    def last(self, dag_id, task_id, n, check_name=None, before=None):
+        """
+        Returns the last n results of a check, oldest first, as a structured
+        array of RECORD_DTYPE. Only results executed before `before` are
+        returned when it is given.
+        """
+        key = self.check_key(task_id, check_name)
+        if not private_directory(self.directory):
+            return np.empty(0, dtype=RECORD_DTYPE)
+        before = None if before is None else _to_micros(to_naive_utc(before))
+        chunks, found = [], 0
+        for partition in reversed(self._partitions(dag_id)):
+            records = self._read(partition, key)
+            if before is not None:
+                records = records[records["execution_date"] < before]
+            if len(records):
+                chunks.append(records)
+                found += len(records)
+            if found >= n:
+                break
+        if not chunks:
+            return np.empty(0, dtype=RECORD_DTYPE)
+        records = np.concatenate(chunks[::-1])
+        return records[-n:] if n else records[:0]
+
+    def checks(self, dag_id):
+        """Returns the (task_id, check_name) of every check stored for dag_id."""
+        return [tuple(check) for check in self._load_checks(dag_id).values()]
+
+    def compact(self, dag_id):
+        """Compacts the append logs of all partitions of dag_id."""
+        if not private_directory(self.directory):
+            return
+        for partition in self._partitions(dag_id):
+            with self._locked(partition, fcntl.LOCK_EX):
+                self._compact(partition)
+
+    def _partition(self, dag_id, execution_date):
+        return os.path.join(self.directory, dag_id, execution_date.strftime("%Y-%m"))
+
+    def _partitions(self, dag_id):
+        dag_directory = os.path.join(self.directory, dag_id)
+        if not os.path.isdir(dag_directory):
+            return []
+        return sorted(
+            os.path.join(dag_directory, name) for name in os.listdir(dag_directory)
+            if os.path.isdir(os.path.join(dag_directory, name)))
+
+    def _read(self, partition, key):
+        """Returns the records of check_key key in a partition, sorted by execution date."""
+        with self._locked(partition, fcntl.LOCK_SH):
+            data_path = os.path.join(partition, "data.npy")
+            if os.path.exists(data_path):
+                data = np.load(data_path, mmap_mode="r")
+                start = np.searchsorted(data["check_key"], key, side="left")
+                end = np.searchsorted(data["check_key"], key, side="right")
+                compacted = np.array(data[start:end])
+            else:
+                compacted = np.empty(0, dtype=RECORD_DTYPE)
+            appended = _read_append_log(partition)
+        appended = appended[appended["check_key"] == key]
+        if not len(appended):
+            return compacted
+        return _sorted_unique(np.concatenate([compacted, appended]))
+
+    def _compact(self, partition):
+        """Merges the append log of a partition into its sorted data file. Expects the partition lock."""
+        appended = _read_append_log(partition)
+        if not len(appended):
+            return
+        data_path = os.path.join(partition, "data.npy")
+        if os.path.exists(data_path):
+            records = np.concatenate([np.load(data_path), appended])
+        else:
+            records = appended
+        records = _sorted_unique(records)
+        fd, tmp_path = tempfile.mkstemp(dir=partition, suffix=".npy.tmp")
+        with os.fdopen(fd, "wb") as data_file:
+            np.save(data_file, records)
+        os.replace(tmp_path, data_path)
+        os.truncate(os.path.join(partition, "append.bin"), 0)
+        logging.debug("Compacted %s records into %s", len(appended), data_path)
+
+    def _load_checks(self, dag_id):
+        try:
+            with open(os.path.join(self.directory, dag_id, "checks.json")) as checks_file:
+                return json.load(checks_file)
+        except (OSError, ValueError):
+            return {}
+
+    def _register_check(self, dag_id, key, task_id, check_name):
+        checks = self._load_checks(dag_id)
+        if str(key) in checks:
+            return
+        dag_directory = os.path.join(self.directory, dag_id)
+        os.makedirs(dag_directory, exist_ok=True)
+        with self._locked(dag_directory, fcntl.LOCK_EX):
+            checks = self._load_checks(dag_id)
+            checks[str(key)] = [task_id, check_name]
+            fd, tmp_path = tempfile.mkstemp(dir=dag_directory, suffix=".json.tmp")
+            with os.fdopen(fd, "w") as checks_file:
+                json.dump(checks, checks_file)
+            os.replace(tmp_path, os.path.join(dag_directory, "checks.json"))
+
+    @contextmanager
+    def _locked(self, directory, operation):
+        with open(os.path.join(directory, ".lock"), "a") as lock_file:
+            fcntl.flock(lock_file, operation)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+def _read_append_log(partition):
+    path = os.path.join(partition, "append.bin")
+    if not os.path.exists(path):
+        return np.empty(0, dtype=RECORD_DTYPE)
+    with open(path, "rb") as append_file:
+        raw = append_file.read()
+    # a record being appended concurrently may not be complete yet
+    complete = len(raw) - len(raw) % RECORD_DTYPE.itemsize
+    return np.frombuffer(raw[:complete], dtype=RECORD_DTYPE)
+
+def _sorted_unique(records):
+    """Sorts records by check_key and execution date, keeping the last record appended of each."""
+    order = np.lexsort((np.arange(len(records)), records["execution_date"], records["check_key"]))
+    records = records[order]
+    check_keys, execution_dates = records["check_key"], records["execution_date"]
+    last = np.ones(len(records), dtype=bool)
+    last[:-1] = (check_keys[1:] != check_keys[:-1]) | (execution_dates[1:] != execution_dates[:-1])
+    return records[last]
+
+def to_naive_utc(value):
+    """
+    Returns value, a datetime or its ISO format, as a naive UTC datetime, the
+    form execution dates are stored and compared in. Naive values are taken
+    to be UTC, None is returned as is.
+    """
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = datetime.datetime.fromisoformat(value)
+    if value.tzinfo is not None:
+        value = value.astimezone(datetime.timezone.utc)
+    return datetime.datetime(*value.timetuple()[:6], value.microsecond)
+
+def _to_micros(value):
+    return (value - EPOCH) // datetime.timedelta(microseconds=1)
+
+def _to_float(value):
+    return np.nan if value is None else float(value)
+
+def to_datetime(micros):
+    """Converts an execution_date of a record back into a naive UTC datetime."""
+    return EPOCH + datetime.timedelta(microseconds=int(micros))
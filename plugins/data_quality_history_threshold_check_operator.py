@@ -0,0 +1,230 @@
+import logging
+
+import numpy as np
+
+from airflow.configuration import conf
+from airflow.utils.decorators import apply_defaults
+from airflow.plugins_manager import AirflowPlugin
+
+from base_data_quality_operator import BaseDataQualityOperator, QueryTimeout, get_sql_rows
+from data_quality_history_store import to_datetime, to_naive_utc
+from data_quality_result_cache import LocalDiskResultCache
+from data_quality_timing import timed
+
+METHODS = ("stddev", "percentile", "weekday")
+
+# history windows outlive the interval of daily and weekly schedules
+HISTORY_CACHE_TTL = 8 * 24 * 60 * 60
+
+class DataQualityHistoryThresholdCheckOperator(BaseDataQualityOperator):
+    """
+    DataQualityHistoryThresholdCheckOperator inherits from BaseDataQualityOperator.
+    Instead of fixed thresholds or threshold sql statements, thresholds are
+    derived from the past results of the check itself, read from the result
+    history table that push() ships results to:
+
+    - "stddev": mean of the past results plus or minus k standard deviations
+    - "percentile": the lower and upper percentiles of the past results
+    - "weekday": like "stddev", over past results of the same weekday only
+
+    The history window is read from history_conn_id once and then kept in
+    history_cache. Later runs only read the results of the table from the
+    latest cached execution date on, so the window follows the table
+    whichever worker runs the check, and thresholds usually cost a query of
+    a few rows. When a history_store is given, the window is read from it
+    instead, and push() records every new result in it. Results outside
+    their thresholds are left out of the window, so a regression does not
+    widen its own thresholds. Until the window holds min_history results,
+    min_threshold and max_threshold are used if given, otherwise the check
+    passes. A check without a result fails once there are thresholds.
+
+    :param history_conn_id: (optional) connection id of the result history
+        table, defaults to push_conn_id, not needed with a history_store
+    :type history_conn_id: str
+    :param method: one of "stddev", "percentile" or "weekday"
+    :type method: str
+    :param k: number of standard deviations of the "stddev" and "weekday" bands
+    :type k: float
+    :param percentiles: lower and upper percentile of the "percentile" band
+    :type percentiles: tuple
+    :param window: number of past results the thresholds are computed over,
+        of the same weekday with the "weekday" method, for which seven times
+        as many past results are read
+    :type window: int
+    :param min_history: number of past results needed to compute thresholds
+    :type min_history: int
+    :param min_threshold: (optional) lower bound used until there is enough history
+    :type min_threshold: numeric
+    :param max_threshold: (optional) upper bound used until there is enough history
+    :type max_threshold: numeric
+    :param history_table: (optional) result history table, defaults to the
+        ``[data_quality] push_table`` setting or "data_quality_results"
+    :type history_table: str
+    :param history_cache: (optional) cache of history windows, defaults to a
+        LocalDiskResultCache keeping windows for eight days, longer than the
+        interval between two runs of a daily or weekly check
+    :type history_cache: BaseResultCache
+    """
+
+    @apply_defaults
+    def __init__(self,
+                 history_conn_id=None,
+                 method="stddev",
+                 k=3.0,
+                 percentiles=(1, 99),
+                 window=30,
+                 min_history=7,
+                 min_threshold=None,
+                 max_threshold=None,
+                 history_table=None,
+                 history_cache=None,
+                 *args,
+                 **kwargs):
+        super().__init__(*args, **kwargs)
+        if method not in METHODS:
+            raise ValueError(f"""Threshold method "{method}" not currently supported""")
+        self.history_conn_id = history_conn_id or self.push_conn_id
+        if self.history_conn_id is None and self.history_store is None:
+            raise ValueError("history_conn_id, push_conn_id or history_store must be given")
+        if (min_threshold is None) != (max_threshold is None):
+            raise ValueError("min_threshold and max_threshold must be given together")
+        self.method = method
+        self.k = k
+        self.percentiles = percentiles
+        self.window = window
+        self.min_history = max(min_history, 2)
+        self.min_threshold = min_threshold
+        self.max_threshold = max_threshold
+        self.history_table = history_table or conf.get("data_quality", "push_table", fallback="data_quality_results")
+        self.history_cache = history_cache
+
+    def execute(self, context):
+        self.start_timing()
+        execution_date = to_naive_utc(context.get("execution_date"))
+        with timed("threshold", self.history_conn_id):
+            history = self.get_history()
+            min_threshold, max_threshold, history_size = self.get_thresholds(history, execution_date)
+        try:
+            with timed("check", self.conn_id):
+                result = self.get_result(context)
+        except QueryTimeout as error:
+            self.min_threshold, self.max_threshold = min_threshold, max_threshold
+            self.fail_on_timeout(context, error)
+
+        if min_threshold is None:
+            logging.info("Not enough history to compute thresholds of %s, check passes", self.task_id)
+            within_threshold = True
+        else:
+            within_threshold = result is not None and bool(min_threshold <= result <= max_threshold)
+        info_dict = {
+            "result" : result,
+            "description" : self.check_description,
+            "task_id" : self.task_id,
+            "execution_date" : context.get("execution_date"),
+            "min_threshold" : min_threshold,
+            "max_threshold" : max_threshold,
+            "within_threshold" : within_threshold
+        }
+        info_dict.update(self.result_info)
+        info_dict["history_size"] = history_size
+
+        self.push(info_dict)
+        self.record_timings(info_dict)
+        if not info_dict["within_threshold"]:
+            context["ti"].xcom_push(key=f"""result data from task {self.task_id}""", value=info_dict)
+            self.send_failure_notification(info_dict)
+        return info_dict
+
+    def get_history_sql(self, since=False):
+        """
+        Returns the sql of the last past results of the check within their
+        thresholds, only of those executed on or after a date parameter if
+        since is True.
+        """
+        since_condition = "AND execution_date >= %s " if since else ""
+        return f"""SELECT execution_date, result FROM {self.history_table}
+WHERE dag_id = %s AND task_id = %s AND check_name = '' AND result IS NOT NULL AND within_threshold IS NOT FALSE
+{since_condition}ORDER BY execution_date DESC
+LIMIT {self.history_rows}"""
+
+    @property
+    def history_rows(self):
+        """Number of past results read, enough for window results of the same weekday with "weekday"."""
+        return self.window * 7 if self.method == "weekday" else self.window
+
+    def get_history_cache(self):
+        if self.history_cache is None:
+            self.history_cache = LocalDiskResultCache(ttl=HISTORY_CACHE_TTL)
+        return self.history_cache
+
+    def get_history_key(self):
+        sql = f"{self.get_history_sql()} -- {self.dag_id}.{self.task_id}"
+        return self.get_history_cache().make_key(self.history_conn_id, sql, None)
+
+    def get_history(self):
+        """
+        Returns the past results of the check as a list of (execution_date,
+        result) pairs, oldest first, leaving out results outside their
+        thresholds. They are read from the history store if there is one,
+        otherwise from the history cache brought up to date with the results
+        of the history table from its latest execution date on, or on a
+        miss from the history table alone.
+        """
+        if self.history_store is not None:
+            records = self.history_store.last(self.dag_id, self.task_id, self.history_rows)
+            records = records[~np.isnan(records["result"]) & (records["within_threshold"] != 0)]
+            return [(to_datetime(date), float(result))
+                    for date, result in zip(records["execution_date"], records["result"])]
+
+        key = self.get_history_key()
+        try:
+            cached = self.get_history_cache().get(key)
+        except KeyError:
+            cached = []
+        if cached:
+            since = cached[-1][0]
+            rows = get_sql_rows(
+                self.history_conn_id,
+                self.get_history_sql(since=True),
+                self.history_rows,
+                (self.dag_id, self.task_id, since))
+        else:
+            rows = get_sql_rows(
+                self.history_conn_id,
+                self.get_history_sql(),
+                self.history_rows,
+                (self.dag_id, self.task_id))
+        # results read from the table replace the cached results of the same date
+        history = dict(cached)
+        history.update((to_naive_utc(date), float(result)) for date, result in rows)
+        history = sorted(history.items())[-self.history_rows:]
+        if history != cached:
+            self.get_history_cache().set(key, history)
+        return history
+
+    def get_thresholds(self, history, execution_date):
+        """
+        Computes the thresholds of the run at execution_date from the results
+        of earlier runs in history. Returns (min_threshold, max_threshold,
+        number of past results used), with the configured fallback thresholds
+        when there are fewer than min_history past results.
+        """
+        past = [(date, value) for date, value in history if execution_date is None or date < execution_date]
+        values = np.array([value for _, value in past], dtype=float)
+        if self.method == "weekday" and execution_date is not None:
+            weekdays = np.array([date.weekday() for date, _ in past], dtype=int)
+            values = values[weekdays == execution_date.weekday()]
+        values = values[-self.window:]
+
+        if len(values) < self.min_history:
+            return self.min_threshold, self.max_threshold, len(values)
+        if self.method == "percentile":
+            lower, upper = np.percentile(values, self.percentiles)
+        else:
+            mean, sigma = values.mean(), values.std(ddof=1)
+            lower, upper = mean - self.k * sigma, mean + self.k * sigma
+        return float(lower), float(upper), len(values)
+
+class DataQualityHistoryThresholdCheckPlugin(AirflowPlugin):
+    name = "data_quality_history_threshold_check_operator"
+    operators = [DataQualityHistoryThresholdCheckOperator]
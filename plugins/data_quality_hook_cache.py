@@ -0,0 +1,222 @@
+import atexit
+import logging
+import os
+import threading
+import time
+from collections import defaultdict
+from contextlib import closing, contextmanager
+
+from airflow.configuration import conf
+from airflow.hooks.base_hook import BaseHook
+
+from data_quality_timing import timed
+
+class HookCache:
+    """
+    HookCache is a per-process cache of resolved connection metadata, database
+    hooks and idle DB-API connections, keyed by conn_id. It spares each
+    get_sql_value() call the metadata/secrets-backend lookup of
+    BaseHook.get_connection and the handshake of a brand-new database connection.
+
+    Entries are evicted once they are older than the configured TTL. Idle
+    connections are pinged before reuse once they have been idle longer than
+    the ping interval, and are replaced if the ping fails. At most max_idle
+    connections are kept idle per conn_id, and a background thread closes
+    connections that have been idle longer than the idle timeout or are past
+    their TTL, so an idle worker holds no database sessions. Caching is enabled
+    by default and is opted out of with the ``[data_quality] hook_cache``
+    setting (or ``AIRFLOW__DATA_QUALITY__HOOK_CACHE=False``), in which case
+    every call resolves a fresh connection and hook as before.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._connections = {}
+        self._hooks = {}
+        self._idle = defaultdict(list)
+        self._discarded = set()
+        self._reaper_pid = None
+
+    @property
+    def enabled(self):
+        return conf.getboolean("data_quality", "hook_cache", fallback=True)
+
+    @property
+    def ttl(self):
+        return conf.getint("data_quality", "hook_cache_ttl", fallback=300)
+
+    @property
+    def ping_interval(self):
+        return conf.getint("data_quality", "hook_cache_ping_interval", fallback=30)
+
+    @property
+    def max_idle(self):
+        return conf.getint("data_quality", "hook_cache_max_idle", fallback=4)
+
+    @property
+    def idle_timeout(self):
+        return conf.getint("data_quality", "hook_cache_idle_timeout", fallback=60)
+
+    def get_connection(self, conn_id):
+        """Returns the (cached) airflow Connection of conn_id."""
+        if not self.enabled:
+            return BaseHook.get_connection(conn_id)
+        with self._lock:
+            entry = self._connections.get(conn_id)
+        if entry and entry[0] > time.monotonic():
+            return entry[1]
+        connection = BaseHook.get_connection(conn_id)
+        with self._lock:
+            self._connections[conn_id] = (time.monotonic() + self.ttl, connection)
+        return connection
+
+    def get_hook(self, conn_id, make_hook):
+        """Returns the (cached) hook of conn_id, building it with make_hook() on a miss."""
+        if not self.enabled:
+            return make_hook()
+        with self._lock:
+            entry = self._hooks.get(conn_id)
+        if entry and entry[0] > time.monotonic():
+            return entry[1]
+        hook = make_hook()
+        with self._lock:
+            self._hooks[conn_id] = (time.monotonic() + self.ttl, hook)
+        return hook
+
+    @contextmanager
+    def connection(self, conn_id, hook):
+        """
+        Context manager lending out a live DB-API connection of conn_id for
+        exclusive use. The connection goes back to the idle pool afterwards,
+        unless the block raised, in which case it is closed since its state
+        is unknown, or discarded it.
+        """
+        if not self.enabled:
+            with timed("connect", conn_id):
+                conn = hook.get_conn()
+            try:
+                yield conn
+            finally:
+                # discard() may have closed it already
+                _close_quietly(conn)
+            return
+
+        with timed("connect", conn_id):
+            expires_at, conn = self._checkout(conn_id, hook)
+        try:
+            yield conn
+        except BaseException:
+            _close_quietly(conn)
+            raise
+        finally:
+            with self._lock:
+                discarded = id(conn) in self._discarded
+                self._discarded.discard(id(conn))
+        if not discarded:
+            self._checkin(conn_id, expires_at, conn)
+
+    def discard(self, conn):
+        """
+        Closes conn, lent out by connection(), right away and keeps it from
+        going back to the idle pool.
+        """
+        if self.enabled:
+            with self._lock:
+                self._discarded.add(id(conn))
+        _close_quietly(conn)
+
+    def clear(self):
+        """Evicts all entries and closes all idle connections."""
+        with self._lock:
+            idle = [conn for conns in self._idle.values() for _, _, conn in conns]
+            self._connections.clear()
+            self._hooks.clear()
+            self._idle.clear()
+        for conn in idle:
+            _close_quietly(conn)
+
+    def reap(self):
+        """Closes the idle connections past their TTL or idle longer than the idle timeout."""
+        now = time.monotonic()
+        reaped = []
+        with self._lock:
+            for conn_id, conns in self._idle.items():
+                kept = []
+                for entry in conns:
+                    expires_at, last_used, conn = entry
+                    if expires_at <= now or now - last_used >= self.idle_timeout:
+                        reaped.append(conn)
+                    else:
+                        kept.append(entry)
+                conns[:] = kept
+        for conn in reaped:
+            _close_quietly(conn)
+        return len(reaped)
+
+    def _checkout(self, conn_id, hook):
+        now = time.monotonic()
+        while True:
+            with self._lock:
+                if not self._idle[conn_id]:
+                    break
+                expires_at, last_used, conn = self._idle[conn_id].pop()
+            if expires_at <= now:
+                _close_quietly(conn)
+            elif now - last_used < self.ping_interval or _is_alive(conn):
+                return expires_at, conn
+            else:
+                logging.info("Discarding dead cached connection of %s", conn_id)
+                _close_quietly(conn)
+        return now + self.ttl, hook.get_conn()
+
+    def _checkin(self, conn_id, expires_at, conn):
+        try:
+            # end the read transaction so the pooled connection holds no snapshot
+            conn.rollback()
+        except Exception:
+            pass
+        surplus = []
+        with self._lock:
+            idle = self._idle[conn_id]
+            idle.append((expires_at, time.monotonic(), conn))
+            while len(idle) > self.max_idle:
+                surplus.append(idle.pop(0)[2])
+        for conn in surplus:
+            _close_quietly(conn)
+        self._start_reaper()
+
+    def _start_reaper(self):
+        """Starts the reaper thread of this process, once per process as forked children have none."""
+        with self._lock:
+            if self._reaper_pid == os.getpid():
+                return
+            self._reaper_pid = os.getpid()
+        reaper = threading.Thread(target=self._reap_forever, name="data_quality_hook_cache_reaper", daemon=True)
+        reaper.start()
+
+    def _reap_forever(self):
+        while True:
+            time.sleep(max(min(self.idle_timeout, self.ping_interval), 1))
+            try:
+                self.reap()
+            except Exception:
+                logging.exception("Failed to reap idle data quality connections")
+
+def _is_alive(conn):
+    """Liveness check of an idle connection."""
+    try:
+        with closing(conn.cursor()) as cursor:
+            cursor.execute("SELECT 1")
+            cursor.fetchall()
+        return True
+    except Exception:
+        return False
+
+def _close_quietly(conn):
+    try:
+        conn.close()
+    except Exception:
+        pass
+
+hook_cache = HookCache()
+atexit.register(hook_cache.clear)
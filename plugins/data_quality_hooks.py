@@ -0,0 +1,88 @@
+import importlib
+import logging
+import threading
+
+try:
+    from importlib import metadata as importlib_metadata
+except ImportError:
+    import importlib_metadata
+
+ENTRY_POINT_GROUP = "airflow_data_quality.hooks"
+
+class HookRegistry:
+    """
+    HookRegistry maps a connection type to the factory building the database
+    hook of a connection of that type, a function taking the conn_id.
+
+    The hooks of the built-in connection types (postgres, mysql, hive, and
+    local_file or duckdb for local Parquet and CSV files) are
+    imported on first use only, so a DAG that only talks to Postgres never
+    imports the MySQL or Hive client libraries. Other connection types are
+    added with register(), or by installed packages through entry points of
+    the "airflow_data_quality.hooks" group, named after the connection type:
+
+        entry_points={
+            "airflow_data_quality.hooks": ["snowflake = my_package.hooks:make_snowflake_hook"]
+        }
+
+    Entry points are looked up once, the first time an unregistered
+    connection type is asked for.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._factories = {}
+        self._entry_points_loaded = False
+
+    def register(self, conn_type, factory):
+        """Registers factory, a function of conn_id returning a hook, for conn_type."""
+        with self._lock:
+            self._factories[conn_type] = factory
+
+    def register_lazy(self, conn_type, module, class_name, conn_id_arg):
+        """Registers the hook class module.class_name for conn_type without importing it."""
+        def factory(conn_id):
+            hook_class = getattr(importlib.import_module(module), class_name)
+            return hook_class(**{conn_id_arg: conn_id})
+        self.register(conn_type, factory)
+
+    def get_factory(self, conn_type):
+        """Returns the hook factory of conn_type. Raises ValueError if conn_type is unknown."""
+        with self._lock:
+            factory = self._factories.get(conn_type)
+        if factory is None and not self._entry_points_loaded:
+            self._load_entry_points()
+            with self._lock:
+                factory = self._factories.get(conn_type)
+        if factory is None:
+            raise ValueError(f"""Connection type of "{conn_type}" not currently supported""")
+        return factory
+
+    def make_hook(self, conn_type, conn_id):
+        """Builds the hook of conn_id, a connection of type conn_type."""
+        return self.get_factory(conn_type)(conn_id)
+
+    def _load_entry_points(self):
+        try:
+            entry_points = importlib_metadata.entry_points()
+            if hasattr(entry_points, "select"):
+                entry_points = entry_points.select(group=ENTRY_POINT_GROUP)
+            else:
+                entry_points = entry_points.get(ENTRY_POINT_GROUP, [])
+            for entry_point in entry_points:
+                with self._lock:
+                    if entry_point.name in self._factories:
+                        continue
+                try:
+                    self.register(entry_point.name, entry_point.load())
+                except Exception:
+                    logging.exception("Failed to load hook factory %s of %s", entry_point.value, entry_point.name)
+        finally:
+            self._entry_points_loaded = True
+
+hook_registry = HookRegistry()
+hook_registry.register_lazy("postgres", "airflow.hooks.postgres_hook", "PostgresHook", "postgres_conn_id")
+hook_registry.register_lazy("mysql", "airflow.hooks.mysql_hook", "MySqlHook", "mysql_conn_id")
+hook_registry.register_lazy("hive", "airflow.hooks.hive_hooks", "HiveServer2Hook", "hiveserver2_conn_id")
+hook_registry.register_lazy("local_file", "data_quality_local_file_hook", "LocalFileHook", "local_file_conn_id")
+hook_registry.register_lazy("duckdb", "data_quality_local_file_hook", "LocalFileHook", "local_file_conn_id")
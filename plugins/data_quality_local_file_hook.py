@@ -0,0 +1,147 @@
+import csv
+import glob
+import json
+import os
+import sqlite3
+
+from airflow.hooks.base_hook import BaseHook
+
+from data_quality_hook_cache import hook_cache
+
+PARQUET_EXTENSIONS = (".parquet", ".pq")
+CSV_EXTENSIONS = (".csv", ".tsv", ".csv.gz", ".tsv.gz")
+
+class LocalFileHook(BaseHook):
+    """
+    LocalFileHook runs sql over local or mounted Parquet and CSV files with an
+    in-process engine: DuckDB when it is installed, SQLite otherwise. Checks
+    then run on a file before it is loaded anywhere, with no network round
+    trip and no staging load.
+
+    Files are exposed as tables listed in the "tables" extra of the
+    connection, a mapping of table name to file path or glob (or the same
+    mapping encoded as JSON). With DuckDB tables are views reading the files
+    on every query, and any file can also be queried directly, e.g.
+    SELECT AVG(cost) FROM read_parquet('/data/costs/*.parquet'). The SQLite
+    fallback loads the CSV files matched by each path or glob into an
+    in-memory table and cannot read Parquet; a table is loaded again before
+    the next query once its files change, as connections are kept open by
+    the hook_cache. Both engines take qmark ("?") query parameters.
+    The host of the connection, if set, is a database file to open instead
+    of an in-memory database, and the "engine" extra ("duckdb" or "sqlite")
+    forces an engine.
+
+    :param local_file_conn_id: connection id of the files
+    :type local_file_conn_id: str
+    """
+
+    conn_name_attr = "local_file_conn_id"
+
+    def __init__(self, local_file_conn_id):
+        super().__init__(source=None)
+        self.local_file_conn_id = local_file_conn_id
+
+    def get_conn(self):
+        connection = hook_cache.get_connection(self.local_file_conn_id)
+        extra = connection.extra_dejson
+        tables = extra.get("tables") or {}
+        if isinstance(tables, str):
+            tables = json.loads(tables)
+        database = connection.host or ":memory:"
+
+        engine = extra.get("engine")
+        if engine != "sqlite":
+            try:
+                import duckdb
+            except ImportError:
+                if engine == "duckdb":
+                    raise
+            else:
+                conn = duckdb.connect(database)
+                for name, path in tables.items():
+                    conn.execute(f"CREATE OR REPLACE VIEW {name} AS SELECT * FROM {_duckdb_reader(path)}")
+                return conn
+
+        return CsvConnection(sqlite3.connect(database, check_same_thread=False), tables)
+
+class CsvConnection:
+    """
+    CsvConnection wraps a sqlite3 connection whose tables are loaded from
+    CSV files, a table loading every file matched by its path or glob, and
+    loads a table again whenever files were added, removed, or changed in
+    modification time or size since it was loaded. Everything else is
+    passed through to the sqlite3 connection.
+    """
+
+    def __init__(self, conn, tables):
+        self.conn = conn
+        self.tables = tables
+        self.signatures = {}
+        self.refresh()
+
+    def refresh(self):
+        """Loads the tables whose files are new or changed."""
+        for name, path in self.tables.items():
+            _csv_delimiter(path)
+            paths = _expand(path)
+            signature = []
+            for file_path in paths:
+                stat = os.stat(file_path)
+                signature.append((file_path, stat.st_mtime_ns, stat.st_size))
+            if self.signatures.get(name) != signature:
+                _load_csv(self.conn, name, paths)
+                self.signatures[name] = signature
+
+    def cursor(self, *args, **kwargs):
+        self.refresh()
+        return self.conn.cursor(*args, **kwargs)
+
+    def execute(self, *args, **kwargs):
+        self.refresh()
+        return self.conn.execute(*args, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self.conn, name)
+
+def _duckdb_reader(path):
+    quoted_path = "'" + path.replace("'", "''") + "'"
+    if path.lower().endswith(PARQUET_EXTENSIONS):
+        return f"read_parquet({quoted_path})"
+    if path.lower().endswith(CSV_EXTENSIONS):
+        return f"read_csv_auto({quoted_path})"
+    raise ValueError(f"""File "{path}" is neither a Parquet nor a CSV file""")
+
+def _csv_delimiter(path):
+    if not path.lower().endswith((".csv", ".tsv")):
+        raise ValueError(f"""File "{path}" cannot be read without DuckDB, only plain CSV files can""")
+    return "\t" if path.lower().endswith(".tsv") else ","
+
+def _expand(path):
+    """Returns the files matched by path, a file path or glob, sorted. Raises FileNotFoundError if there are none."""
+    paths = sorted(glob.glob(os.path.expanduser(path)))
+    if not paths:
+        raise FileNotFoundError(f'No file matches "{path}"')
+    return paths
+
+def _load_csv(conn, name, paths):
+    """
+    Loads CSV files, which must share the same header, into table name of a
+    SQLite connection. Numeric-looking values are stored as numbers.
+    """
+    conn.execute(f'DROP TABLE IF EXISTS "{name}"')
+    columns = None
+    for path in paths:
+        with open(path, newline="") as csv_file:
+            reader = csv.reader(csv_file, delimiter=_csv_delimiter(path))
+            header = next(reader)
+            if columns is None:
+                columns = header
+                definitions = ", ".join(f'"{column}" NUMERIC' for column in header)
+                conn.execute(f'CREATE TABLE "{name}" ({definitions})')
+            elif header != columns:
+                raise ValueError(f"""File "{path}" does not have the columns of the other files of table {name}""")
+            placeholders = ", ".join("?" for _ in header)
+            conn.executemany(
+                f'INSERT INTO "{name}" VALUES ({placeholders})',
+                ([value if value != "" else None for value in row] for row in reader))
+    conn.commit()
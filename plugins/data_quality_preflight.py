@@ -0,0 +1,74 @@
+import json
+import re
+
+ACTIONS = ("fail", "warn", "fallback")
+
+# number of plan rows read, Hive plans come back as one row per line
+MAX_PLAN_ROWS = 10000
+
+_HIVE_ROWS = re.compile(r"Num rows: (\d+)")
+
+def get_explain_sql(conn_type, sql):
+    """
+    Returns the statement asking the database of conn_type for the
+    estimated plan of sql, or None if the dialect has no cost estimates.
+    """
+    sql = sql.strip().rstrip(";")
+    if conn_type == "postgres":
+        return f"EXPLAIN (FORMAT JSON) {sql}"
+    if conn_type == "mysql":
+        return f"EXPLAIN FORMAT=JSON {sql}"
+    if conn_type == "hive":
+        return f"EXPLAIN {sql}"
+    return None
+
+def parse_plan(conn_type, plan_rows):
+    """
+    Parses the rows returned by get_explain_sql() into the (cost, rows)
+    estimates of the plan: the total planner cost (Postgres and MySQL only)
+    and the largest number of rows any step of the plan is estimated to
+    read. Estimates missing from the plan are None.
+    """
+    if conn_type == "postgres":
+        plan = _load_json(plan_rows[0][0])[0]["Plan"]
+        rows = _find_values(plan, "Plan Rows")
+        return float(plan["Total Cost"]), max(rows) if rows else None
+    if conn_type == "mysql":
+        query_block = _load_json(plan_rows[0][0])["query_block"]
+        cost = query_block.get("cost_info", {}).get("query_cost")
+        rows = _find_values(query_block, "rows_examined_per_scan")
+        return (float(cost) if cost is not None else None), (max(rows) if rows else None)
+    if conn_type == "hive":
+        rows = [int(match) for row in plan_rows for match in _HIVE_ROWS.findall(str(row[0]))]
+        return None, max(rows) if rows else None
+    return None, None
+
+def decide(preflight, cost, rows):
+    """
+    Returns what to do with a check of estimated cost and rows given its
+    preflight limits: "run" within the limits or without estimates,
+    otherwise the configured action ("fail", "warn" or "fallback").
+    """
+    max_cost = preflight.get("max_cost")
+    max_rows = preflight.get("max_rows")
+    if (max_cost is not None and cost is not None and cost > max_cost) or \
+            (max_rows is not None and rows is not None and rows > max_rows):
+        return preflight.get("action", "fail")
+    return "run"
+
+def _load_json(value):
+    return json.loads(value) if isinstance(value, (str, bytes)) else value
+
+def _find_values(node, key):
+    """Returns every numeric value of key in the nested dicts and lists of node."""
+    values = []
+    if isinstance(node, dict):
+        for name, value in node.items():
+            if name == key and isinstance(value, (int, float)):
+                values.append(value)
+            else:
+                values.extend(_find_values(value, key))
+    elif isinstance(node, list):
+        for value in node:
+            values.extend(_find_values(value, key))
+    return values
@@ -0,0 +1,157 @@
+from collections import OrderedDict
+
+from airflow.utils.decorators import apply_defaults
+from airflow.plugins_manager import AirflowPlugin
+from airflow import AirflowException
+
+from base_data_quality_operator import BaseDataQualityOperator, QueryTimeout, get_sql_row, statement_timeout
+from data_quality_thresholds import within_thresholds
+from data_quality_timing import timed
+
+COLUMN_METRICS = OrderedDict([
+    ("null_count", "COUNT(1) - COUNT({column})"),
+    ("min", "MIN({column})"),
+    ("max", "MAX({column})"),
+    ("mean", "AVG({column})"),
+    ("distinct_count", "COUNT(DISTINCT {column})")
+])
+
+class DataQualityProfileOperator(BaseDataQualityOperator):
+    """
+    DataQualityProfileOperator builds off BaseDataQualityOperator and profiles
+    the columns of a table in one scan: the row count and, per column, the
+    metrics of COLUMN_METRICS (null_count, min, max, mean, distinct_count)
+    are computed by a single generated query. Metrics are checked against a
+    threshold map, and every metric is pushed as a check named after it,
+    e.g. "row_count" or "cost.mean".
+
+    The task returns the structured profile along with one info_dict per
+    metric, and fails with a report of every metric outside its thresholds.
+    A profile query exceeding query_timeout pushes a timeout outcome and
+    fails the task. The incremental, partitioned, fallback_sql and preflight
+    options of the base operator do not apply to profiles and are rejected.
+
+    :param table: table to profile
+    :type table: str
+    :param columns: columns to profile, either a list of column names profiled
+        with every metric, or a dict of column name to its list of metrics
+        (e.g. no "mean" for text columns)
+    :type columns: list or dict
+    :param thresholds: (optional) mapping of a metric name ("row_count" or
+        "<column>.<metric>") to its (min_threshold, max_threshold), either of
+        which can be None for an open bound
+    :type thresholds: dict
+    :param where: (optional) sql condition restricting the profiled rows
+    :type where: str
+    """
+
+    template_fields = ('table', 'where')
+
+    @apply_defaults
+    def __init__(self,
+                 table,
+                 columns,
+                 thresholds=None,
+                 where=None,
+                 *args,
+                 **kwargs):
+        super().__init__(sql=None, *args, **kwargs)
+        self.reject_options("incremental", "partitioned", "fallback_sql", "preflight")
+        if not isinstance(columns, dict):
+            columns = OrderedDict((column, list(COLUMN_METRICS)) for column in columns)
+        for column, metrics in columns.items():
+            unknown_metrics = set(metrics) - set(COLUMN_METRICS)
+            if unknown_metrics:
+                raise ValueError(f"""Metrics {sorted(unknown_metrics)} of column "{column}" not currently supported""")
+        self.table = table
+        self.columns = columns
+        self.where = where
+        self.thresholds = thresholds or {}
+        unknown_thresholds = set(self.thresholds) - set(self.get_metric_names())
+        if unknown_thresholds:
+            raise ValueError(f"Thresholds of unknown metrics {sorted(unknown_thresholds)}")
+
+    def get_metric_names(self):
+        """Returns the names of the metrics of the profile, in the order of the columns of get_profile_sql()."""
+        return ["row_count"] + [
+            f"{column}.{metric}" for column, metrics in self.columns.items() for metric in metrics
+        ]
+
+    def get_profile_sql(self):
+        """Returns the single statement computing every metric of the profile."""
+        expressions = ["COUNT(1)"] + [
+            COLUMN_METRICS[metric].format(column=column)
+            for column, metrics in self.columns.items() for metric in metrics
+        ]
+        sql = "SELECT " + ",\n       ".join(expressions) + f"\nFROM {self.table}"
+        if self.where:
+            sql += f"\nWHERE {self.where}"
+        return sql
+
+    def execute(self, context):
+        self.start_timing()
+        metric_names = self.get_metric_names()
+        try:
+            with timed("check", self.conn_id), statement_timeout(self.query_timeout):
+                results = get_sql_row(self.conn_id, self.get_profile_sql(), len(metric_names))
+        except QueryTimeout as error:
+            self.fail_on_timeout(context, error)
+        thresholds = [self.thresholds.get(metric_name, (None, None)) for metric_name in metric_names]
+        with timed("threshold"):
+            within = within_thresholds(results, thresholds)
+
+        profile = {"row_count" : results[0], "columns" : OrderedDict()}
+        info_dicts = []
+        for metric_name, result, (min_threshold, max_threshold), within_threshold in zip(
+                metric_names, results, thresholds, within):
+            if "." in metric_name:
+                column, metric = metric_name.split(".", 1)
+                profile["columns"].setdefault(column, OrderedDict())[metric] = result
+            info_dict = {
+                "result" : result,
+                "check_name" : metric_name,
+                "description" : self.check_description,
+                "task_id" : self.task_id,
+                "execution_date" : context.get("execution_date"),
+                "min_threshold" : min_threshold,
+                "max_threshold" : max_threshold,
+                "within_threshold" : within_threshold
+            }
+            self.push(info_dict)
+            info_dicts.append(info_dict)
+        self.record_timings(*info_dicts)
+
+        failed_checks = [info_dict for info_dict in info_dicts if not info_dict["within_threshold"]]
+        profile_dict = {
+            "table" : self.table,
+            "task_id" : self.task_id,
+            "execution_date" : context.get("execution_date"),
+            "description" : self.check_description,
+            "profile" : profile,
+            "checks" : info_dicts,
+            "within_threshold" : not failed_checks
+        }
+        if failed_checks:
+            context["ti"].xcom_push(key=f"""result data from task {self.task_id}""", value=profile_dict)
+            self.send_failure_notification(failed_checks)
+        return profile_dict
+
+    def send_failure_notification(self, info_dicts):
+        """
+        send_failure_notification will throw an AirflowException listing every
+        metric of the profile outside its thresholds.
+        """
+        failures = "\n".join(
+            f"""Metric "{info_dict.get("check_name")}": Result: {info_dict.get("result")} """
+            f"""is not within thresholds {info_dict.get("min_threshold")} and {info_dict.get("max_threshold")}"""
+            for info_dict in info_dicts)
+        body = f"""Data Quality Profile: "{self.task_id}" of table {self.table} failed {len(info_dicts)} of {len(self.thresholds)} thresholds.
+DAG: {self.dag_id}
+Task_id: {self.task_id}
+Execution date: {info_dicts[0].get("execution_date")}
+{failures}"""
+        raise AirflowException(body)
+
+class DataQualityProfilePlugin(AirflowPlugin):
+    name = "data_quality_profile_operator"
+    operators = [DataQualityProfileOperator]
@@ -0,0 +1,164 @@
+import datetime
+import decimal
+import hashlib
+import json
+import logging
+import os
+import stat
+import tempfile
+import time
+
+from airflow.configuration import conf
+
+class BaseResultCache:
+    """
+    BaseResultCache is the interface of caches for sql query results shared
+    across tasks. Results are keyed by make_key(), i.e. by connection id,
+    rendered sql statement and execution date, so identical queries of one
+    DAG run are answered once.
+    """
+
+    @staticmethod
+    def make_key(conn_id, sql, execution_date):
+        """Returns the cache key of a rendered sql statement for one DAG run."""
+        execution_date = execution_date.isoformat() if execution_date else ""
+        raw_key = "\x1f".join((conn_id, sql.strip(), execution_date))
+        return hashlib.sha256(raw_key.encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        """Returns the cached value of key. Raises KeyError on a miss."""
+        raise NotImplementedError
+
+    def set(self, key, value):
+        """Stores value under key."""
+        raise NotImplementedError
+
+class LocalDiskResultCache(BaseResultCache):
+    """
+    LocalDiskResultCache stores results as one JSON file per key in a local
+    directory, so the cache is shared by all worker processes of a host.
+    Entries expire after ttl seconds, and once there are more than
+    max_entries the least recently used entries are evicted. Values may be
+    JSON types, tuples, dates, datetimes and Decimals.
+
+    The directory is created private to the current user (mode 0700). A
+    directory owned by another user or writable by others is not used, as
+    its entries could be planted: the cache then always misses.
+
+    :param directory: (optional) cache directory, defaults to the
+        ``[data_quality] result_cache_dir`` setting or a temporary directory
+    :type directory: str
+    :param ttl: seconds an entry stays valid
+    :type ttl: int
+    :param max_entries: number of entries kept before LRU eviction
+    :type max_entries: int
+    """
+
+    def __init__(self, directory=None, ttl=3600, max_entries=1024):
+        self.directory = directory or conf.get(
+            "data_quality",
+            "result_cache_dir",
+            fallback=os.path.join(tempfile.gettempdir(), "airflow_dq_result_cache"))
+        self.ttl = ttl
+        self.max_entries = max_entries
+
+    def get(self, key):
+        if not private_directory(self.directory):
+            raise KeyError(key)
+        path = self._path(key)
+        try:
+            with open(path) as cache_file:
+                created_at, value = json.load(cache_file, object_hook=_decode)
+        except (OSError, ValueError):
+            raise KeyError(key)
+        if time.time() - created_at > self.ttl:
+            _remove_quietly(path)
+            raise KeyError(key)
+        # the modification time tracks recency of use for LRU eviction,
+        # the entry may have been evicted by another process since it was read
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            pass
+        return value
+
+    def set(self, key, value):
+        if not private_directory(self.directory):
+            return
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as cache_file:
+                json.dump([time.time(), _encode(value)], cache_file)
+            os.replace(tmp_path, self._path(key))
+        except Exception:
+            _remove_quietly(tmp_path)
+            raise
+        self._evict()
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.json")
+
+    def _evict(self):
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".json"):
+                try:
+                    entries.append((entry.stat().st_mtime, entry.path))
+                except FileNotFoundError:
+                    pass
+        if len(entries) <= self.max_entries:
+            return
+        entries.sort()
+        for _, path in entries[:len(entries) - self.max_entries]:
+            logging.debug("Evicting cached result %s", path)
+            _remove_quietly(path)
+
+def private_directory(directory):
+    """
+    Creates directory private to the current user if it does not exist, and
+    returns whether it can be trusted: owned by the current user and not
+    writable by group or others. An untrusted directory is logged.
+    """
+    try:
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+        status = os.stat(directory)
+    except OSError:
+        logging.warning("Cannot use directory %s", directory, exc_info=True)
+        return False
+    if status.st_uid != os.getuid() or status.st_mode & (stat.S_IWGRP | stat.S_IWOTH):
+        logging.warning("Not using directory %s, it is not private to the current user", directory)
+        return False
+    return True
+
+def _encode(value):
+    """Converts value into JSON types, tagging the types JSON lacks so _decode() restores them."""
+    if isinstance(value, tuple):
+        return {"__tuple__" : [_encode(item) for item in value]}
+    if isinstance(value, list):
+        return [_encode(item) for item in value]
+    if isinstance(value, dict):
+        return {key: _encode(item) for key, item in value.items()}
+    if isinstance(value, datetime.datetime):
+        return {"__datetime__" : value.isoformat()}
+    if isinstance(value, datetime.date):
+        return {"__date__" : value.isoformat()}
+    if isinstance(value, decimal.Decimal):
+        return {"__decimal__" : str(value)}
+    return value
+
+def _decode(value):
+    if "__tuple__" in value:
+        return tuple(value["__tuple__"])
+    if "__datetime__" in value:
+        return datetime.datetime.fromisoformat(value["__datetime__"])
+    if "__date__" in value:
+        return datetime.date.fromisoformat(value["__date__"])
+    if "__decimal__" in value:
+        return decimal.Decimal(value["__decimal__"])
+    return value
+
+def _remove_quietly(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
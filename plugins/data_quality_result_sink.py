@@ -0,0 +1,261 @@
+import fcntl
+import glob
+import json
+import logging
+import os
+import tempfile
+import time
+from contextlib import closing, contextmanager
+
+from airflow.configuration import conf
+from airflow.utils.decorators import apply_defaults
+from airflow.models import BaseOperator
+from airflow.plugins_manager import AirflowPlugin
+
+from base_data_quality_operator import _get_hook
+from data_quality_hook_cache import hook_cache
+from data_quality_result_cache import private_directory
+
+HISTORY_COLUMNS = (
+    "dag_id",
+    "task_id",
+    "execution_date",
+    "check_name",
+    "description",
+    "result",
+    "min_threshold",
+    "max_threshold",
+    "within_threshold",
+    "info"
+)
+
+HISTORY_CONN_TYPES = ("postgres", "mysql")
+
+# columns of HISTORY_COLUMNS after the primary key, replaced on conflict
+_VALUE_COLUMNS = HISTORY_COLUMNS[4:]
+
+class ResultSpool:
+    """
+    ResultSpool buffers data quality results in a local append-only spool file
+    per push connection and ships them to the result history table in bulk.
+    Results are flushed in batches once the spool holds flush_bytes or its
+    oldest result is flush_interval seconds old, or whenever flush() is called.
+    Rows are upserted on (dag_id, task_id, execution_date, check_name): a
+    spool that is shipped twice after a failure is harmless, and the result
+    of a retried task replaces the result of its earlier try. Results that
+    are not numeric are stored with a NULL result and their value in info.
+    A spooled file that cannot be read is moved aside to a ".bad" file so
+    that it does not hold up the results spooled after it. The spool
+    directory must be private to the current user, see private_directory():
+    results are neither spooled to nor flushed from a directory that others
+    could plant results in, which is logged instead.
+
+    The spool is local to the host. Operators flush the spools they pushed
+    to when their task ends (``[data_quality] push_flush_on_task_end``,
+    default True), so results never wait for a later task on the same host.
+    Turn it off only when push_spool_dir is shared by all workers, e.g. on a
+    network mount, to batch the results of several tasks together.
+
+    The history table is expected to look like:
+
+        CREATE TABLE data_quality_results (
+            dag_id VARCHAR(250) NOT NULL,
+            task_id VARCHAR(250) NOT NULL,
+            execution_date TIMESTAMP NOT NULL,
+            check_name VARCHAR(250) NOT NULL DEFAULT '',
+            description TEXT,
+            result DOUBLE PRECISION,
+            min_threshold DOUBLE PRECISION,
+            max_threshold DOUBLE PRECISION,
+            within_threshold BOOLEAN,
+            info TEXT,
+            PRIMARY KEY (dag_id, task_id, execution_date, check_name)
+        );
+
+    :param directory: (optional) spool directory, defaults to the
+        ``[data_quality] push_spool_dir`` setting or a temporary directory
+    :type directory: str
+    :param table: (optional) history table, defaults to the
+        ``[data_quality] push_table`` setting or "data_quality_results"
+    :type table: str
+    """
+
+    def __init__(self, directory=None, table=None):
+        self.directory = directory or conf.get(
+            "data_quality",
+            "push_spool_dir",
+            fallback=os.path.join(tempfile.gettempdir(), "airflow_dq_spool"))
+        self.table = table or conf.get("data_quality", "push_table", fallback="data_quality_results")
+        self.batch_size = conf.getint("data_quality", "push_batch_size", fallback=1000)
+        self.flush_bytes = conf.getint("data_quality", "push_flush_bytes", fallback=256 * 1024)
+        self.flush_interval = conf.getint("data_quality", "push_flush_interval", fallback=60)
+
+    def append(self, conn_id, info_dict):
+        """
+        Appends one result to the spool of conn_id. Raises ValueError if
+        conn_id is not a supported result history database.
+        """
+        conn_type = hook_cache.get_connection(conn_id).conn_type
+        if conn_type not in HISTORY_CONN_TYPES:
+            raise ValueError(f"""Connection type of "{conn_type}" not currently supported for result history""")
+        if not self._trusted(conn_id):
+            logging.error("Not spooling the data quality result of %s", conn_id)
+            return
+        record = dict(info_dict, spooled_at=time.time())
+        if record.get("execution_date") is not None:
+            record["execution_date"] = record["execution_date"].isoformat()
+        line = json.dumps(record, default=str) + "\n"
+        with self._locked(conn_id, ".spool.lock"):
+            with open(self._spool_path(conn_id), "a") as spool:
+                spool.write(line)
+
+    def maybe_flush(self, conn_id):
+        """Flushes the spool of conn_id if it is big or old enough."""
+        try:
+            size = os.path.getsize(self._spool_path(conn_id))
+            with open(self._spool_path(conn_id)) as spool:
+                spooled_at = json.loads(spool.readline())["spooled_at"]
+        except (OSError, ValueError, KeyError):
+            return
+        if size >= self.flush_bytes or time.time() - spooled_at >= self.flush_interval:
+            self.flush(conn_id)
+
+    def flush(self, conn_id):
+        """
+        Ships all spooled results of conn_id to the history table. Returns the
+        number of results shipped. Only one process flushes a spool at a time;
+        other callers return 0 right away, as do flushes of a spool directory
+        that is not private to the current user.
+        """
+        if not self._trusted(conn_id):
+            logging.error("Not flushing the data quality results of %s", conn_id)
+            return 0
+        try:
+            with self._locked(conn_id, ".flush.lock", blocking=False):
+                with self._locked(conn_id, ".spool.lock"):
+                    if os.path.exists(self._spool_path(conn_id)):
+                        os.replace(
+                            self._spool_path(conn_id),
+                            os.path.join(self._directory(conn_id), f"{time.time():.6f}.flushing"))
+                flushed = 0
+                for path in sorted(glob.glob(os.path.join(self._directory(conn_id), "*.flushing"))):
+                    try:
+                        with open(path) as spool:
+                            rows = _latest_rows(_to_row(json.loads(line)) for line in spool if line.strip())
+                    except (ValueError, KeyError, TypeError):
+                        logging.exception("Failed to read spooled data quality results %s, moving it aside", path)
+                        os.replace(path, path[:-len(".flushing")] + ".bad")
+                        continue
+                    for start in range(0, len(rows), self.batch_size):
+                        self._insert(conn_id, rows[start:start + self.batch_size])
+                    os.remove(path)
+                    flushed += len(rows)
+                logging.info("Flushed %s data quality results to %s", flushed, self.table)
+                return flushed
+        except BlockingIOError:
+            return 0
+
+    def _insert(self, conn_id, rows):
+        conn_type = hook_cache.get_connection(conn_id).conn_type
+        columns = ", ".join(HISTORY_COLUMNS)
+        hook = _get_hook(conn_id)
+        with hook_cache.connection(conn_id, hook) as conn:
+            with closing(conn.cursor()) as cursor:
+                if conn_type == "postgres":
+                    from psycopg2.extras import execute_values
+                    execute_values(
+                        cursor,
+                        f"INSERT INTO {self.table} ({columns}) VALUES %s "
+                        "ON CONFLICT (dag_id, task_id, execution_date, check_name) DO UPDATE SET "
+                        + ", ".join(f"{column} = EXCLUDED.{column}" for column in _VALUE_COLUMNS),
+                        rows,
+                        page_size=self.batch_size)
+                elif conn_type == "mysql":
+                    placeholders = ", ".join(["%s"] * len(HISTORY_COLUMNS))
+                    cursor.executemany(
+                        f"INSERT INTO {self.table} ({columns}) VALUES ({placeholders}) ON DUPLICATE KEY UPDATE "
+                        + ", ".join(f"{column} = VALUES({column})" for column in _VALUE_COLUMNS),
+                        rows)
+                else:
+                    raise ValueError(f"""Connection type of "{conn_type}" not currently supported for result history""")
+            conn.commit()
+
+    def _trusted(self, conn_id):
+        """Whether the spool directory of conn_id and its parent are private to the current user."""
+        return private_directory(self.directory) and private_directory(self._directory(conn_id))
+
+    def _directory(self, conn_id):
+        return os.path.join(self.directory, conn_id)
+
+    def _spool_path(self, conn_id):
+        return os.path.join(self._directory(conn_id), "spool.jsonl")
+
+    @contextmanager
+    def _locked(self, conn_id, name, blocking=True):
+        with open(os.path.join(self._directory(conn_id), name), "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+def _to_row(record):
+    """Converts a spooled result into a row of HISTORY_COLUMNS."""
+    info = {key: value for key, value in record.items()
+            if key not in HISTORY_COLUMNS and key != "spooled_at"}
+    numbers = []
+    for column in ("result", "min_threshold", "max_threshold"):
+        number = _to_float(record.get(column))
+        if number is None and record.get(column) is not None:
+            info[column] = record[column]
+        numbers.append(number)
+    return (
+        record["dag_id"],
+        record["task_id"],
+        record["execution_date"],
+        record.get("check_name") or "",
+        record.get("description"),
+        *numbers,
+        record.get("within_threshold"),
+        json.dumps(info) if info else None
+    )
+
+def _to_float(value):
+    """Returns value as a float, or None if it is missing or not numeric."""
+    if value is None or isinstance(value, bool):
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+def _latest_rows(rows):
+    """Keeps the last of the rows of every primary key, as one statement cannot upsert a key twice."""
+    return list({row[:4]: row for row in rows}.values())
+
+class DataQualityResultFlushOperator(BaseOperator):
+    """
+    DataQualityResultFlushOperator ships the spooled results of push_conn_id
+    to the result history table, typically at the end of a DAG's data
+    quality checks so that no result waits for the next flush threshold.
+    It only reaches the spool of the worker it runs on, unless push_spool_dir
+    is shared by all workers.
+
+    :param push_conn_id: connection id of the result history database
+    :type push_conn_id: str
+    """
+
+    @apply_defaults
+    def __init__(self,
+                 push_conn_id,
+                 *args,
+                 **kwargs):
+        super().__init__(*args, **kwargs)
+        self.push_conn_id = push_conn_id
+
+    def execute(self, context):
+        return ResultSpool().flush(self.push_conn_id)
+
+class DataQualityResultSinkPlugin(AirflowPlugin):
+    name = "data_quality_result_sink"
+    operators = [DataQualityResultFlushOperator]
@@ -0,0 +1,256 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from airflow.utils.decorators import apply_defaults
+from airflow.configuration import conf as airflow_conf
+from airflow.models import BaseOperator, Variable
+from airflow.plugins_manager import AirflowPlugin
+from airflow import AirflowException
+
+from base_data_quality_operator import get_sql_row, statement_timeout
+from data_quality_check_scheduler import plan_checks
+from data_quality_config_loader import load_configs
+from data_quality_result_sink import ResultSpool
+
+class DataQualitySuiteOperator(BaseOperator):
+    """
+    DataQualitySuiteOperator runs every data quality check configured in a
+    directory of YAML files (the schema read by the YAML DAG factory) inside
+    one task, using a pool of worker threads instead of one Airflow task per
+    check. Queries against one connection are limited to a number of
+    concurrent queries per conn_id. Every check is evaluated and pushed, and
+    the task fails at the end with one report of all failed checks.
+
+    Checks run in the tiers of plan_checks() ("tier" and "depends_on" keys
+    of the YAML files), cheapest first within a tier by the runtimes of
+    earlier runs, which are kept in an Airflow Variable. Once a check of a
+    tier fails, the checks of later tiers are skipped.
+
+    Besides the threshold and fields of a check, YAML files may set
+    "query_timeout" (seconds, overriding query_timeout) and "cache: true"
+    under threshold to serve its threshold sql from threshold_cache.
+    Incremental checks are not supported and fail the task before any check
+    runs, as does "cache: true" without a threshold_cache.
+
+    :param yaml_dir: directory of YAML check configurations
+    :type yaml_dir: str
+    :param max_workers: number of checks evaluated concurrently
+    :type max_workers: int
+    :param conn_concurrency: (optional) mapping of conn_id to the number of
+        concurrent queries allowed against it
+    :type conn_concurrency: dict
+    :param default_conn_concurrency: concurrent queries allowed against a
+        conn_id missing from conn_concurrency
+    :type default_conn_concurrency: int
+    :param query_timeout: (optional) seconds after which the queries of a
+        check without its own query_timeout are cancelled and the check fails
+    :type query_timeout: float
+    :param threshold_cache: (optional) cache shared across tasks serving the
+        threshold sql of checks with "cache: true"
+    :type threshold_cache: BaseResultCache
+    """
+
+    template_fields = ('yaml_dir',)
+    template_ext = ('.sql',)
+
+    @apply_defaults
+    def __init__(self,
+                 yaml_dir,
+                 max_workers=8,
+                 conn_concurrency=None,
+                 default_conn_concurrency=4,
+                 query_timeout=None,
+                 threshold_cache=None,
+                 *args,
+                 **kwargs):
+        super().__init__(*args, **kwargs)
+        self.yaml_dir = yaml_dir
+        self.max_workers = max_workers
+        self.conn_concurrency = conn_concurrency or {}
+        self.default_conn_concurrency = default_conn_concurrency
+        self.query_timeout = query_timeout
+        self.threshold_cache = threshold_cache
+
+    def execute(self, context):
+        configs = load_configs(self.yaml_dir)
+        self.check_configs(configs)
+        runtimes_key = f"data_quality_suite_runtimes__{self.dag_id}__{self.task_id}"
+        runtimes = Variable.get(runtimes_key, default_var=None, deserialize_json=True) or {}
+        conn_ids = set()
+        for conf in configs:
+            conn_ids.update((conf["fields"]["conn_id"], conf["threshold"]["threshold_conn_id"]))
+        semaphores = {
+            conn_id: threading.BoundedSemaphore(self.conn_concurrency.get(conn_id, self.default_conn_concurrency))
+            for conn_id in conn_ids if conn_id is not None
+        }
+
+        results = {}
+        failed_tier = None
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            for tier, tier_configs in enumerate(plan_checks(configs, runtimes)):
+                if failed_tier is not None:
+                    for conf in tier_configs:
+                        results[conf["test_name"]] = self.skip_check(conf, context, failed_tier)
+                    continue
+                tier_info_dicts = list(executor.map(lambda conf: self.run_check(conf, context, semaphores), tier_configs))
+                for conf, info_dict in zip(tier_configs, tier_info_dicts):
+                    results[conf["test_name"]] = info_dict
+                if not all(info_dict["within_threshold"] for info_dict in tier_info_dicts):
+                    failed_tier = tier
+        info_dicts = [results[conf["test_name"]] for conf in configs]
+
+        runtimes.update(
+            (info_dict["check_name"], info_dict["runtime"]) for info_dict in info_dicts if "runtime" in info_dict)
+        Variable.set(runtimes_key, runtimes, serialize_json=True)
+        ran = [(conf, info_dict) for conf, info_dict in zip(configs, info_dicts) if not info_dict.get("skipped")]
+        self.push([conf for conf, _ in ran], [info_dict for _, info_dict in ran])
+        failed_checks = [info_dict for info_dict in info_dicts if not info_dict["within_threshold"]]
+        logging.info("%s of %s data quality checks passed", len(info_dicts) - len(failed_checks), len(info_dicts))
+        if failed_checks:
+            context["ti"].xcom_push(key=f"""result data from task {self.task_id}""", value=info_dicts)
+            self.send_failure_notification(failed_checks, len(info_dicts))
+        return info_dicts
+
+    def check_configs(self, configs):
+        """Raises ValueError if any YAML configuration uses a key the suite does not support."""
+        incremental = [conf["test_name"] for conf in configs if conf["incremental"]]
+        if incremental:
+            raise ValueError(f"DataQualitySuiteOperator does not support incremental checks {incremental}")
+        cached = [conf["test_name"] for conf in configs if conf["threshold"]["cache"]]
+        if cached and self.threshold_cache is None:
+            raise ValueError(f"Checks {cached} cache their thresholds but no threshold_cache was given")
+
+    def render_sql(self, sql, context):
+        """Renders sql, or the .sql template file it names, with the jinja environment of the task."""
+        env = self.get_template_env()
+        if sql.strip().endswith(self.template_ext):
+            return env.get_template(sql.strip()).render(**context)
+        return env.from_string(sql).render(**context)
+
+    def run_check(self, conf, context, semaphores):
+        """
+        Evaluates the check of one YAML configuration and returns its
+        info_dict. Errors, including queries running past the query_timeout
+        of the check, are recorded in the info_dict instead of raised.
+        """
+        def query(conn_id, sql, width=1, cache=False):
+            sql = self.render_sql(sql, context)
+            if cache:
+                key = self.threshold_cache.make_key(conn_id, sql, context.get("execution_date"))
+                try:
+                    return tuple(self.threshold_cache.get(key))
+                except KeyError:
+                    pass
+            with semaphores[conn_id]:
+                row = get_sql_row(conn_id, sql, width)
+            if cache:
+                self.threshold_cache.set(key, row)
+            return row
+
+        start = time.perf_counter()
+        threshold = conf["threshold"]
+        cache = bool(threshold["cache"])
+        query_timeout = conf["query_timeout"] if conf["query_timeout"] is not None else self.query_timeout
+        info_dict = {
+            "check_name" : conf["test_name"],
+            "description" : conf["check_description"],
+            "task_id" : self.task_id,
+            "execution_date" : context.get("execution_date")
+        }
+        try:
+            with statement_timeout(query_timeout):
+                if threshold["threshold_sql"]:
+                    min_threshold, max_threshold = query(
+                        threshold["threshold_conn_id"], threshold["threshold_sql"], 2, cache)
+                elif threshold["min_threshold_sql"]:
+                    min_threshold, = query(threshold["threshold_conn_id"], threshold["min_threshold_sql"], cache=cache)
+                    max_threshold, = query(threshold["threshold_conn_id"], threshold["max_threshold_sql"], cache=cache)
+                else:
+                    min_threshold, max_threshold = threshold["min_threshold"], threshold["max_threshold"]
+                result, = query(conf["fields"]["conn_id"], conf["fields"]["sql"])
+            info_dict.update({
+                "result" : result,
+                "min_threshold" : min_threshold,
+                "max_threshold" : max_threshold,
+                "within_threshold" : min_threshold <= result <= max_threshold,
+                "runtime" : time.perf_counter() - start
+            })
+        except Exception as error:
+            logging.exception("Data quality check %s failed to run", conf["test_name"])
+            info_dict.update({
+                "result" : None,
+                "min_threshold" : threshold["min_threshold"],
+                "max_threshold" : threshold["max_threshold"],
+                "within_threshold" : False,
+                "error" : str(error)
+            })
+        return info_dict
+
+    def skip_check(self, conf, context, failed_tier):
+        """Returns the info_dict of a check skipped because a check of tier failed_tier failed."""
+        return {
+            "check_name" : conf["test_name"],
+            "description" : conf["check_description"],
+            "task_id" : self.task_id,
+            "execution_date" : context.get("execution_date"),
+            "result" : None,
+            "min_threshold" : conf["threshold"]["min_threshold"],
+            "max_threshold" : conf["threshold"]["max_threshold"],
+            "within_threshold" : None,
+            "skipped" : True,
+            "error" : f"Skipped, a check of tier {failed_tier} failed"
+        }
+
+    def push(self, configs, info_dicts):
+        """
+        Sends the results of all checks with a push_conn_id to their result
+        history. Spools are flushed right away unless push_flush_on_task_end
+        is off, as this is the end of the task.
+        """
+        flush_now = airflow_conf.getboolean("data_quality", "push_flush_on_task_end", fallback=True)
+        spool = ResultSpool()
+        push_conn_ids = set()
+        for conf, info_dict in zip(configs, info_dicts):
+            if conf["push_conn_id"]:
+                spool.append(conf["push_conn_id"], dict(info_dict, dag_id=self.dag_id))
+                push_conn_ids.add(conf["push_conn_id"])
+        for push_conn_id in push_conn_ids:
+            try:
+                if flush_now:
+                    spool.flush(push_conn_id)
+                else:
+                    spool.maybe_flush(push_conn_id)
+            except Exception:
+                logging.exception("Failed to flush data quality results of %s", push_conn_id)
+
+    def send_failure_notification(self, info_dicts, check_count):
+        """
+        send_failure_notification will throw an AirflowException with one
+        report of every failed check of the suite.
+        """
+        failures = []
+        skipped = [info_dict for info_dict in info_dicts if info_dict.get("skipped")]
+        info_dicts = [info_dict for info_dict in info_dicts if not info_dict.get("skipped")]
+        for info_dict in info_dicts:
+            if "error" in info_dict:
+                failures.append(f"""Check "{info_dict["check_name"]}": Error: {info_dict["error"]}""")
+            else:
+                failures.append(
+                    f"""Check "{info_dict["check_name"]}": Result: {round(info_dict["result"], 2)} """
+                    f"""is not within thresholds {info_dict["min_threshold"]} and {info_dict["max_threshold"]}""")
+        if skipped:
+            failures.append(f"""{len(skipped)} checks of later tiers were skipped: {", ".join(
+                info_dict["check_name"] for info_dict in skipped)}""")
+        failures = "\n".join(failures)
+        body = f"""Data Quality Suite: "{self.task_id}" failed {len(info_dicts)} of {check_count} checks.
+DAG: {self.dag_id}
+Task_id: {self.task_id}
+Execution date: {info_dicts[0].get("execution_date")}
+{failures}"""
+        raise AirflowException(body)
+
+class DataQualitySuitePlugin(AirflowPlugin):
+    name = "data_quality_suite_operator"
+    operators = [DataQualitySuiteOperator]
@@ -0,0 +1,43 @@
+from airflow.utils.decorators import apply_defaults
+from airflow.plugins_manager import AirflowPlugin
+
+from data_quality_threshold_check_operator import DataQualityThresholdCheckOperator
+from data_quality_trigger import DeferrableCheckMixin
+
+class DataQualityThresholdCheckAsyncOperator(DeferrableCheckMixin, DataQualityThresholdCheckOperator):
+    """
+    DataQualityThresholdCheckAsyncOperator is the deferrable variant of
+    DataQualityThresholdCheckOperator. The check query is handed to a
+    DataQualityQueryTrigger instead of being waited on by the worker, and the
+    thresholds are evaluated once it completes. See DeferrableCheckMixin.
+    Incremental, partitioned, sampled and preflight checks are not supported.
+
+    :param poll_interval: seconds between polls of a running Hive query
+    :type poll_interval: float
+    """
+
+    @apply_defaults
+    def __init__(self,
+                 poll_interval=5,
+                 *args,
+                 **kwargs):
+        super().__init__(*args, **kwargs)
+        if self.incremental or self.partitioned or self.sampling:
+            raise ValueError("Incremental, partitioned and sampled checks cannot be deferred")
+        self.reject_options("preflight")
+        self.poll_interval = poll_interval
+
+    def get_queries(self):
+        return {"sql" : (self.conn_id, self.sql, 1)}
+
+    def execute(self, context):
+        self.start_timing()
+        return self.defer_queries(context)
+
+    def execute_complete(self, context, event=None):
+        results = self.get_trigger_results(context, event)
+        return self.check_result(context, results["sql"][0])
+
+class DataQualityThresholdCheckAsyncPlugin(AirflowPlugin):
+    name = "data_quality_threshold_check_async_operator"
+    operators = [DataQualityThresholdCheckAsyncOperator]
@@ -1,7 +1,19 @@
+import logging
+import random
+
 from airflow.utils.decorators import apply_defaults
 from airflow.plugins_manager import AirflowPlugin
 
-from base_data_quality_operator import BaseDataQualityOperator, get_sql_value
+from base_data_quality_operator import BaseDataQualityOperator, QueryTimeout, get_conn_type, get_sql_row, get_sql_value
+from data_quality_aggregates import SAMPLED_AGGREGATES, AggregateState
+from data_quality_timing import timed
+
+# number of key ranges a MySQL sample is spread over
+SAMPLE_KEY_RANGES = 10
+
+# default variance inflation of the samplers taking whole blocks or key ranges
+# rather than independent rows, Postgres samples rows with BERNOULLI
+SAMPLE_DESIGN_EFFECTS = {"postgres" : 1, "hive" : 4, "mysql" : 4}
 
 class DataQualityThresholdCheckOperator(BaseDataQualityOperator):
     """
@@ -12,35 +24,119 @@ class DataQualityThresholdCheckOperator(BaseDataQualityOperator):
     :type min_threshold: numeric
     :param max_threshold: upper-bound value
     :type max_threshold: numeric
+    :param sampling: (optional) estimate the check from a sample of a huge
+        table, given as a dict with keys "table", "column", "aggregate" (one
+        of count, sum, avg), "percent" of the table to sample, "confidence"
+        level of the estimate (default 0.95) and, on MySQL, an indexed
+        numeric "key_column" to sample ranges of. The check passes or fails
+        on the estimate when its confidence interval lies entirely inside or
+        outside the thresholds; otherwise it escalates to the exact sql (or
+        to the exact aggregate over the table when sql is None). Postgres
+        samples rows (TABLESAMPLE BERNOULLI). Hive samples whole blocks and
+        MySQL contiguous key ranges, so rows of a sample are correlated and
+        their intervals are widened by a "design_effect" variance factor
+        (default 4). MySQL counts and sums also assume keys are evenly dense
+        over their range, as the sampled fraction is that of the key range.
+    :type sampling: dict
     """
 
     @apply_defaults
     def __init__(self,
                  min_threshold,
                  max_threshold,
+                 sampling=None,
                  *args,
                  **kwargs):
         super().__init__(*args, **kwargs)
+        if sampling:
+            missing_keys = {"table", "column", "aggregate", "percent"} - set(sampling)
+            if missing_keys:
+                raise ValueError(f"Sampling is missing {sorted(missing_keys)}")
+            if sampling["aggregate"] not in SAMPLED_AGGREGATES:
+                raise ValueError(f"""Aggregate "{sampling['aggregate']}" cannot be estimated from a sample""")
+            if not 0 < sampling["percent"] <= 100:
+                raise ValueError("Sampling percent must be within (0, 100]")
+            if sampling.get("design_effect", 1) < 1:
+                raise ValueError("Sampling design_effect must be at least 1")
         self.min_threshold = min_threshold
         self.max_threshold = max_threshold
+        self.sampling = sampling
 
     def execute(self, context):
-        result = get_sql_value(self.conn_id, self.sql)
-        info_dict = {
-            "result" : result,
-            "description" : self.check_description,
-            "task_id" : self.task_id,
-            "execution_date" : context.get("execution_date"),
-            "min_threshold" : self.min_threshold,
-            "max_threshold" : self.max_threshold,
-            "within_threshold" : self.min_threshold <= result <= self.max_threshold
-        }
-
-        self.push(info_dict)
-        if not info_dict["within_threshold"]:
-            context["ti"].xcom_push(key=f"""result data from task {self.task_id}""", value=info_dict)
-            self.send_failure_notification(info_dict)
-        return info_dict
+        self.start_timing()
+        try:
+            with timed("check", self.conn_id):
+                result = self.get_result(context)
+        except QueryTimeout as error:
+            self.fail_on_timeout(context, error)
+        return self.check_result(context, result)
+
+    def evaluate(self, context):
+        if not self.sampling:
+            return super().evaluate(context)
+
+        table = self.sampling["table"]
+        column = self.sampling["column"]
+        aggregate = self.sampling["aggregate"]
+        sql, fraction = self.get_sample_sql()
+        design_effect = self.sampling.get("design_effect", SAMPLE_DESIGN_EFFECTS[get_conn_type(self.conn_id)])
+        sample = AggregateState.from_row(get_sql_row(self.conn_id, sql, 5))
+        try:
+            estimate, lower, upper = sample.estimate(
+                aggregate, fraction, self.sampling.get("confidence", 0.95), design_effect)
+        except ValueError as error:
+            logging.info("Sample of %s cannot be used: %s", table, error)
+            estimate, lower, upper = None, None, None
+
+        self.result_info.update({
+            "sample_estimate" : estimate,
+            "confidence_interval" : [lower, upper],
+            "sample_fraction" : fraction,
+            "sample_design_effect" : design_effect
+        })
+        if estimate is not None:
+            if self.min_threshold <= lower and upper <= self.max_threshold:
+                return estimate
+            if upper < self.min_threshold or lower > self.max_threshold:
+                return estimate
+
+        logging.info("Sampled estimate of %s is ambiguous, escalating to exact query", table)
+        self.result_info["sample_escalated"] = True
+        return get_sql_value(self.conn_id, self.sql or f"SELECT {aggregate.upper()}({column}) FROM {table}")
+
+    def get_sample_sql(self):
+        """
+        Returns the sql computing an AggregateState over a sample of the
+        sampled table, using the sampling clause of its dialect, along with
+        the sampled fraction of the table. On MySQL that is the fraction of
+        the key range sampled, which is the fraction of rows only if keys are
+        evenly dense.
+        """
+        table = self.sampling["table"]
+        percent = self.sampling["percent"]
+        conn_type = get_conn_type(self.conn_id)
+        expressions = AggregateState.select_expressions(self.sampling["column"], conn_type)
+        if conn_type == "postgres":
+            return f"SELECT {expressions} FROM {table} TABLESAMPLE BERNOULLI ({percent})", percent / 100
+        if conn_type == "hive":
+            return f"SELECT {expressions} FROM {table} TABLESAMPLE({percent} PERCENT)", percent / 100
+        if conn_type == "mysql":
+            key = self.sampling.get("key_column")
+            if key is None:
+                raise ValueError("Sampling on MySQL requires a key_column")
+            min_key, max_key = get_sql_row(self.conn_id, f"SELECT MIN({key}), MAX({key}) FROM {table}", 2)
+            if min_key is None:
+                # empty table, the empty sample escalates to the exact query
+                min_key = max_key = 0
+            # one random range per stratum of the key space, each spanning percent of its stratum
+            stratum = (float(max_key) - float(min_key)) / SAMPLE_KEY_RANGES
+            width = stratum * percent / 100
+            ranges = []
+            for index in range(SAMPLE_KEY_RANGES):
+                start = float(min_key) + index * stratum + random.uniform(0, stratum - width)
+                ranges.append(f"({key} >= {start!r} AND {key} < {start + width!r})")
+            return f"SELECT {expressions} FROM {table} WHERE {' OR '.join(ranges)}", percent / 100
+        raise ValueError(f"""Connection type of "{conn_type}" not currently supported for sampling""")
 
 class DataQualityThresholdCheckPlugin(AirflowPlugin):
     name = "data_quality_threshold_check_operator"
@@ -0,0 +1,57 @@
+from airflow.utils.decorators import apply_defaults
+from airflow.plugins_manager import AirflowPlugin
+
+from data_quality_threshold_sql_check_operator import DataQualityThresholdSQLCheckOperator
+from data_quality_trigger import DeferrableCheckMixin
+
+class DataQualityThresholdSQLCheckAsyncOperator(DeferrableCheckMixin, DataQualityThresholdSQLCheckOperator):
+    """
+    DataQualityThresholdSQLCheckAsyncOperator is the deferrable variant of
+    DataQualityThresholdSQLCheckOperator. The threshold and check queries are
+    handed to a DataQualityQueryTrigger, which runs them concurrently instead
+    of a worker waiting on them, and the thresholds are evaluated once they
+    complete. See DeferrableCheckMixin. Incremental, partitioned and
+    preflight checks and threshold_cache are not supported.
+
+    :param poll_interval: seconds between polls of a running Hive query
+    :type poll_interval: float
+    """
+
+    @apply_defaults
+    def __init__(self,
+                 poll_interval=5,
+                 *args,
+                 **kwargs):
+        super().__init__(*args, **kwargs)
+        if self.incremental or self.partitioned or self.threshold_cache is not None:
+            raise ValueError("Incremental and partitioned checks and threshold_cache cannot be deferred")
+        self.reject_options("preflight")
+        self.poll_interval = poll_interval
+
+    def get_queries(self):
+        if self.threshold_sql:
+            queries = {"threshold_sql" : (self.threshold_conn_id, self.threshold_sql, 2)}
+        else:
+            queries = {
+                "min_threshold_sql" : (self.threshold_conn_id, self.min_threshold_sql, 1),
+                "max_threshold_sql" : (self.threshold_conn_id, self.max_threshold_sql, 1)
+            }
+        queries["sql"] = (self.conn_id, self.sql, 1)
+        return queries
+
+    def execute(self, context):
+        self.start_timing()
+        return self.defer_queries(context)
+
+    def execute_complete(self, context, event=None):
+        results = self.get_trigger_results(context, event)
+        if self.threshold_sql:
+            self.min_threshold, self.max_threshold = results["threshold_sql"]
+        else:
+            self.min_threshold = results["min_threshold_sql"][0]
+            self.max_threshold = results["max_threshold_sql"][0]
+        return self.check_result(context, results["sql"][0])
+
+class DataQualityThresholdSQLCheckAsyncPlugin(AirflowPlugin):
+    name = "data_quality_threshold_sql_check_async_operator"
+    operators = [DataQualityThresholdSQLCheckAsyncOperator]
@@ -1,7 +1,9 @@
 from airflow.utils.decorators import apply_defaults
 from airflow.plugins_manager import AirflowPlugin
 
-from base_data_quality_operator import BaseDataQualityOperator, get_sql_value
+from base_data_quality_operator import (BaseDataQualityOperator, QueryTimeout, get_sql_value, get_sql_row,
+                                        run_concurrently, statement_timeout)
+from data_quality_timing import timed
 
 class DataQualityThresholdSQLCheckOperator(BaseDataQualityOperator):
     """
@@ -10,51 +12,130 @@ class DataQualityThresholdSQLCheckOperator(BaseDataQualityOperator):
     statements from a defined source, evaluate the data quality check, and then compare
     that result to the min and max thresholds calculated.
 
+    Thresholds come either from the two statements min_threshold_sql and
+    max_threshold_sql, or from the single statement threshold_sql returning
+    one row of (min, max), so that both bounds cost one scan of their source.
+
     :param min_threshold_sql: lower bound sql statement (or path to sql statement)
     :type min_threshold_sql: str
     :param max_threshold_sql: upper bound sql statement (or path to sql statement)
     :type max_threshold_sql: str
+    :param threshold_sql: sql statement (or path to sql statement) returning
+        the lower and upper bound as one row of two columns, used instead of
+        min_threshold_sql and max_threshold_sql
+    :type threshold_sql: str
     :param threshold_conn_type: connection type of threshold sql statement table
     :type threshold_conn_type: str
     :param threshold_conn_id: connection id of threshold sql statement table
     :type threshold_conn_id: str
+    :param concurrent_queries: (optional) run the threshold and check sql
+        statements in parallel instead of one after another
+    :type concurrent_queries: bool
+    :param threshold_cache: (optional) cache shared across tasks that serves
+        repeated threshold sql statements of a DAG run
+    :type threshold_cache: BaseResultCache
     """
 
-    template_fields = ('sql','min_threshold_sql', 'max_threshold_sql')
+    template_fields = ('sql','min_threshold_sql', 'max_threshold_sql', 'threshold_sql')
     template_ext = ('.sql',)
 
     @apply_defaults
     def __init__(self,
-                 min_threshold_sql,
-                 max_threshold_sql,
-                 threshold_conn_id,
+                 min_threshold_sql=None,
+                 max_threshold_sql=None,
+                 threshold_conn_id=None,
+                 threshold_sql=None,
+                 concurrent_queries=False,
+                 threshold_cache=None,
                  *args,
                  **kwargs):
         super().__init__(*args, **kwargs)
+        if threshold_conn_id is None:
+            raise ValueError("threshold_conn_id must be given")
+        if threshold_sql and (min_threshold_sql or max_threshold_sql):
+            raise ValueError("threshold_sql cannot be combined with min_threshold_sql or max_threshold_sql")
+        if not threshold_sql and not (min_threshold_sql and max_threshold_sql):
+            raise ValueError("Either threshold_sql or both min_threshold_sql and max_threshold_sql must be given")
         self.min_threshold_sql = min_threshold_sql
         self.max_threshold_sql = max_threshold_sql
         self.threshold_conn_id = threshold_conn_id
+        self.threshold_sql = threshold_sql
+        self.concurrent_queries = concurrent_queries
+        self.threshold_cache = threshold_cache
 
     def execute(self, context):
-        self.min_threshold = get_sql_value(self.threshold_conn_id, self.min_threshold_sql)
-        self.max_threshold = get_sql_value(self.threshold_conn_id, self.max_threshold_sql)
-
-        result = get_sql_value(self.conn_id, self.sql)
-        info_dict = {
-            "result" : result,
-            "description" : self.check_description,
-            "task_id" : self.task_id,
-            "execution_date" : context.get("execution_date"),
-            "min_threshold" : self.min_threshold,
-            "max_threshold" : self.max_threshold,
-            "within_threshold" : self.min_threshold <= result <= self.max_threshold
-        }
-
-        self.push(info_dict)
-        if not info_dict["within_threshold"]:
-            context["ti"].xcom_push(key=f"""result data from task {self.task_id}""", value=info_dict)
-            self.send_failure_notification(info_dict)
-        return info_dict
+        self.start_timing()
+        if self.threshold_sql:
+            queries = {
+                "threshold_sql" : lambda: get_sql_row(self.threshold_conn_id, self.threshold_sql, 2)
+            }
+        else:
+            queries = {
+                "min_threshold_sql" : lambda: get_sql_value(self.threshold_conn_id, self.min_threshold_sql),
+                "max_threshold_sql" : lambda: get_sql_value(self.threshold_conn_id, self.max_threshold_sql)
+            }
+        cache_hits = []
+        if self.threshold_cache is not None:
+            queries = {
+                name: self.cache_threshold_query(getattr(self, name), query, context, cache_hits)
+                for name, query in queries.items()
+            }
+        queries = {name: self.time_threshold_query(query) for name, query in queries.items()}
+        queries["sql"] = self.time_check_query(context)
+
+        try:
+            if self.concurrent_queries:
+                values = run_concurrently(queries)
+            else:
+                values = {name: query() for name, query in queries.items()}
+        except QueryTimeout as error:
+            self.fail_on_timeout(context, error)
+
+        if self.threshold_sql:
+            self.min_threshold, self.max_threshold = values["threshold_sql"]
+        else:
+            self.min_threshold = values["min_threshold_sql"]
+            self.max_threshold = values["max_threshold_sql"]
+        result = values["sql"]
+
+        if self.threshold_cache is not None:
+            return self.check_result(context, result, threshold_cache_hit=all(cache_hits))
+        return self.check_result(context, result)
+
+    def time_threshold_query(self, query):
+        """
+        Wraps query, the evaluation of a threshold statement, to be timed as
+        phase "threshold" and limited to query_timeout.
+        """
+        def timed_query():
+            with timed("threshold", self.threshold_conn_id), statement_timeout(self.query_timeout):
+                return query()
+        return timed_query
+
+    def time_check_query(self, context):
+        """Returns the evaluation of the check, timed as phase "check"."""
+        def timed_query():
+            with timed("check", self.conn_id):
+                return self.get_result(context)
+        return timed_query
+
+    def cache_threshold_query(self, sql, query, context, cache_hits):
+        """
+        Wraps query, the evaluation of threshold statement sql, so that its
+        result is served from self.threshold_cache for the rest of the DAG run.
+        Whether the cache was hit is appended to cache_hits.
+        """
+        def cached_query():
+            key = self.threshold_cache.make_key(self.threshold_conn_id, sql, context.get("execution_date"))
+            try:
+                value = self.threshold_cache.get(key)
+                cache_hits.append(True)
+            except KeyError:
+                value = query()
+                self.threshold_cache.set(key, value)
+                cache_hits.append(False)
+            return value
+        return cached_query
 
 class DataQualityThresholdSQLCheckPlugin(AirflowPlugin):
     name = "data_quality_threshold_sql_check_operator"
@@ -0,0 +1,23 @@
+import decimal
+import numbers
+
+import numpy as np
+
+def within_thresholds(results, thresholds):
+    """
+    Compares every result against its (min_threshold, max_threshold) in one
+    vectorized comparison. None thresholds are open, and a missing result
+    with thresholds is not within them. Non-numeric results (strings, dates,
+    ...) cannot be compared against numeric thresholds: they are within open
+    thresholds only. Returns a list of booleans.
+    """
+    numeric = np.array([_is_numeric(result) for result in results], dtype=bool)
+    values = np.array([float(result) if is_numeric else np.nan
+                       for result, is_numeric in zip(results, numeric)], dtype=float)
+    lower = np.array([-np.inf if min_threshold is None else min_threshold for min_threshold, _ in thresholds], dtype=float)
+    upper = np.array([np.inf if max_threshold is None else max_threshold for _, max_threshold in thresholds], dtype=float)
+    unbounded = np.isneginf(lower) & np.isposinf(upper)
+    return ((lower <= values) & (values <= upper) | unbounded).tolist()
+
+def _is_numeric(result):
+    return isinstance(result, (numbers.Real, decimal.Decimal))
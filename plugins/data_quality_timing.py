@@ -0,0 +1,116 @@
+import cProfile
+import io
+import logging
+import os
+import pstats
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from airflow.configuration import conf
+from airflow.settings import Stats
+
+class PhaseTimer:
+    """
+    PhaseTimer collects the wall-clock duration of the phases of a data
+    quality check: resolving connection metadata and hooks
+    ("get_connection"), opening or checking out a database connection
+    ("connect"), running queries ("query"), and the operator-level phases
+    "preflight", "threshold", "check" and "push". Phases are recorded per
+    conn_id.
+
+    A timer records the phases run by its thread while it is active, see
+    activate(). Phases of queries run concurrently are summed, so they can
+    add up to more than the total duration of the task.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._started = time.perf_counter()
+        self.entries = []
+
+    @contextmanager
+    def phase(self, name, conn_id=None):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self.entries.append((name, conn_id, elapsed))
+
+    def totals(self):
+        """Returns the duration of each phase, and of the whole timer as "total", in milliseconds."""
+        totals = OrderedDict()
+        with self._lock:
+            entries = list(self.entries)
+        for name, _, elapsed in entries:
+            totals[name] = totals.get(name, 0) + elapsed * 1000
+        totals["total"] = (time.perf_counter() - self._started) * 1000
+        return {name: round(milliseconds, 3) for name, milliseconds in totals.items()}
+
+    def emit(self, dag_id, task_id):
+        """
+        Sends the duration of each phase to StatsD as
+        data_quality.<dag_id>.<task_id>.<conn_id>.<phase>, and the duration of
+        the whole timer as data_quality.<dag_id>.<task_id>.total.
+        """
+        totals = OrderedDict()
+        with self._lock:
+            entries = list(self.entries)
+        for name, conn_id, elapsed in entries:
+            key = (conn_id or "none", name)
+            totals[key] = totals.get(key, 0) + elapsed * 1000
+        for (conn_id, name), milliseconds in totals.items():
+            Stats.timing(f"data_quality.{dag_id}.{task_id}.{conn_id}.{name}", milliseconds)
+        Stats.timing(f"data_quality.{dag_id}.{task_id}.total", (time.perf_counter() - self._started) * 1000)
+
+_active = threading.local()
+
+def current_timer():
+    """Returns the PhaseTimer active in the current thread, if any."""
+    return getattr(_active, "timer", None)
+
+def activate(timer):
+    """Makes timer (or None, to stop timing) the active PhaseTimer of the current thread."""
+    _active.timer = timer
+
+@contextmanager
+def timed(name, conn_id=None):
+    """Times the enclosed block as phase name of the active PhaseTimer, if any."""
+    timer = current_timer()
+    if timer is None:
+        yield
+        return
+    with timer.phase(name, conn_id):
+        yield
+
+class TaskProfiler:
+    """
+    TaskProfiler runs cProfile over the execution of a check. The functions
+    with the highest cumulative time are logged, and the full profile is
+    dumped to the ``[data_quality] profile_dir`` directory when it is set.
+    """
+
+    def __init__(self, dag_id, task_id, limit=30):
+        self.dag_id = dag_id
+        self.task_id = task_id
+        self.limit = limit
+        self.profile = cProfile.Profile()
+
+    def start(self):
+        self.profile.enable()
+
+    def stop(self):
+        self.profile.disable()
+        output = io.StringIO()
+        pstats.Stats(self.profile, stream=output).sort_stats("cumulative").print_stats(self.limit)
+        logging.info("Profile of %s.%s:\n%s", self.dag_id, self.task_id, output.getvalue())
+
+        profile_dir = conf.get("data_quality", "profile_dir", fallback=None)
+        if profile_dir:
+            os.makedirs(profile_dir, exist_ok=True)
+            path = os.path.join(profile_dir, f"{self.dag_id}.{self.task_id}.{int(time.time())}.prof")
+            self.profile.dump_stats(path)
+            logging.info("Profile of %s.%s written to %s", self.dag_id, self.task_id, path)
@@ -0,0 +1,257 @@
+import asyncio
+import decimal
+import logging
+from functools import partial
+
+from airflow import AirflowException
+
+try:
+    from airflow.triggers.base import BaseTrigger, TriggerEvent
+except ImportError:
+    # Airflow < 2.2 has no triggerer, triggers are run in-process by run_trigger()
+    class BaseTrigger:
+        def __init__(self, **kwargs):
+            pass
+
+    class TriggerEvent:
+        def __init__(self, payload):
+            self.payload = payload
+
+from base_data_quality_operator import (_SQL_COMMENTS, QueryTimeout, _check_result, _get_hook, _get_records,
+                                        _is_single_select, _resolve_hook, _to_json_value, get_sql_value,
+                                        statement_timeout)
+from data_quality_hook_cache import hook_cache
+
+# extras of a Postgres connection PostgresHook passes on to psycopg2
+POSTGRES_EXTRA_ARGS = ("sslmode", "sslcert", "sslkey", "sslrootcert", "sslcrl", "application_name", "keepalives_idle")
+
+class DataQualityQueryTrigger(BaseTrigger):
+    """
+    DataQualityQueryTrigger runs the queries of a data quality check without
+    holding a thread per query: on Postgres through asynchronous psycopg2
+    connections, on Hive by submitting the query asynchronously and polling
+    its state every poll_interval seconds. Queries against other databases
+    run on a thread pool, and so do connection lookups, which may query the
+    Airflow metadata database. Queries still running after timeout seconds
+    are cancelled. At most two rows of a query are fetched, enough to tell
+    a single row result from a wrong one.
+
+    The trigger fires one event with a "status" of "success", "timeout" or
+    "error" and the "results" of the queries that completed, a mapping of
+    each query name to its only row.
+
+    :param queries: mapping of a query name to a (conn_id, sql, width) tuple,
+        width being the number of columns of the single row the query returns
+    :type queries: dict
+    :param poll_interval: seconds between polls of a running Hive query
+    :type poll_interval: float
+    :param timeout: (optional) seconds the queries may run
+    :type timeout: float
+    """
+
+    def __init__(self, queries, poll_interval=5, timeout=None):
+        super().__init__()
+        self.queries = {name: tuple(query) for name, query in queries.items()}
+        self.poll_interval = poll_interval
+        self.timeout = timeout
+
+    def serialize(self):
+        return ("data_quality_trigger.DataQualityQueryTrigger", {
+            "queries" : self.queries,
+            "poll_interval" : self.poll_interval,
+            "timeout" : self.timeout
+        })
+
+    async def run(self):
+        tasks = {
+            name: asyncio.ensure_future(self.run_query(conn_id, sql, width))
+            for name, (conn_id, sql, width) in self.queries.items()
+        }
+        done, pending = await asyncio.wait(tasks.values(), timeout=self.timeout)
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.wait(pending)
+
+        results, errors = {}, []
+        for name, task in tasks.items():
+            if task in done:
+                if task.exception() is None:
+                    results[name] = task.result()
+                else:
+                    errors.append(f"""Query "{name}" failed: {task.exception()}""")
+        if errors:
+            yield TriggerEvent({"status": "error", "message": "\n".join(errors), "results": results})
+        elif pending:
+            yield TriggerEvent({
+                "status": "timeout",
+                "message": f"Queries exceeded their timeout of {self.timeout} seconds",
+                "results": results
+            })
+        else:
+            yield TriggerEvent({"status": "success", "results": results})
+
+    async def run_query(self, conn_id, sql, width):
+        loop = asyncio.get_event_loop()
+        conn_type = (await loop.run_in_executor(None, hook_cache.get_connection, conn_id)).conn_type
+        if conn_type == "postgres":
+            rows = await _run_postgres(conn_id, sql, self.timeout)
+        elif conn_type == "hive":
+            rows = await _run_hive(conn_id, sql, self.poll_interval, self.timeout)
+        else:
+            rows = await loop.run_in_executor(None, _get_records_within, conn_id, sql, self.timeout)
+        return [_to_event_value(value) for value in _check_result(rows, width)]
+
+class DeferrableCheckMixin:
+    """
+    DeferrableCheckMixin lets a data quality operator hand the queries of its
+    check to a DataQualityQueryTrigger. Where Airflow supports deferral (2.2
+    and later) the task is deferred to the triggerer and resumes in
+    execute_complete(); on older versions the trigger runs in-process and
+    execute_complete() is called with its event right away. Operators provide
+    get_queries(), the queries of the check with the check query named "sql".
+    """
+
+    def defer_queries(self, context):
+        trigger = DataQualityQueryTrigger(
+            self.get_queries(),
+            poll_interval=self.poll_interval,
+            timeout=self.query_timeout)
+        if hasattr(self, "defer"):
+            self.defer(trigger=trigger, method_name="execute_complete")
+        return self.execute_complete(context, run_trigger(trigger))
+
+    def get_trigger_results(self, context, event):
+        """
+        Returns the query results of a trigger event. Raises on failed
+        queries. A check query that timed out is replaced by fallback_sql if
+        given, otherwise the timeout outcome is pushed and the task fails.
+        """
+        self.result_info = {}
+        if event["status"] == "error":
+            raise AirflowException(event["message"])
+        results = dict(event["results"])
+        if event["status"] == "timeout":
+            self.result_info["timed_out"] = True
+            if self.fallback_sql is None or set(self.get_queries()) - set(results) != {"sql"}:
+                self.fail_on_timeout(context, QueryTimeout(event["message"]))
+            logging.info("Check %s timed out, evaluating fallback sql", self.task_id)
+            self.result_info["fallback"] = True
+            with statement_timeout(self.query_timeout):
+                results["sql"] = [get_sql_value(self.conn_id, self.fallback_sql)]
+        return results
+
+def run_trigger(trigger):
+    """Runs trigger in a new event loop of the current thread and returns the payload of its event."""
+    loop = asyncio.new_event_loop()
+    try:
+        event = loop.run_until_complete(trigger.run().__anext__())
+    finally:
+        loop.close()
+    return event.payload
+
+def _get_records_within(conn_id, sql, timeout):
+    with statement_timeout(timeout):
+        return _get_records(conn_id, sql)
+
+def _to_event_value(value):
+    """Converts a query result into a value trigger events can be serialized with."""
+    if isinstance(value, decimal.Decimal):
+        return float(value)
+    return _to_json_value(value)
+
+async def _run_postgres(conn_id, sql, timeout):
+    import psycopg2
+    loop = asyncio.get_event_loop()
+    conn_args = await loop.run_in_executor(None, _postgres_conn_args, conn_id)
+    conn = psycopg2.connect(async_=1, **conn_args)
+    try:
+        await _wait_postgres(conn)
+        cursor = conn.cursor()
+        if timeout is not None:
+            # async connections are in autocommit, so this applies to the connection
+            cursor.execute(f"SET statement_timeout = {int(timeout * 1000)}")
+            await _wait_postgres(conn)
+        cursor.execute(_limit_rows(sql, 2))
+        await _wait_postgres(conn)
+        return cursor.fetchmany(2)
+    except asyncio.CancelledError:
+        conn.cancel()
+        raise
+    finally:
+        conn.close()
+
+def _postgres_conn_args(conn_id):
+    """
+    Returns the psycopg2 connection arguments of conn_id as PostgresHook
+    builds them (schema, ssl extras, IAM tokens), from the Airflow
+    Connection of the hook_cache without opening a database connection.
+    """
+    _, hook = _resolve_hook(conn_id)
+    connection = hook_cache.get_connection(conn_id)
+    extra = connection.extra_dejson
+    login, password, port = connection.login, connection.password, connection.port
+    if extra.get("iam", False):
+        login, password, port = hook.get_iam_token(connection)
+    conn_args = {
+        "host" : connection.host,
+        "user" : login,
+        "password" : password,
+        "dbname" : getattr(hook, "schema", None) or connection.schema,
+        "port" : port
+    }
+    conn_args.update((name, value) for name, value in extra.items() if name in POSTGRES_EXTRA_ARGS)
+    return {name: value for name, value in conn_args.items() if value is not None}
+
+def _limit_rows(sql, max_rows):
+    """
+    Wraps a single SELECT in a LIMIT of max_rows, as asynchronous psycopg2
+    connections have no server-side cursors and receive every row of the
+    result. Other statements are returned unchanged.
+    """
+    if not _is_single_select(sql):
+        return sql
+    statement = _SQL_COMMENTS.sub(" ", sql).strip().rstrip(";")
+    return f"SELECT * FROM ({statement}) AS data_quality_query LIMIT {max_rows}"
+
+async def _wait_postgres(conn):
+    """Waits without blocking until the pending operation of an async psycopg2 connection completes."""
+    from psycopg2.extensions import POLL_OK, POLL_READ
+    loop = asyncio.get_event_loop()
+    while True:
+        state = conn.poll()
+        if state == POLL_OK:
+            return
+        ready = loop.create_future()
+        fileno = conn.fileno()
+        if state == POLL_READ:
+            loop.add_reader(fileno, lambda: ready.done() or ready.set_result(None))
+            remove = loop.remove_reader
+        else:
+            loop.add_writer(fileno, lambda: ready.done() or ready.set_result(None))
+            remove = loop.remove_writer
+        try:
+            await ready
+        finally:
+            remove(fileno)
+
+async def _run_hive(conn_id, sql, poll_interval, timeout):
+    from TCLIService.ttypes import TOperationState
+    running = (TOperationState.INITIALIZED_STATE, TOperationState.PENDING_STATE, TOperationState.RUNNING_STATE)
+    loop = asyncio.get_event_loop()
+    # resolving the hook may query the metadata database, so it runs off the event loop too
+    conn = await loop.run_in_executor(None, lambda: _get_hook(conn_id).get_conn())
+    cursor = conn.cursor()
+    try:
+        if timeout is not None:
+            await loop.run_in_executor(None, cursor.execute, f"SET hive.query.timeout.seconds={int(timeout)}s")
+        await loop.run_in_executor(None, partial(cursor.execute, sql, async_=True))
+        while (await loop.run_in_executor(None, cursor.poll)).operationState in running:
+            await asyncio.sleep(poll_interval)
+        return await loop.run_in_executor(None, cursor.fetchmany, 2)
+    except asyncio.CancelledError:
+        cursor.cancel()
+        raise
+    finally:
+        cursor.close()
+        conn.close()
@@ -0,0 +1,15 @@
+import pytest
+
+from plugins.base_data_quality_operator import hook_cache
+
+@pytest.fixture(autouse=True)
+def clear_hook_cache():
+    '''Starts every test with an empty hook cache, as tests patch connections and hooks'''
+    hook_cache.clear()
+    yield
+    hook_cache.clear()
+
+@pytest.fixture
+def disable_hook_cache(monkeypatch):
+    '''Resolves a fresh hook per query, for tests counting connections or hooks'''
+    monkeypatch.setenv("AIRFLOW__DATA_QUALITY__HOOK_CACHE", "False")
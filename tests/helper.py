@@ -37,6 +37,49 @@ def get_records_mock(sql):
 
     return result
 
+class MockCursor:
+    '''DB-API cursor whose queries are answered by get_records()'''
+    def __init__(self, get_records):
+        self.get_records = get_records
+        self.rows = []
+
+    def execute(self, sql, parameters=None):
+        self.rows = list(self.get_records(sql))
+
+    def fetchall(self):
+        rows, self.rows = self.rows, []
+        return rows
+
+    def fetchmany(self, size=1):
+        rows, self.rows = self.rows[:size], self.rows[size:]
+        return rows
+
+    def close(self):
+        pass
+
+class MockConnection:
+    '''DB-API connection handing out MockCursor objects, by default answered by get_records_mock()'''
+    def __init__(self, get_records=get_records_mock):
+        self.get_records = get_records
+        self.cursor_calls = []
+
+    def cursor(self, *args, **kwargs):
+        self.cursor_calls.append((args, kwargs))
+        return MockCursor(self.get_records)
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+def get_conn_mock():
+    '''Mock function to replace get_conn() with unit test mocker'''
+    return MockConnection()
+
 dummy_dag = DAG(
     "test_dag",
     default_args={
@@ -1,5 +1,5 @@
 import datetime
-from unittest.mock import Mock
+from unittest.mock import Mock, MagicMock
 from unittest.mock import patch
 import pendulum
 import pytest
@@ -11,14 +11,15 @@ from airflow.hooks.mysql_hook import MySqlHook
 from airflow.hooks.hive_hooks import HiveServer2Hook
 from airflow.models import Connection
 
-from plugins.base_data_quality_operator import BaseDataQualityOperator, get_sql_value
+from plugins.base_data_quality_operator import BaseDataQualityOperator, get_sql_value, get_sql_row
+from .helper import MockConnection
 
 
 def test_get_sql_value_one_result(mocker):
     mocker.patch.object(
         PostgresHook,
-        "get_records",
-        return_value=[(10,)]
+        "get_conn",
+        return_value=MockConnection(lambda sql: [(10,)])
     )
 
     mocker.patch.object(
@@ -43,8 +44,8 @@ def test_get_sql_value_one_result(mocker):
 def test_get_sql_value_not_one_result(mocker):
     mocker.patch.object(
         HiveServer2Hook,
-        "get_records",
-        return_value=[(10,), (100,)]
+        "get_conn",
+        return_value=MockConnection(lambda sql: [(10,), (100,)])
     )
 
     mocker.patch.object(
@@ -68,8 +69,8 @@ def test_get_sql_value_not_one_result(mocker):
 def test_get_sql_value_no_result(mocker):
     mocker.patch.object(
         MySqlHook,
-        "get_records",
-        return_value=[]
+        "get_conn",
+        return_value=MockConnection(lambda sql: [])
     )
 
     mocker.patch.object(
@@ -93,8 +94,8 @@ def test_get_sql_value_no_result(mocker):
 def test_get_sql_value_multiple_results(mocker):
     mocker.patch.object(
         MySqlHook,
-        "get_records",
-        return_value=[(10, "bad value")]
+        "get_conn",
+        return_value=MockConnection(lambda sql: [(10, "bad value")])
     )
 
     mocker.patch.object(
@@ -114,3 +115,96 @@ def test_get_sql_value_multiple_results(mocker):
             conn_id=task.conn_id,
             sql=task.sql
         )
+
+def test_get_sql_row_fixed_width(mocker):
+    mocker.patch.object(
+        PostgresHook,
+        "get_conn",
+        return_value=MockConnection(lambda sql: [(10, 20)])
+    )
+
+    mocker.patch.object(
+        BaseHook,
+        "get_connection",
+        return_value=Connection(conn_id='test_id',conn_type='postgres')
+    )
+
+    assert get_sql_row(conn_id='test_id', sql='SELECT MIN(value), MAX(value) FROM test;', width=2) == (10, 20)
+
+    with pytest.raises(ValueError):
+        get_sql_row(conn_id='test_id', sql='SELECT MIN(value), MAX(value) FROM test;', width=3)
+
+def test_get_sql_value_bounded_fetch(mocker):
+    conn = MagicMock()
+    cursor = conn.cursor.return_value
+    cursor.fetchmany.return_value = [(10,), (100,)]
+
+    mocker.patch.object(
+        PostgresHook,
+        "get_conn",
+        return_value=conn
+    )
+
+    mocker.patch.object(
+        BaseHook,
+        "get_connection",
+        return_value=Connection(conn_id='test_id',conn_type='postgres')
+    )
+
+    with pytest.raises(ValueError):
+        get_sql_value(conn_id='test_id', sql='SELECT value FROM test;')
+
+    assert "name" in conn.cursor.call_args[1]
+    cursor.fetchmany.assert_called_once_with(2)
+    assert not cursor.fetchall.called
+    assert cursor.close.called
+
+def test_get_sql_value_discards_unread_mysql_stream(mocker):
+    conn = MagicMock()
+    cursor = conn.cursor.return_value
+    cursor.fetchmany.return_value = [(10,), (100,)]
+
+    mocker.patch.object(
+        MySqlHook,
+        "get_conn",
+        return_value=conn
+    )
+
+    mocker.patch.object(
+        BaseHook,
+        "get_connection",
+        return_value=Connection(conn_id='test_id',conn_type='mysql')
+    )
+
+    with pytest.raises(ValueError):
+        get_sql_value(conn_id='test_id', sql='SELECT value FROM test;')
+
+    # closing the SSCursor would read every row left, the connection is closed instead
+    assert not cursor.close.called
+    assert conn.close.called
+
+    cursor.fetchmany.return_value = [(10,)]
+    assert get_sql_value(conn_id='test_id', sql='SELECT value FROM test;') == 10
+    assert cursor.close.called
+
+def test_get_sql_value_plain_cursor_for_other_statements(mocker):
+    conn = MagicMock()
+    conn.cursor.return_value.fetchmany.return_value = [(10,)]
+
+    mocker.patch.object(
+        PostgresHook,
+        "get_conn",
+        return_value=conn
+    )
+
+    mocker.patch.object(
+        BaseHook,
+        "get_connection",
+        return_value=Connection(conn_id='test_id',conn_type='postgres')
+    )
+
+    get_sql_value(conn_id='test_id', sql='SET search_path TO dq; SELECT COUNT(1) FROM test;')
+    assert "name" not in conn.cursor.call_args[1]
+
+    get_sql_value(conn_id='test_id', sql='-- row count\nSELECT COUNT(1) FROM test;')
+    assert "name" in conn.cursor.call_args[1]
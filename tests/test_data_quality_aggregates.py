@@ -0,0 +1,43 @@
+import math
+import statistics
+import pytest
+
+from plugins.data_quality_aggregates import AggregateState
+
+VALUES = [12.0, 200.0, 3.5, 41.0, 7.25]
+
+def state_of(values):
+    return AggregateState.from_row((
+        len(values),
+        sum(values) if values else None,
+        sum(value * value for value in values) if values else None,
+        min(values) if values else None,
+        max(values) if values else None
+    ))
+
+def test_merged_state_equals_state_of_union():
+    state = state_of(VALUES[:2]).merge(state_of([])).merge(state_of(VALUES[2:]))
+
+    assert state.value("count") == len(VALUES)
+    assert state.value("sum") == sum(VALUES)
+    assert state.value("avg") == statistics.mean(VALUES)
+    assert state.value("min") == min(VALUES)
+    assert state.value("max") == max(VALUES)
+    assert math.isclose(state.value("stddev"), statistics.stdev(VALUES))
+
+def test_state_round_trip():
+    state = state_of(VALUES)
+
+    assert AggregateState.from_dict(state.to_dict()).to_dict() == state.to_dict()
+
+def test_empty_state():
+    state = state_of([])
+
+    assert state.value("count") == 0
+    with pytest.raises(ValueError):
+        state.value("avg")
+
+def test_squares_summed_as_doubles():
+    assert "SUM(CAST(value AS DOUBLE PRECISION) * value)" in AggregateState.select_expressions("value", "postgres")
+    assert "SUM((value * 1e0) * value)" in AggregateState.select_expressions("value", "mysql")
+    assert "SUM(CAST(value AS DOUBLE) * value)" in AggregateState.select_expressions("value", "hive")
@@ -0,0 +1,150 @@
+import sys
+from datetime import datetime
+from unittest.mock import Mock, patch
+
+import pytest
+
+from airflow import AirflowException
+from airflow.hooks.base_hook import BaseHook
+from airflow.hooks.postgres_hook import PostgresHook
+from airflow.operators.data_quality_batch_check_operator import DataQualityBatchCheckOperator
+from airflow.models import Connection, TaskInstance
+
+from .helper import get_conn_mock, MockConnection, dummy_dag
+
+def test_inside_threshold_fused(mocker):
+    checks = [
+        {"check_name": "min_value", "sql": "MIN(value)", "min_threshold": 10, "max_threshold": 15},
+        {"check_name": "max_value", "sql": "MAX(value)", "min_threshold": 100, "max_threshold": 250},
+        {"check_name": "row_count", "sql": "COUNT(1)", "min_threshold": 2, "max_threshold": 2},
+    ]
+
+    conn_mock = mocker.patch.object(
+        PostgresHook,
+        "get_conn",
+        side_effect=get_conn_mock,
+    )
+
+    mocker.patch.object(
+        BaseHook,
+        "get_connection",
+        return_value=Connection(conn_id='test_id', conn_type='postgres')
+    )
+
+    task = DataQualityBatchCheckOperator(
+        task_id="test_inside_threshold_fused",
+        conn_id="test_id",
+        table="test",
+        checks=checks,
+        dag=dummy_dag
+    )
+    task.push = Mock(return_value=None)
+    task_instance = TaskInstance(task=task, execution_date=datetime.now())
+    result = task.execute(task_instance.get_template_context())
+
+    assert conn_mock.call_count == 1
+    assert [info_dict["check_name"] for info_dict in result] == ["min_value", "max_value", "row_count"]
+    assert all(info_dict["within_threshold"] for info_dict in result)
+    assert task.push.call_count == 3
+
+
+def test_outside_threshold_session(mocker):
+    checks = [
+        {"check_name": "min_value", "sql": "SELECT MIN(value) FROM test;", "min_threshold": 10, "max_threshold": 15},
+        {"check_name": "avg_cost", "sql": "SELECT AVG(cost) FROM price;", "min_threshold": 50, "max_threshold": 75},
+    ]
+
+    conn_mock = mocker.patch.object(
+        PostgresHook,
+        "get_conn",
+        side_effect=get_conn_mock,
+    )
+
+    mocker.patch.object(
+        BaseHook,
+        "get_connection",
+        return_value=Connection(conn_id='test_id', conn_type='postgres')
+    )
+
+    task = DataQualityBatchCheckOperator(
+        task_id="test_outside_threshold_session",
+        conn_id="test_id",
+        checks=checks,
+        dag=dummy_dag
+    )
+    task.push = Mock(return_value=None)
+    task_instance = TaskInstance(task=task, execution_date=datetime.now())
+
+    mock_patch = patch.object(
+        DataQualityBatchCheckOperator,
+        "send_failure_notification",
+        side_effect=lambda info_dicts: info_dicts)
+
+    with mock_patch as notif_mock:
+        result = task.execute(task_instance.get_template_context())
+
+    assert conn_mock.call_count == 1
+    assert notif_mock.called
+    assert [info_dict["check_name"] for info_dict in notif_mock.call_args[0][0]] == ["avg_cost"]
+    assert result[0]["within_threshold"]
+    assert not result[1]["within_threshold"]
+
+def test_null_result_outside_thresholds(mocker):
+    checks = [
+        {"check_name": "avg_cost", "sql": "SELECT AVG(cost) FROM empty;", "min_threshold": 0, "max_threshold": 10},
+    ]
+    mocker.patch.object(
+        PostgresHook,
+        "get_conn",
+        side_effect=lambda: MockConnection(lambda sql: [(None,)]),
+    )
+    mocker.patch.object(
+        BaseHook,
+        "get_connection",
+        return_value=Connection(conn_id='test_id', conn_type='postgres')
+    )
+
+    task = DataQualityBatchCheckOperator(
+        task_id="test_null_result_outside_thresholds",
+        conn_id="test_id",
+        checks=checks,
+        dag=dummy_dag
+    )
+    task.push = Mock(return_value=None)
+
+    with pytest.raises(AirflowException, match="Result: NULL"):
+        task.execute({"execution_date": datetime.now(), "ti": Mock()})
+    assert not task.push.call_args[0][0]["within_threshold"]
+
+def test_timeout_pushed_for_every_check(mocker):
+    checks = [
+        {"check_name": "min_value", "sql": "SELECT MIN(value) FROM test;", "min_threshold": 10, "max_threshold": 15},
+        {"check_name": "row_count", "sql": "SELECT COUNT(1) FROM test;", "min_threshold": 2, "max_threshold": 2},
+    ]
+    module = sys.modules[DataQualityBatchCheckOperator.__module__]
+    mocker.patch.object(module, "get_sql_values", side_effect=module.QueryTimeout("canceling statement"))
+
+    task = DataQualityBatchCheckOperator(
+        task_id="test_timeout_pushed_for_every_check",
+        conn_id="test_id",
+        checks=checks,
+        query_timeout=1,
+        dag=dummy_dag
+    )
+    task.push = Mock(return_value=None)
+
+    with pytest.raises(AirflowException, match="timed out"):
+        task.execute({"execution_date": datetime.now()})
+    pushed = [call[0][0] for call in task.push.call_args_list]
+    assert [info_dict["check_name"] for info_dict in pushed] == ["min_value", "row_count"]
+    assert all(info_dict["timed_out"] and not info_dict["within_threshold"] for info_dict in pushed)
+
+def test_unsupported_options_rejected():
+    with pytest.raises(ValueError, match="partitioned"):
+        DataQualityBatchCheckOperator(
+            task_id="test_unsupported_options_rejected",
+            conn_id="test_id",
+            checks=[],
+            partitioned={"table": "t", "column": "c", "aggregate": "sum", "partition_column": "id"},
+            dag=dummy_dag
+        )
@@ -0,0 +1,61 @@
+from unittest.mock import Mock
+import pytest
+
+from plugins import data_quality_check_scheduler
+from plugins.data_quality_check_scheduler import (chain_checks, get_cached_task_runtimes, plan_checks,
+                                                  refresh_task_runtimes)
+from plugins.data_quality_config_loader import recursive_make_defaultdict
+
+def make_configs(*configs):
+    return [recursive_make_defaultdict(conf) for conf in configs]
+
+def names(tiers):
+    return [[conf["test_name"] for conf in tier] for tier in tiers]
+
+def test_plan_checks_tiers_and_runtimes():
+    configs = make_configs(
+        {"test_name": "distribution", "depends_on": ["row_count"]},
+        {"test_name": "null_rate", "estimated_runtime": 30},
+        {"test_name": "row_count"},
+        {"test_name": "freshness", "tier": 0, "estimated_runtime": 60},
+        {"test_name": "revenue", "tier": 2}
+    )
+
+    tiers = plan_checks(configs, runtimes={"row_count": 1.5, "null_rate": 90})
+
+    assert names(tiers) == [["row_count", "freshness", "null_rate"], ["distribution"], ["revenue"]]
+
+def test_plan_checks_rejects_bad_dependencies():
+    with pytest.raises(ValueError, match="unknown checks"):
+        plan_checks(make_configs({"test_name": "a", "depends_on": ["b"]}))
+    with pytest.raises(ValueError, match="cycle"):
+        plan_checks(make_configs(
+            {"test_name": "a", "depends_on": ["b"]},
+            {"test_name": "b", "depends_on": ["a"]}))
+
+def test_chain_checks():
+    configs = make_configs(
+        {"test_name": "row_count", "estimated_runtime": 1},
+        {"test_name": "null_rate", "estimated_runtime": 10},
+        {"test_name": "distribution", "depends_on": ["row_count"]}
+    )
+    tasks = {conf["test_name"]: Mock() for conf in configs}
+
+    tiers = chain_checks(tasks, configs)
+
+    assert tiers == [[tasks["row_count"], tasks["null_rate"]], [tasks["distribution"]]]
+    assert tasks["row_count"].priority_weight > tasks["null_rate"].priority_weight
+    tasks["row_count"].set_upstream.assert_called_once_with([])
+    tasks["distribution"].set_upstream.assert_called_once_with([tasks["row_count"], tasks["null_rate"]])
+
+def test_cached_task_runtimes(mocker):
+    get_task_runtimes = mocker.patch.object(
+        data_quality_check_scheduler, "get_task_runtimes", return_value={"row_count": 1.5})
+
+    assert get_cached_task_runtimes("test_cached_task_runtimes") == {}
+    assert refresh_task_runtimes("test_cached_task_runtimes") == {"row_count": 1.5}
+    assert get_cached_task_runtimes("test_cached_task_runtimes") == {"row_count": 1.5}
+    get_task_runtimes.assert_called_once_with("test_cached_task_runtimes", 30)
+
+    mocker.patch.object(data_quality_check_scheduler.Variable, "get", side_effect=Exception("no database"))
+    assert get_cached_task_runtimes("test_cached_task_runtimes") == {}
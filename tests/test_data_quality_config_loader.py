@@ -0,0 +1,68 @@
+from pathlib import Path
+import datetime
+import json
+import os
+import shutil
+import tempfile
+import yaml
+
+from plugins.data_quality_config_loader import ConfigLoader
+
+YAML_PATH = Path(__file__).parents[0] / "configs" / "yaml_configs"
+
+def copy_configs(tmp_path):
+    yaml_dir = tmp_path / "yaml_configs"
+    shutil.copytree(str(YAML_PATH), str(yaml_dir))
+    return yaml_dir
+
+def test_load_configs(tmp_path):
+    yaml_dir = copy_configs(tmp_path)
+    configs = ConfigLoader(cache_dir=str(tmp_path / "cache")).load(yaml_dir)
+
+    assert len(configs) == len(list(YAML_PATH.glob("*.yaml")))
+    conf = [conf for conf in configs if conf["test_name"] == "test_inside_threshold_values"][0]
+    assert conf["threshold"]["min_threshold"] == 10
+    assert conf["threshold"]["min_threshold_sql"] is None
+    assert conf["push_conn_id"] is None
+
+def test_only_changed_configs_are_parsed(mocker, tmp_path):
+    yaml_dir = copy_configs(tmp_path)
+    cache_dir = str(tmp_path / "cache")
+    ConfigLoader(cache_dir=cache_dir).load(yaml_dir)
+
+    changed_path = yaml_dir / "test_inside_threshold_values.yaml"
+    changed_path.write_text(changed_path.read_text().replace("max_threshold: 15", "max_threshold: 16"))
+    os.remove(str(yaml_dir / "test_outside_threshold_values.yaml"))
+
+    load_mock = mocker.patch.object(yaml, "load", side_effect=yaml.load)
+    loader = ConfigLoader(cache_dir=cache_dir)
+    configs = loader.load(yaml_dir)
+
+    assert load_mock.call_count == 1
+    assert loader.stats["parsed"] == 1
+    assert loader.stats["cached"] == len(configs) - 1
+    conf = [conf for conf in configs if conf["test_name"] == "test_inside_threshold_values"][0]
+    assert conf["threshold"]["max_threshold"] == 16
+    assert "test_outside_threshold_values" not in [conf["test_name"] for conf in configs]
+
+def test_config_cache_is_json(tmp_path):
+    yaml_dir = tmp_path / "yaml_configs"
+    yaml_dir.mkdir()
+    (yaml_dir / "dated.yaml").write_text("test_name: dated\nstart_date: 2020-01-01\n")
+    cache_dir = tmp_path / "cache"
+    ConfigLoader(cache_dir=str(cache_dir)).load(yaml_dir)
+
+    cache_files = list(cache_dir.glob("*.json"))
+    assert len(cache_files) == 1
+    json.loads(cache_files[0].read_text())
+
+    configs = ConfigLoader(cache_dir=str(cache_dir)).load(yaml_dir)
+    assert configs[0]["start_date"] == datetime.date(2020, 1, 1)
+
+def test_failed_cache_write_does_not_fail_load(mocker, tmp_path):
+    yaml_dir = copy_configs(tmp_path)
+    mocker.patch.object(tempfile, "mkstemp", side_effect=PermissionError("read-only cache directory"))
+
+    configs = ConfigLoader(cache_dir=str(tmp_path / "cache")).load(yaml_dir)
+
+    assert len(configs) == len(list(YAML_PATH.glob("*.yaml")))
@@ -0,0 +1,115 @@
+from datetime import datetime
+from unittest.mock import Mock
+import numpy as np
+import pytest
+
+from airflow import AirflowException
+from airflow.operators.data_quality_dataframe_check_operator import DataQualityDataFrameCheckOperator
+
+from plugins.data_quality_dataframe_check_operator import compute_metrics
+from .helper import dummy_dag
+
+def load_prices():
+    return {
+        "id" : np.array([1, 2, 3, 4]),
+        "cost" : np.array([10.0, np.nan, 30.0, 20.0]),
+        "name" : np.array(["a", None, "b", "a"], dtype=object)
+    }
+
+def test_compute_metrics():
+    results = compute_metrics(load_prices(), [
+        "row_count", "cost.null_count", "cost.min", "cost.max", "cost.mean",
+        "cost.sum", "name.null_count", "name.distinct_count", "id.distinct_count"
+    ])
+
+    assert results == [4, 1, 10.0, 30.0, 20.0, 60.0, 1, 2, 4]
+    assert all(type(result) in (int, float) for result in results)
+
+def test_dataframe_check_within_thresholds():
+    task = DataQualityDataFrameCheckOperator(
+        task_id="test_dataframe_check_within_thresholds",
+        data=load_prices,
+        thresholds={"row_count": (1, None), "cost.mean": (15, 25), "cost.null_count": (None, None)},
+        dag=dummy_dag
+    )
+    task.push = Mock(return_value=None)
+    result = task.execute(context={"execution_date": datetime.now()})
+
+    assert [info_dict["check_name"] for info_dict in result] == ["row_count", "cost.mean", "cost.null_count"]
+    assert [info_dict["result"] for info_dict in result] == [4, 20.0, 1]
+    assert all(info_dict["within_threshold"] for info_dict in result)
+    assert task.push.call_count == 3
+
+def test_dataframe_check_outside_thresholds():
+    task = DataQualityDataFrameCheckOperator(
+        task_id="test_dataframe_check_outside_thresholds",
+        data=load_prices,
+        thresholds={"cost.null_count": (None, 0), "cost.max": (0, 100), "name.distinct_count": (0, 1)},
+        dag=dummy_dag
+    )
+    task.push = Mock(return_value=None)
+
+    with pytest.raises(AirflowException) as error:
+        task.execute(context={"execution_date": datetime.now(), "ti": Mock()})
+    assert "failed 2 of 3 checks" in str(error.value)
+    assert "cost.null_count" in str(error.value)
+    assert "name.distinct_count" in str(error.value)
+
+def test_dataframe_check_unknown_metric():
+    with pytest.raises(ValueError):
+        DataQualityDataFrameCheckOperator(
+            task_id="test_dataframe_check_unknown_metric",
+            data=load_prices,
+            thresholds={"cost.median": (0, 1)},
+            dag=dummy_dag
+        )
+
+def test_dataframe_check_on_pandas_csv(tmp_path):
+    pytest.importorskip("pandas")
+    path = tmp_path / "prices.csv"
+    path.write_text("id,cost\n1,10\n2,\n3,30\n")
+    task = DataQualityDataFrameCheckOperator(
+        task_id="test_dataframe_check_on_pandas_csv",
+        data=str(path),
+        thresholds={"row_count": (3, 3), "cost.null_count": (1, 1), "cost.sum": (40, 40)},
+        dag=dummy_dag
+    )
+    task.push = Mock(return_value=None)
+    result = task.execute(context={"execution_date": datetime.now()})
+
+    assert all(info_dict["within_threshold"] for info_dict in result)
+
+def test_dataframe_check_non_numeric_min_max():
+    task = DataQualityDataFrameCheckOperator(
+        task_id="test_dataframe_check_non_numeric_min_max",
+        data=load_prices,
+        thresholds={"name.min": (None, None), "name.max": (None, None)},
+        dag=dummy_dag
+    )
+    task.push = Mock(return_value=None)
+    result = task.execute(context={"execution_date": datetime.now()})
+
+    assert [info_dict["result"] for info_dict in result] == ["a", "b"]
+    assert all(info_dict["within_threshold"] for info_dict in result)
+
+def test_compute_metrics_pandas_na():
+    pd = pytest.importorskip("pandas")
+    data = pd.DataFrame({"count": pd.array([1, None, 3], dtype="Int64")})
+
+    assert compute_metrics(data, ["count.null_count", "count.sum"]) == [1, 4]
+
+@pytest.mark.parametrize("option, value", [
+    ("query_timeout", 10),
+    ("incremental", {"table": "t", "column": "c", "aggregate": "avg", "watermark_column": "w"}),
+    ("fallback_sql", "SELECT 1;"),
+    ("preflight", {"max_rows": 1000}),
+])
+def test_dataframe_check_unsupported_options_rejected(option, value):
+    with pytest.raises(ValueError, match=option):
+        DataQualityDataFrameCheckOperator(
+            task_id="test_dataframe_check_unsupported_options_rejected",
+            data=load_prices,
+            thresholds={"row_count": (1, None)},
+            dag=dummy_dag,
+            **{option: value}
+        )
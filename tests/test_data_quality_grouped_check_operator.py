@@ -0,0 +1,114 @@
+from datetime import datetime
+from unittest.mock import Mock
+import pytest
+
+from airflow import AirflowException
+from airflow.hooks.base_hook import BaseHook
+from airflow.hooks.postgres_hook import PostgresHook
+from airflow.operators.data_quality_grouped_check_operator import DataQualityGroupedCheckOperator
+from airflow.models import Connection
+
+from .helper import MockConnection, dummy_dag
+
+GROUP_SQL = "SELECT region, SUM(cost) FROM costs GROUP BY region"
+THRESHOLD_SQL = "SELECT region, min_cost, max_cost FROM cost_thresholds"
+
+def mock_groups(mocker, rows, threshold_rows=()):
+    queries = []
+
+    def get_records(sql):
+        queries.append(sql)
+        return threshold_rows if sql == THRESHOLD_SQL else rows
+
+    mocker.patch.object(
+        PostgresHook,
+        "get_conn",
+        side_effect=lambda: MockConnection(get_records),
+    )
+    mocker.patch.object(
+        BaseHook,
+        "get_connection",
+        return_value=Connection(conn_id='test_id', conn_type='postgres')
+    )
+    return queries
+
+def test_grouped_check_global_and_group_thresholds(mocker):
+    queries = mock_groups(mocker, [("east", 10), ("west", 50), ("north", 500)])
+
+    task = DataQualityGroupedCheckOperator(
+        task_id="test_grouped_check_global_and_group_thresholds",
+        conn_id="test_id",
+        sql=GROUP_SQL,
+        min_threshold=0,
+        max_threshold=100,
+        thresholds={"north": (400, 600)},
+        dag=dummy_dag
+    )
+    task.push = Mock(return_value=None)
+    result = task.execute(context={"execution_date": datetime.now()})
+
+    assert queries == [GROUP_SQL]
+    assert result["groups"] == 3
+    assert result["within_threshold"]
+    assert result["failed_groups"] == []
+    pushed = [call[0][0] for call in task.push.call_args_list]
+    assert [info_dict["check_name"] for info_dict in pushed] == ["east", "west", "north"]
+    assert pushed[2]["min_threshold"] == 400
+
+def test_grouped_check_threshold_sql_reports_failing_groups(mocker):
+    mock_groups(
+        mocker,
+        [("east", 10), ("west", 50), ("north", None), ("south", 5)],
+        [("east", 20, 30), ("west", 40, 60), ("north", 0, 10)])
+
+    task = DataQualityGroupedCheckOperator(
+        task_id="test_grouped_check_threshold_sql_reports_failing_groups",
+        conn_id="test_id",
+        sql=GROUP_SQL,
+        threshold_sql=THRESHOLD_SQL,
+        max_reported_groups=1,
+        dag=dummy_dag
+    )
+    task.push = Mock(return_value=None)
+    ti = Mock()
+
+    with pytest.raises(AirflowException) as error:
+        task.execute(context={"execution_date": datetime.now(), "ti": ti})
+
+    group_dict = ti.xcom_push.call_args[1]["value"]
+    assert [group["check_name"] for group in group_dict["failed_groups"]] == ["east", "north"]
+    assert "failed 2 of 4 groups" in str(error.value)
+    assert 'Group "east"' in str(error.value)
+    assert 'Group "north"' not in str(error.value)
+    assert "and 1 more groups" in str(error.value)
+
+def test_grouped_check_too_many_groups(mocker):
+    mock_groups(mocker, [("east", 10), ("west", 50), ("north", 500)])
+
+    task = DataQualityGroupedCheckOperator(
+        task_id="test_grouped_check_too_many_groups",
+        conn_id="test_id",
+        sql=GROUP_SQL,
+        max_groups=2,
+        dag=dummy_dag
+    )
+    task.push = Mock(return_value=None)
+
+    with pytest.raises(AirflowException, match="more than 2 groups"):
+        task.execute(context={"execution_date": datetime.now()})
+
+@pytest.mark.parametrize("option, value", [
+    ("incremental", {"table": "t", "column": "c", "aggregate": "avg", "watermark_column": "w"}),
+    ("partitioned", {"table": "t", "column": "c", "aggregate": "sum", "partition_column": "id"}),
+    ("fallback_sql", "SELECT region, SUM(cost) FROM costs_sample GROUP BY region"),
+    ("preflight", {"max_rows": 1000}),
+])
+def test_grouped_check_unsupported_options_rejected(option, value):
+    with pytest.raises(ValueError, match=option):
+        DataQualityGroupedCheckOperator(
+            task_id="test_grouped_check_unsupported_options_rejected",
+            conn_id="postgres",
+            sql="SELECT region, SUM(cost) FROM costs GROUP BY region",
+            dag=dummy_dag,
+            **{option: value}
+        )
@@ -0,0 +1,82 @@
+from datetime import datetime, timedelta, timezone
+
+import os
+
+import numpy as np
+
+from plugins.data_quality_history_store import HistoryStore, to_datetime
+
+START = datetime(2020, 1, 1)
+
+def append_results(store, task_id, days, check_name=None, step=timedelta(hours=12)):
+    for day in range(days):
+        store.append("test_dag", {
+            "task_id": task_id,
+            "check_name": check_name,
+            "execution_date": START + step * day,
+            "result": day,
+            "min_threshold": 0,
+            "max_threshold": 100,
+            "within_threshold": True
+        })
+
+def test_last_results_across_partitions(tmp_path):
+    store = HistoryStore(directory=str(tmp_path), compact_rows=4)
+    append_results(store, "task_a", 10, step=timedelta(days=10))
+    append_results(store, "task_b", 10, check_name="row_count", step=timedelta(days=10))
+
+    assert sorted(path.name for path in (tmp_path / "test_dag").iterdir() if path.is_dir()) == \
+        ["2020-01", "2020-02", "2020-03"]
+    records = store.last("test_dag", "task_a", 3)
+    assert list(records["result"]) == [7, 8, 9]
+    assert to_datetime(records["execution_date"][-1]) == START + timedelta(days=90)
+    assert list(store.last("test_dag", "task_b", 2, check_name="row_count")["result"]) == [8, 9]
+    assert len(store.last("test_dag", "task_b", 2)) == 0
+    assert sorted(store.checks("test_dag")) == [("task_a", None), ("task_b", "row_count")]
+
+def test_before_and_timezones(tmp_path):
+    store = HistoryStore(directory=str(tmp_path))
+    append_results(store, "task_a", 6)
+
+    before = datetime(2020, 1, 2, 9, tzinfo=timezone(timedelta(hours=-3)))
+    assert list(store.last("test_dag", "task_a", 10, before=before)["result"]) == [0, 1, 2]
+
+def test_compaction_keeps_last_result_of_a_run(tmp_path):
+    store = HistoryStore(directory=str(tmp_path), compact_rows=1000)
+    append_results(store, "task_a", 4)
+    store.append("test_dag", {"task_id": "task_a", "execution_date": START, "result": 42})
+    store.compact("test_dag")
+
+    assert not (tmp_path / "test_dag" / "2020-01" / "append.bin").stat().st_size
+    records = store.last("test_dag", "task_a", 10)
+    assert list(records["result"]) == [42, 1, 2, 3]
+    assert np.isnan(records["min_threshold"][0])
+    assert records["within_threshold"][0] == -1
+
+def test_rollover_compacts_previous_partitions(tmp_path):
+    store = HistoryStore(directory=str(tmp_path), compact_rows=1000)
+    append_results(store, "task_a", 3)
+    assert (tmp_path / "test_dag" / "2020-01" / "append.bin").stat().st_size
+
+    store.append("test_dag", {"task_id": "task_a", "execution_date": datetime(2020, 2, 1), "result": 3})
+
+    assert not (tmp_path / "test_dag" / "2020-01" / "append.bin").stat().st_size
+    assert (tmp_path / "test_dag" / "2020-01" / "data.npy").exists()
+    assert list(store.last("test_dag", "task_a", 10)["result"]) == [0, 1, 2, 3]
+
+def test_result_without_execution_date_not_stored(tmp_path):
+    store = HistoryStore(directory=str(tmp_path))
+    store.append("test_dag", {"task_id": "manual", "execution_date": None, "result": 1})
+
+    assert len(store.last("test_dag", "manual", 10)) == 0
+
+def test_shared_directory_not_used(tmp_path):
+    store = HistoryStore(directory=str(tmp_path))
+    append_results(store, "row_count", 3)
+    os.chmod(str(tmp_path), 0o777)
+
+    append_results(store, "row_count", 5)
+
+    assert len(store.last("test_dag", "row_count", 10)) == 0
+    os.chmod(str(tmp_path), 0o700)
+    assert len(store.last("test_dag", "row_count", 10)) == 3
@@ -0,0 +1,175 @@
+from datetime import datetime, timedelta
+from unittest.mock import Mock
+
+import pytest
+
+from airflow import AirflowException
+from airflow.hooks.base_hook import BaseHook
+from airflow.hooks.postgres_hook import PostgresHook
+from airflow.operators.data_quality_history_threshold_check_operator import DataQualityHistoryThresholdCheckOperator
+from airflow.models import Connection, TaskInstance
+
+from plugins.data_quality_history_store import HistoryStore
+from plugins.data_quality_result_cache import LocalDiskResultCache
+
+from .helper import get_records_mock, MockConnection, dummy_dag
+
+EXECUTION_DATE = datetime(2020, 3, 2)
+
+def history_conn_mock(history, recent=None):
+    '''
+    Mock get_conn() answering history queries with history, queries of the
+    history since a date with recent if given, and other queries from the
+    test table
+    '''
+    def get_records(sql):
+        if "data_quality_results" in sql:
+            if recent is not None and "execution_date >=" in sql:
+                return recent
+            return history
+        return get_records_mock(sql)
+    return lambda: MockConnection(get_records=get_records)
+
+def make_task(tmp_path, sql, **kwargs):
+    task = DataQualityHistoryThresholdCheckOperator(
+        task_id="test_history_threshold",
+        conn_id="postgres",
+        history_conn_id="postgres",
+        sql=sql,
+        min_history=5,
+        history_cache=LocalDiskResultCache(directory=str(tmp_path)),
+        dag=dummy_dag,
+        **kwargs
+    )
+    task.push = Mock(return_value=None)
+    return task
+
+def patch_connections(mocker, history, recent=None):
+    get_conn = mocker.patch.object(
+        PostgresHook,
+        "get_conn",
+        side_effect=history_conn_mock(history, recent),
+    )
+    mocker.patch.object(
+        BaseHook,
+        "get_connection",
+        return_value=Connection(conn_id='test_id', conn_type='postgres')
+    )
+    return get_conn
+
+def test_inside_stddev_band(mocker, tmp_path, disable_hook_cache):
+    history = [(EXECUTION_DATE - timedelta(days=day), 12 + day % 3 - 1) for day in range(1, 11)]
+    get_conn = patch_connections(mocker, history)
+
+    task = make_task(tmp_path, "SELECT MIN(value) FROM test;", method="stddev", k=3)
+    result = task.execute(context={"execution_date": EXECUTION_DATE})
+
+    assert result["within_threshold"]
+    assert result["history_size"] == 10
+    assert result["min_threshold"] < 12 < result["max_threshold"]
+
+    # the next run reads the history window from the cache, and only the results
+    # of the table since its latest date, e.g. this run's result pushed by another worker
+    get_conn.reset_mock()
+    recent = [history[0], (EXECUTION_DATE, 12)]
+    patch_connections(mocker, history, recent)
+    result = task.execute(context={"execution_date": EXECUTION_DATE + timedelta(days=1)})
+    assert result["history_size"] == 11
+    assert "execution_date >= %s" in task.get_history_sql(since=True)
+
+def test_outside_percentile_band(mocker, tmp_path):
+    history = [(EXECUTION_DATE - timedelta(days=day), float(day)) for day in range(1, 21)]
+    patch_connections(mocker, history)
+
+    task = make_task(tmp_path, "SELECT MAX(value) FROM test;", method="percentile", percentiles=(5, 95))
+    task_instance = TaskInstance(task=task, execution_date=EXECUTION_DATE)
+    context = task_instance.get_template_context()
+    context["execution_date"] = EXECUTION_DATE
+
+    with pytest.raises(AirflowException):
+        task.execute(context=context)
+
+def test_weekday_band_and_fallback(mocker, tmp_path, disable_hook_cache):
+    # Mondays hover around 12, other days around 200
+    history = [(EXECUTION_DATE - timedelta(days=day), 12.0 + day % 2 if day % 7 == 0 else 200.0)
+               for day in range(1, 50)]
+    patch_connections(mocker, history)
+
+    task = make_task(tmp_path, "SELECT MIN(value) FROM test;", method="weekday", k=3, window=60)
+    result = task.execute(context={"execution_date": EXECUTION_DATE})
+    assert result["within_threshold"]
+    assert result["history_size"] == 7
+
+    task = make_task(tmp_path / "empty", "SELECT MIN(value) FROM test;", min_threshold=0, max_threshold=5)
+    patch_connections(mocker, [])
+    with pytest.raises(AirflowException):
+        task.execute(context={"execution_date": EXECUTION_DATE, "ti": Mock()})
+
+def test_weekday_window_counts_same_weekday_results(mocker, tmp_path):
+    history = [(EXECUTION_DATE - timedelta(days=day), 12.0 + day % 2 if day % 7 == 0 else 200.0)
+               for day in range(1, 71)]
+    patch_connections(mocker, history)
+
+    task = make_task(tmp_path, "SELECT MIN(value) FROM test;", method="weekday", k=3, window=8)
+    result = task.execute(context={"execution_date": EXECUTION_DATE})
+
+    assert "LIMIT 56" in task.get_history_sql()
+    assert result["history_size"] == 8
+
+def test_history_cache_outlives_daily_schedule():
+    task = DataQualityHistoryThresholdCheckOperator(
+        task_id="test_history_cache_ttl",
+        conn_id="postgres",
+        history_conn_id="postgres",
+        sql="SELECT MIN(value) FROM test;",
+        dag=dummy_dag
+    )
+
+    assert task.get_history_cache().ttl > 24 * 60 * 60
+
+def test_history_from_history_store(mocker, tmp_path):
+    get_conn = patch_connections(mocker, [])
+    store = HistoryStore(directory=str(tmp_path / "store"))
+    for day in range(1, 11):
+        store.append(dummy_dag.dag_id, {
+            "task_id": "test_history_threshold",
+            "execution_date": EXECUTION_DATE - timedelta(days=day),
+            "result": 11 + day % 3
+        })
+
+    task = make_task(tmp_path, "SELECT MIN(value) FROM test;", history_store=store)
+    result = task.execute(context={"execution_date": EXECUTION_DATE})
+
+    assert result["within_threshold"]
+    assert result["history_size"] == 10
+    # only the check query reaches the database, and its result is recorded in the store
+    assert get_conn.call_count == 1
+    assert store.last(dummy_dag.dag_id, "test_history_threshold", 1)["result"][0] == 12
+
+def test_failing_results_left_out_of_history(mocker, tmp_path):
+    patch_connections(mocker, [])
+    store = HistoryStore(directory=str(tmp_path / "store"))
+    for day in range(1, 11):
+        store.append(dummy_dag.dag_id, {
+            "task_id": "test_history_threshold",
+            "execution_date": EXECUTION_DATE - timedelta(days=day),
+            "result": 1000 if day == 1 else 11 + day % 3,
+            "within_threshold": day != 1
+        })
+
+    task = make_task(tmp_path, "SELECT MIN(value) FROM test;", history_store=store)
+    result = task.execute(context={"execution_date": EXECUTION_DATE})
+
+    assert result["history_size"] == 9
+    assert result["max_threshold"] < 1000
+    assert "within_threshold IS NOT FALSE" in task.get_history_sql()
+
+def test_missing_result_fails_with_thresholds(mocker, tmp_path):
+    history = [(EXECUTION_DATE - timedelta(days=day), 12 + day % 3 - 1) for day in range(1, 11)]
+    patch_connections(mocker, history)
+
+    task = make_task(tmp_path, "SELECT MIN(value) FROM test WHERE value > 1000;")
+    with pytest.raises(AirflowException):
+        task.execute(context={"execution_date": EXECUTION_DATE, "ti": Mock()})
+    assert task.push.call_args[0][0]["result"] is None
+    assert not task.push.call_args[0][0]["within_threshold"]
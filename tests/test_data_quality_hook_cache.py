@@ -0,0 +1,105 @@
+from unittest.mock import MagicMock, Mock
+import pytest
+
+from airflow.hooks.base_hook import BaseHook
+from airflow.hooks.postgres_hook import PostgresHook
+from airflow.models import Connection
+
+from plugins.base_data_quality_operator import get_sql_value, hook_cache
+
+@pytest.fixture
+def enable_hook_cache(monkeypatch):
+    monkeypatch.setenv("AIRFLOW__DATA_QUALITY__HOOK_CACHE", "True")
+    hook_cache.clear()
+    yield
+    hook_cache.clear()
+
+def get_conn_returning(value):
+    conn = MagicMock()
+    conn.cursor.return_value.fetchmany.return_value = [(value,)]
+    return conn
+
+def test_hook_cache_reuses_connection(mocker, enable_hook_cache):
+    connection_mock = mocker.patch.object(
+        BaseHook,
+        "get_connection",
+        return_value=Connection(conn_id='test_id', conn_type='postgres')
+    )
+    conn_mock = mocker.patch.object(
+        PostgresHook,
+        "get_conn",
+        return_value=get_conn_returning(10)
+    )
+
+    assert get_sql_value('test_id', 'SELECT COUNT(1) FROM test;') == 10
+    assert get_sql_value('test_id', 'SELECT COUNT(1) FROM test;') == 10
+
+    assert connection_mock.call_count == 1
+    assert conn_mock.call_count == 1
+
+def test_hook_cache_ttl_eviction(mocker, monkeypatch, enable_hook_cache):
+    monkeypatch.setenv("AIRFLOW__DATA_QUALITY__HOOK_CACHE_TTL", "0")
+    connection_mock = mocker.patch.object(
+        BaseHook,
+        "get_connection",
+        return_value=Connection(conn_id='test_id', conn_type='postgres')
+    )
+    conn_mock = mocker.patch.object(
+        PostgresHook,
+        "get_conn",
+        side_effect=lambda: get_conn_returning(10)
+    )
+
+    get_sql_value('test_id', 'SELECT COUNT(1) FROM test;')
+    get_sql_value('test_id', 'SELECT COUNT(1) FROM test;')
+
+    assert connection_mock.call_count == 2
+    assert conn_mock.call_count == 2
+
+def test_hook_cache_replaces_dead_connection(mocker, monkeypatch, enable_hook_cache):
+    monkeypatch.setenv("AIRFLOW__DATA_QUALITY__HOOK_CACHE_PING_INTERVAL", "0")
+    mocker.patch.object(
+        BaseHook,
+        "get_connection",
+        return_value=Connection(conn_id='test_id', conn_type='postgres')
+    )
+    dead_conn = get_conn_returning(10)
+    conn_mock = mocker.patch.object(
+        PostgresHook,
+        "get_conn",
+        side_effect=[dead_conn, get_conn_returning(20)]
+    )
+
+    assert get_sql_value('test_id', 'SELECT COUNT(1) FROM test;') == 10
+    dead_conn.cursor.side_effect = Exception("server closed the connection unexpectedly")
+    assert get_sql_value('test_id', 'SELECT COUNT(1) FROM test;') == 20
+
+    assert conn_mock.call_count == 2
+    assert dead_conn.close.called
+
+def test_hook_cache_bounds_and_reaps_idle_connections(mocker, monkeypatch, enable_hook_cache):
+    monkeypatch.setenv("AIRFLOW__DATA_QUALITY__HOOK_CACHE_MAX_IDLE", "1")
+    hook = Mock()
+    first, second = MagicMock(), MagicMock()
+    hook.get_conn.side_effect = [first, second]
+
+    with hook_cache.connection('test_id', hook):
+        with hook_cache.connection('test_id', hook):
+            pass
+    assert first.close.called != second.close.called
+
+    monkeypatch.setenv("AIRFLOW__DATA_QUALITY__HOOK_CACHE_IDLE_TIMEOUT", "0")
+    assert hook_cache.reap() == 1
+    assert first.close.called and second.close.called
+
+def test_hook_cache_closes_connection_on_base_exception(enable_hook_cache):
+    hook = Mock()
+    conn = MagicMock()
+    hook.get_conn.return_value = conn
+
+    with pytest.raises(KeyboardInterrupt):
+        with hook_cache.connection('test_id', hook):
+            raise KeyboardInterrupt()
+
+    assert conn.close.called
+    assert hook_cache.reap() == 0
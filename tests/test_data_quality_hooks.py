@@ -0,0 +1,38 @@
+import sys
+from unittest.mock import Mock
+import pytest
+
+from plugins import data_quality_hooks
+from plugins.data_quality_hooks import HookRegistry
+
+def test_hooks_are_imported_on_first_use(tmp_path, monkeypatch):
+    (tmp_path / "dq_test_hook.py").write_text(
+        "class TestHook:\n"
+        "    def __init__(self, test_conn_id):\n"
+        "        self.test_conn_id = test_conn_id\n")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    registry = HookRegistry()
+    registry.register_lazy("test", "dq_test_hook", "TestHook", "test_conn_id")
+
+    registry.get_factory("test")
+    assert "dq_test_hook" not in sys.modules
+
+    hook = registry.make_hook("test", "test_conn")
+    assert "dq_test_hook" in sys.modules
+    assert hook.test_conn_id == "test_conn"
+    monkeypatch.delitem(sys.modules, "dq_test_hook")
+
+def test_hooks_registered_through_entry_points(mocker):
+    entry_point = Mock(value="my_package.hooks:make_hook")
+    entry_point.name = "duckdb"
+    entry_point.load.return_value = lambda conn_id: ("duckdb hook", conn_id)
+    entry_points = mocker.patch.object(
+        data_quality_hooks.importlib_metadata,
+        "entry_points",
+        return_value={data_quality_hooks.ENTRY_POINT_GROUP: [entry_point]})
+
+    registry = HookRegistry()
+    assert registry.make_hook("duckdb", "duckdb_conn") == ("duckdb hook", "duckdb_conn")
+    with pytest.raises(ValueError):
+        registry.get_factory("oracle")
+    assert entry_points.call_count == 1
@@ -0,0 +1,121 @@
+import json
+from datetime import datetime
+from unittest.mock import Mock
+import pytest
+
+from airflow import AirflowException
+from airflow.hooks.base_hook import BaseHook
+from airflow.models import Connection, Variable
+from airflow.operators.data_quality_threshold_check_operator import DataQualityThresholdCheckOperator
+
+from plugins.base_data_quality_operator import get_sql_value
+from plugins.data_quality_local_file_hook import LocalFileHook
+from .helper import dummy_dag
+
+def write_costs(tmp_path):
+    path = tmp_path / "costs.csv"
+    path.write_text("id,cost,name\n1,10,a\n2,20.5,b\n3,,c\n")
+    return str(path)
+
+def local_file_connection(mocker, tables, engine="sqlite"):
+    mocker.patch.object(
+        BaseHook,
+        "get_connection",
+        return_value=Connection(
+            conn_id="local_files",
+            conn_type="local_file",
+            extra=json.dumps({"tables": tables, "engine": engine}))
+    )
+
+def test_local_file_hook_sqlite_reads_csv(mocker, tmp_path):
+    local_file_connection(mocker, {"costs": write_costs(tmp_path)})
+
+    conn = LocalFileHook(local_file_conn_id="local_files").get_conn()
+    rows = conn.execute("SELECT COUNT(1), COUNT(cost), SUM(cost), MAX(name) FROM costs").fetchall()
+
+    assert rows == [(3, 2, 30.5, "c")]
+
+def test_local_file_hook_sqlite_rejects_parquet(mocker, tmp_path):
+    local_file_connection(mocker, {"costs": str(tmp_path / "costs.parquet")})
+
+    with pytest.raises(ValueError):
+        LocalFileHook(local_file_conn_id="local_files").get_conn()
+
+def test_threshold_check_on_local_csv(mocker, tmp_path):
+    local_file_connection(mocker, {"costs": write_costs(tmp_path)})
+
+    task = DataQualityThresholdCheckOperator(
+        task_id="test_threshold_check_on_local_csv",
+        conn_id="local_files",
+        sql="SELECT SUM(cost) FROM costs",
+        min_threshold=30,
+        max_threshold=31,
+        dag=dummy_dag
+    )
+    task.push = Mock(return_value=None)
+    result = task.execute(context={"execution_date": datetime.now()})
+
+    assert result["result"] == 30.5
+    assert result["within_threshold"]
+
+    task.max_threshold = 30
+    with pytest.raises(AirflowException):
+        task.execute(context={"execution_date": datetime.now(), "ti": Mock()})
+
+def test_local_file_hook_duckdb_reads_csv(mocker, tmp_path):
+    pytest.importorskip("duckdb")
+    local_file_connection(mocker, {"costs": write_costs(tmp_path)}, engine="duckdb")
+
+    result = get_sql_value(conn_id="local_files", sql="SELECT SUM(cost) FROM costs")
+
+    assert result == 30.5
+
+def test_local_file_hook_sqlite_reloads_replaced_csv(mocker, tmp_path):
+    path = write_costs(tmp_path)
+    local_file_connection(mocker, {"costs": path})
+    conn = LocalFileHook(local_file_conn_id="local_files").get_conn()
+    assert conn.execute("SELECT SUM(cost) FROM costs").fetchall() == [(30.5,)]
+
+    with open(path, "w") as csv_file:
+        csv_file.write("id,cost,name\n1,100,a\n2,200,b\n3,300,c\n4,400,d\n")
+    cursor = conn.cursor()
+    cursor.execute("SELECT SUM(cost) FROM costs")
+
+    assert cursor.fetchall() == [(1000,)]
+
+def test_incremental_check_on_local_csv(mocker, tmp_path):
+    path = tmp_path / "costs.csv"
+    path.write_text("cost,load_date\n10,2020-01-01\n30,2020-01-02\n")
+    local_file_connection(mocker, {"costs": str(path)})
+    mocker.patch.object(Variable, "get", return_value={
+        "state": {"count": 2, "total": 40.0, "total_squares": 1000.0, "minimum": 10.0, "maximum": 30.0},
+        "watermark": "2020-01-01"
+    })
+    variable_set = mocker.patch.object(Variable, "set")
+
+    task = DataQualityThresholdCheckOperator(
+        task_id="test_incremental_check_on_local_csv",
+        conn_id="local_files",
+        sql=None,
+        incremental={"table": "costs", "column": "cost", "aggregate": "avg", "watermark_column": "load_date"},
+        min_threshold=15,
+        max_threshold=25,
+        dag=dummy_dag
+    )
+    task.push = Mock(return_value=None)
+    result = task.execute(context={"execution_date": datetime.now()})
+
+    assert result["incremental_rows"] == 1
+    assert result["result"] == 70 / 3
+    assert variable_set.call_args[0][1]["watermark"] == "2020-01-02"
+
+def test_local_file_hook_sqlite_reads_glob(mocker, tmp_path):
+    (tmp_path / "costs_1.csv").write_text("id,cost\n1,10\n")
+    (tmp_path / "costs_2.csv").write_text("id,cost\n2,20\n3,30\n")
+    local_file_connection(mocker, {"costs": str(tmp_path / "costs_*.csv")})
+    conn = LocalFileHook(local_file_conn_id="local_files").get_conn()
+    assert conn.execute("SELECT COUNT(1), SUM(cost) FROM costs").fetchall() == [(3, 60)]
+
+    # a file matching the glob later is loaded before the next query
+    (tmp_path / "costs_3.csv").write_text("id,cost\n4,40\n")
+    assert conn.execute("SELECT COUNT(1), SUM(cost) FROM costs").fetchall() == [(4, 100)]
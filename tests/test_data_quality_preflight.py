@@ -0,0 +1,26 @@
+import json
+
+from plugins.data_quality_preflight import decide, get_explain_sql, parse_plan
+
+def test_explain_sql_per_dialect():
+    assert get_explain_sql("postgres", "SELECT 1;\n") == "EXPLAIN (FORMAT JSON) SELECT 1"
+    assert get_explain_sql("mysql", "SELECT 1") == "EXPLAIN FORMAT=JSON SELECT 1"
+    assert get_explain_sql("hive", "SELECT 1") == "EXPLAIN SELECT 1"
+    assert get_explain_sql("local_file", "SELECT 1") is None
+
+def test_parse_plans():
+    postgres_plan = [{"Plan": {"Total Cost": 1234.5, "Plan Rows": 1, "Plans": [{"Plan Rows": 5000}]}}]
+    assert parse_plan("postgres", [(json.dumps(postgres_plan),)]) == (1234.5, 5000)
+
+    mysql_plan = {"query_block": {"cost_info": {"query_cost": "88.10"},
+                                  "table": {"table_name": "price", "rows_examined_per_scan": 800}}}
+    assert parse_plan("mysql", [(json.dumps(mysql_plan),)]) == (88.1, 800)
+
+    hive_plan = [("  Statistics: Num rows: 120 Data size: 960",), ("  Statistics: Num rows: 1 Data size: 8",)]
+    assert parse_plan("hive", hive_plan) == (None, 120)
+
+def test_decide():
+    assert decide({"max_cost": 100}, 50, 10 ** 9) == "run"
+    assert decide({"max_cost": 100}, 150, None) == "fail"
+    assert decide({"max_rows": 100, "action": "warn"}, None, 150) == "warn"
+    assert decide({"max_rows": 100, "action": "fallback"}, None, None) == "run"
@@ -0,0 +1,149 @@
+import sys
+from datetime import datetime
+from unittest.mock import Mock
+import pytest
+
+from airflow import AirflowException
+from airflow.hooks.base_hook import BaseHook
+from airflow.hooks.postgres_hook import PostgresHook
+from airflow.operators.data_quality_profile_operator import DataQualityProfileOperator
+from airflow.models import Connection
+
+from .helper import get_records_mock, MockConnection, dummy_dag
+
+def test_profile_in_one_scan(mocker):
+    queries = []
+
+    def get_records(sql):
+        queries.append(sql)
+        return get_records_mock(sql)
+
+    mocker.patch.object(
+        PostgresHook,
+        "get_conn",
+        side_effect=lambda: MockConnection(get_records),
+    )
+    mocker.patch.object(
+        BaseHook,
+        "get_connection",
+        return_value=Connection(conn_id='test_id', conn_type='postgres')
+    )
+
+    task = DataQualityProfileOperator(
+        task_id="test_profile_in_one_scan",
+        conn_id="postgres",
+        table="price",
+        columns=["id", "cost"],
+        thresholds={"row_count": (1, None), "cost.null_count": (None, 0), "cost.mean": (20, 30)},
+        dag=dummy_dag
+    )
+    task.push = Mock(return_value=None)
+    result = task.execute(context={"execution_date": datetime.now()})
+
+    assert len(queries) == 1
+    assert result["within_threshold"]
+    assert result["profile"]["row_count"] == 4
+    assert result["profile"]["columns"]["cost"]["min"] == 2
+    assert result["profile"]["columns"]["cost"]["max"] == 50
+    assert result["profile"]["columns"]["cost"]["mean"] == 24
+    assert result["profile"]["columns"]["id"]["distinct_count"] == 4
+    assert len(result["checks"]) == 11
+    assert task.push.call_count == 11
+
+def test_profile_outside_thresholds(mocker):
+    mocker.patch.object(
+        PostgresHook,
+        "get_conn",
+        side_effect=lambda: MockConnection(),
+    )
+    mocker.patch.object(
+        BaseHook,
+        "get_connection",
+        return_value=Connection(conn_id='test_id', conn_type='postgres')
+    )
+
+    task = DataQualityProfileOperator(
+        task_id="test_profile_outside_thresholds",
+        conn_id="postgres",
+        table="price",
+        columns={"cost": ["max", "null_count"]},
+        thresholds={"cost.max": (None, 40), "cost.null_count": (None, 0)},
+        dag=dummy_dag
+    )
+    task.push = Mock(return_value=None)
+    with pytest.raises(AirflowException, match='Metric "cost.max"'):
+        task.execute(context={"execution_date": datetime.now(), "ti": Mock()})
+
+def test_profile_of_text_column(mocker):
+    mocker.patch.object(
+        PostgresHook,
+        "get_conn",
+        side_effect=lambda: MockConnection(lambda sql: [(4, 0, "a", "z")]),
+    )
+    mocker.patch.object(
+        BaseHook,
+        "get_connection",
+        return_value=Connection(conn_id='test_id', conn_type='postgres')
+    )
+
+    task = DataQualityProfileOperator(
+        task_id="test_profile_of_text_column",
+        conn_id="postgres",
+        table="price",
+        columns={"name": ["null_count", "min", "max"]},
+        thresholds={"name.min": (0, 1), "name.max": (None, None)},
+        dag=dummy_dag
+    )
+    task.push = Mock(return_value=None)
+    with pytest.raises(AirflowException, match='Metric "name.min"'):
+        task.execute(context={"execution_date": datetime.now(), "ti": Mock()})
+    pushed = {call[0][0]["check_name"]: call[0][0] for call in task.push.call_args_list}
+    assert pushed["name.max"]["within_threshold"]
+
+def test_profile_timeout(mocker):
+    module = sys.modules[DataQualityProfileOperator.__module__]
+    mocker.patch.object(module, "get_sql_row", side_effect=module.QueryTimeout("canceling statement"))
+
+    task = DataQualityProfileOperator(
+        task_id="test_profile_timeout",
+        conn_id="postgres",
+        table="price",
+        columns=["cost"],
+        query_timeout=1,
+        dag=dummy_dag
+    )
+    task.push = Mock(return_value=None)
+    with pytest.raises(AirflowException, match="timed out"):
+        task.execute(context={"execution_date": datetime.now()})
+    assert task.push.call_args[0][0]["timed_out"]
+
+def test_thresholds_of_unknown_metrics():
+    with pytest.raises(ValueError):
+        DataQualityProfileOperator(
+            task_id="test_thresholds_of_unknown_metrics",
+            conn_id="postgres",
+            table="price",
+            columns={"cost": ["max"]},
+            thresholds={"cost.mean": (0, 1)},
+            dag=dummy_dag
+        )
+
+def test_unsupported_options_rejected():
+    with pytest.raises(ValueError, match="preflight"):
+        DataQualityProfileOperator(
+            task_id="test_profile_preflight_rejected",
+            conn_id="postgres",
+            table="price",
+            columns=["cost"],
+            preflight={"max_rows": 1000},
+            dag=dummy_dag
+        )
+    with pytest.raises(ValueError, match="fallback_sql"):
+        DataQualityProfileOperator(
+            task_id="test_profile_fallback_rejected",
+            conn_id="postgres",
+            table="price",
+            columns=["cost"],
+            fallback_sql="SELECT 1;",
+            dag=dummy_dag
+        )
@@ -0,0 +1,114 @@
+from datetime import datetime
+from decimal import Decimal
+from unittest.mock import Mock
+import json
+import os
+import pytest
+
+from airflow.hooks.base_hook import BaseHook
+from airflow.hooks.postgres_hook import PostgresHook
+from airflow.operators.data_quality_threshold_sql_check_operator import DataQualityThresholdSQLCheckOperator
+from airflow.models import Connection
+
+from plugins.data_quality_result_cache import LocalDiskResultCache
+from .helper import get_conn_mock, dummy_dag
+
+def test_result_cache_get_set(tmp_path):
+    cache = LocalDiskResultCache(directory=str(tmp_path))
+    key = cache.make_key("test_id", "SELECT MIN(cost) FROM price;", datetime(2020, 1, 1))
+
+    with pytest.raises(KeyError):
+        cache.get(key)
+    cache.set(key, (2, 50))
+
+    assert cache.get(key) == (2, 50)
+    assert key != cache.make_key("test_id", "SELECT MIN(cost) FROM price;", datetime(2020, 1, 2))
+
+def test_result_cache_ttl(tmp_path):
+    cache = LocalDiskResultCache(directory=str(tmp_path), ttl=-1)
+    key = cache.make_key("test_id", "SELECT MIN(cost) FROM price;", None)
+    cache.set(key, 2)
+
+    with pytest.raises(KeyError):
+        cache.get(key)
+    assert not os.listdir(str(tmp_path))
+
+def test_result_cache_entry_evicted_while_read(mocker, tmp_path):
+    cache = LocalDiskResultCache(directory=str(tmp_path))
+    key = cache.make_key("test_id", "SELECT MIN(cost) FROM price;", None)
+    cache.set(key, 2)
+    mocker.patch("os.utime", side_effect=FileNotFoundError)
+
+    assert cache.get(key) == 2
+
+def test_result_cache_lru_eviction(tmp_path):
+    cache = LocalDiskResultCache(directory=str(tmp_path), max_entries=2)
+    keys = [cache.make_key("test_id", f"SELECT {i};", None) for i in range(3)]
+
+    cache.set(keys[0], 0)
+    cache.set(keys[1], 1)
+    os.utime(cache._path(keys[0]), (0, 0))
+    os.utime(cache._path(keys[1]), (1, 1))
+    cache.get(keys[0])
+    cache.set(keys[2], 2)
+
+    assert cache.get(keys[0]) == 0
+    assert cache.get(keys[2]) == 2
+    with pytest.raises(KeyError):
+        cache.get(keys[1])
+
+def test_threshold_cache_shared_across_tasks(mocker, tmp_path, disable_hook_cache):
+    conn_mock = mocker.patch.object(
+        PostgresHook,
+        "get_conn",
+        side_effect=get_conn_mock,
+    )
+
+    mocker.patch.object(
+        BaseHook,
+        "get_connection",
+        return_value=Connection(conn_id='test_id', conn_type='postgres')
+    )
+
+    cache = LocalDiskResultCache(directory=str(tmp_path))
+    execution_date = datetime.now()
+    results = []
+    for task_id in ("test_threshold_cache_miss", "test_threshold_cache_hit"):
+        task = DataQualityThresholdSQLCheckOperator(
+            task_id=task_id,
+            conn_id="test_id",
+            threshold_conn_id="test_id",
+            sql="SELECT MIN(value) FROM test;",
+            threshold_sql="SELECT MIN(cost), MAX(cost) FROM price;",
+            threshold_cache=cache,
+            dag=dummy_dag
+        )
+        task.push = Mock(return_value=None)
+        results.append(task.execute({"execution_date": execution_date}))
+
+    assert conn_mock.call_count == 3
+    assert not results[0]["threshold_cache_hit"]
+    assert results[1]["threshold_cache_hit"]
+    assert results[1]["min_threshold"] == 2
+    assert results[1]["max_threshold"] == 50
+
+def test_result_cache_round_trips_values_as_json(tmp_path):
+    cache = LocalDiskResultCache(directory=str(tmp_path / "cache"))
+    value = [(datetime(2020, 1, 1, 12), Decimal("1.50")), (datetime(2020, 1, 2), None)]
+    cache.set("key", value)
+
+    assert cache.get("key") == value
+    assert oct(os.stat(str(tmp_path / "cache")).st_mode & 0o777) == oct(0o700)
+    with open(cache._path("key")) as cache_file:
+        json.load(cache_file)
+
+def test_result_cache_ignores_shared_directory(tmp_path):
+    directory = tmp_path / "shared"
+    directory.mkdir()
+    os.chmod(str(directory), 0o777)
+    cache = LocalDiskResultCache(directory=str(directory))
+    cache.set("key", 1)
+
+    with pytest.raises(KeyError):
+        cache.get("key")
+    assert not os.listdir(str(directory))
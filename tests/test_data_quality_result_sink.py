@@ -0,0 +1,153 @@
+from datetime import datetime
+from unittest.mock import MagicMock
+import json
+import os
+import pytest
+
+from airflow.hooks.base_hook import BaseHook
+from airflow.hooks.mysql_hook import MySqlHook
+from airflow.models import Connection
+
+from plugins.base_data_quality_operator import BaseDataQualityOperator
+from plugins.data_quality_result_sink import ResultSpool
+from .helper import dummy_dag
+
+@pytest.fixture
+def spool_dir(monkeypatch, tmp_path):
+    monkeypatch.setenv("AIRFLOW__DATA_QUALITY__PUSH_SPOOL_DIR", str(tmp_path))
+    monkeypatch.setenv("AIRFLOW__DATA_QUALITY__PUSH_BATCH_SIZE", "2")
+    monkeypatch.setenv("AIRFLOW__DATA_QUALITY__PUSH_FLUSH_INTERVAL", "3600")
+    return tmp_path
+
+def push_results(count, result=10):
+    task = BaseDataQualityOperator(
+        task_id="push_task",
+        conn_id="test_id",
+        push_conn_id="push_id",
+        sql="SELECT COUNT(1) FROM test;",
+        dag=dummy_dag
+    )
+    for day in range(1, count + 1):
+        task.push({
+            "result" : result,
+            "description" : "test",
+            "task_id" : task.task_id,
+            "execution_date" : datetime(2020, 1, day),
+            "min_threshold" : 5,
+            "max_threshold" : 15,
+            "within_threshold" : True
+        })
+
+def mock_mysql(mocker):
+    mocker.patch.object(
+        BaseHook,
+        "get_connection",
+        return_value=Connection(conn_id='push_id', conn_type='mysql')
+    )
+    conn = MagicMock()
+    mocker.patch.object(MySqlHook, "get_conn", return_value=conn)
+    return conn.cursor.return_value
+
+def test_push_spools_results(mocker, spool_dir):
+    cursor = mock_mysql(mocker)
+
+    push_results(3)
+
+    with open(os.path.join(str(spool_dir), "push_id", "spool.jsonl")) as spool:
+        assert len(spool.readlines()) == 3
+    assert not cursor.executemany.called
+
+def test_flush_ships_batches(mocker, spool_dir):
+    cursor = mock_mysql(mocker)
+    push_results(3)
+
+    assert ResultSpool().flush("push_id") == 3
+
+    assert cursor.executemany.call_count == 2
+    sql, rows = cursor.executemany.call_args_list[0][0]
+    assert sql.startswith("INSERT INTO data_quality_results")
+    assert "ON DUPLICATE KEY UPDATE" in sql
+    assert rows[0][:4] == ("test_dag", "push_task", "2020-01-01T00:00:00", "")
+    assert ResultSpool().flush("push_id") == 0
+
+def test_failed_flush_keeps_results(mocker, spool_dir):
+    cursor = mock_mysql(mocker)
+    push_results(1)
+    cursor.executemany.side_effect = Exception("history database unavailable")
+
+    with pytest.raises(Exception):
+        ResultSpool().flush("push_id")
+
+    cursor.executemany.side_effect = None
+    assert ResultSpool().flush("push_id") == 1
+
+def test_retried_result_replaces_earlier_try(mocker, spool_dir):
+    cursor = mock_mysql(mocker)
+    push_results(1, result=10)
+    push_results(1, result=20)
+
+    assert ResultSpool().flush("push_id") == 1
+
+    _, rows = cursor.executemany.call_args[0]
+    assert rows[0][5] == 20.0
+
+def test_non_numeric_result_stored_in_info(mocker, spool_dir):
+    cursor = mock_mysql(mocker)
+    push_results(1, result="2020-01-01")
+
+    ResultSpool().flush("push_id")
+
+    _, rows = cursor.executemany.call_args[0]
+    assert rows[0][5] is None
+    assert json.loads(rows[0][9]) == {"result" : "2020-01-01"}
+
+def test_unreadable_spool_moved_aside(mocker, spool_dir):
+    cursor = mock_mysql(mocker)
+    os.makedirs(os.path.join(str(spool_dir), "push_id"))
+    with open(os.path.join(str(spool_dir), "push_id", "0.flushing"), "w") as spool:
+        spool.write("{not json\n")
+    push_results(1)
+
+    assert ResultSpool().flush("push_id") == 1
+
+    assert cursor.executemany.call_count == 1
+    assert os.path.exists(os.path.join(str(spool_dir), "push_id", "0.bad"))
+
+def test_shared_spool_directory_not_flushed(mocker, spool_dir):
+    cursor = mock_mysql(mocker)
+    os.makedirs(os.path.join(str(spool_dir), "push_id"))
+    with open(os.path.join(str(spool_dir), "push_id", "0.flushing"), "w") as spool:
+        spool.write(json.dumps({"dag_id": "planted", "task_id": "planted", "execution_date": None}) + "\n")
+    os.chmod(str(spool_dir), 0o777)
+
+    push_results(1)
+
+    assert ResultSpool().flush("push_id") == 0
+    assert not cursor.executemany.called
+    assert os.listdir(os.path.join(str(spool_dir), "push_id")) == ["0.flushing"]
+
+def test_unsupported_push_connection_rejected(mocker, spool_dir):
+    mocker.patch.object(
+        BaseHook,
+        "get_connection",
+        return_value=Connection(conn_id='push_id', conn_type='hive_cli')
+    )
+
+    with pytest.raises(ValueError):
+        push_results(1)
+
+def test_results_flushed_when_task_ends(mocker, spool_dir):
+    cursor = mock_mysql(mocker)
+    task = BaseDataQualityOperator(
+        task_id="push_task",
+        conn_id="test_id",
+        push_conn_id="push_id",
+        sql="SELECT COUNT(1) FROM test;",
+        dag=dummy_dag
+    )
+    task.push({"result" : 10, "task_id" : task.task_id, "execution_date" : datetime(2020, 1, 1)})
+
+    task.finish()
+
+    assert cursor.executemany.call_count == 1
+    assert ResultSpool().flush("push_id") == 0
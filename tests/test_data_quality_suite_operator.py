@@ -0,0 +1,206 @@
+from pathlib import Path
+from datetime import datetime
+from unittest.mock import MagicMock, Mock, patch
+import shutil
+import threading
+import time
+
+import pytest
+from airflow.hooks.base_hook import BaseHook
+from airflow.hooks.postgres_hook import PostgresHook
+from airflow.operators.data_quality_suite_operator import DataQualitySuiteOperator
+from airflow.models import Connection, TaskInstance
+
+from .helper import get_conn_mock, get_records_mock, MockConnection, dummy_dag
+
+YAML_PATH = Path(__file__).parents[0] / "configs" / "yaml_configs"
+
+def test_suite_reports_failed_checks(mocker):
+    mocker.patch.object(
+        PostgresHook,
+        "get_conn",
+        side_effect=get_conn_mock
+    )
+
+    mocker.patch.object(
+        BaseHook,
+        "get_connection",
+        return_value=Connection(conn_id='test_id', conn_type='postgres')
+    )
+
+    task = DataQualitySuiteOperator(
+        task_id="test_suite_reports_failed_checks",
+        yaml_dir=str(YAML_PATH),
+        dag=dummy_dag
+    )
+    task_instance = TaskInstance(task=task, execution_date=datetime.now())
+
+    mock_patch = patch.object(
+        DataQualitySuiteOperator,
+        "send_failure_notification",
+        side_effect=lambda info_dicts, check_count: info_dicts)
+
+    with mock_patch as notif_mock:
+        result = task.execute(task_instance.get_template_context())
+
+    assert notif_mock.call_count == 1
+    failed_checks = sorted(info_dict["check_name"] for info_dict in notif_mock.call_args[0][0])
+    assert failed_checks == ["test_outside_threshold_sql", "test_outside_threshold_values"]
+    assert len(result) == len(list(YAML_PATH.glob("*.yaml")))
+
+def test_suite_conn_concurrency(mocker, tmp_path):
+    yaml_dir = tmp_path / "yaml_configs"
+    yaml_dir.mkdir()
+    for name in ("test_inside_threshold_values.yaml", "test_inside_threshold_sql.yaml",
+                 "test_inside_threshold_combined_sql.yaml"):
+        shutil.copy(str(YAML_PATH / name), str(yaml_dir / name))
+
+    lock = threading.Lock()
+    running = {"now": 0, "max": 0}
+
+    def get_records_counted(sql):
+        with lock:
+            running["now"] += 1
+            running["max"] = max(running["max"], running["now"])
+        time.sleep(0.05)
+        with lock:
+            running["now"] -= 1
+        return get_records_mock(sql)
+
+    mocker.patch.object(
+        PostgresHook,
+        "get_conn",
+        side_effect=lambda: MockConnection(get_records_counted)
+    )
+
+    mocker.patch.object(
+        BaseHook,
+        "get_connection",
+        return_value=Connection(conn_id='test_id', conn_type='postgres')
+    )
+
+    task = DataQualitySuiteOperator(
+        task_id="test_suite_conn_concurrency",
+        yaml_dir=str(yaml_dir),
+        conn_concurrency={"test_conn": 1, "test_id": 1},
+        dag=dummy_dag
+    )
+    result = task.execute({"execution_date": datetime.now()})
+
+    assert all(info_dict["within_threshold"] for info_dict in result)
+    assert running["max"] <= 2
+
+def test_suite_skips_later_tiers_after_failure(mocker, tmp_path):
+    yaml_dir = tmp_path / "yaml_configs"
+    yaml_dir.mkdir()
+    shutil.copy(str(YAML_PATH / "test_outside_threshold_values.yaml"), str(yaml_dir / "a_gate.yaml"))
+    shutil.copy(str(YAML_PATH / "test_inside_threshold_values.yaml"), str(yaml_dir / "b_cheap.yaml"))
+    (yaml_dir / "c_expensive.yaml").write_text(
+        "test_name: test_expensive_distribution\n"
+        "depends_on: [test_inside_threshold_values]\n"
+        "threshold:\n"
+        "    min_threshold: 0\n"
+        "    max_threshold: 100\n"
+        "fields:\n"
+        "  conn_id: test_conn\n"
+        "  sql: SELECT STDDEV(value) FROM test;\n")
+    queries = []
+
+    def get_records(sql):
+        queries.append(sql)
+        return get_records_mock(sql)
+
+    mocker.patch.object(
+        PostgresHook,
+        "get_conn",
+        side_effect=lambda: MockConnection(get_records)
+    )
+
+    mocker.patch.object(
+        BaseHook,
+        "get_connection",
+        return_value=Connection(conn_id='test_id', conn_type='postgres')
+    )
+
+    task = DataQualitySuiteOperator(
+        task_id="test_suite_skips_later_tiers_after_failure",
+        yaml_dir=str(yaml_dir),
+        dag=dummy_dag
+    )
+    mock_patch = patch.object(
+        DataQualitySuiteOperator,
+        "send_failure_notification",
+        side_effect=lambda info_dicts, check_count: info_dicts)
+
+    with mock_patch as notif_mock:
+        result = task.execute({"execution_date": datetime.now(), "ti": Mock()})
+
+    assert "SELECT STDDEV(value) FROM test;" not in queries
+    assert [info_dict.get("skipped", False) for info_dict in result] == [False, False, True]
+    assert "runtime" in result[1]
+    failed_checks = [info_dict["check_name"] for info_dict in notif_mock.call_args[0][0]]
+    assert failed_checks == ["test_outside_threshold_values", "test_expensive_distribution"]
+
+def suite_with(mocker, tmp_path, yaml_text, get_records=get_records_mock, **kwargs):
+    yaml_dir = tmp_path / "yaml_configs"
+    yaml_dir.mkdir()
+    (yaml_dir / "check.yaml").write_text(yaml_text)
+
+    mocker.patch.object(
+        PostgresHook,
+        "get_conn",
+        side_effect=lambda: MockConnection(get_records)
+    )
+
+    mocker.patch.object(
+        BaseHook,
+        "get_connection",
+        return_value=Connection(conn_id='test_id', conn_type='postgres')
+    )
+
+    return DataQualitySuiteOperator(
+        task_id="test_suite",
+        yaml_dir=str(yaml_dir),
+        dag=dummy_dag,
+        **kwargs
+    )
+
+def test_suite_rejects_incremental_checks(mocker, tmp_path):
+    task = suite_with(
+        mocker, tmp_path,
+        "test_name: test_incremental\n"
+        "incremental: {table: test, column: value, aggregate: sum, watermark_column: id}\n"
+        "threshold: {min_threshold: 0, max_threshold: 100}\n"
+        "fields: {conn_id: test_conn, sql: SELECT SUM(value) FROM test;}\n")
+
+    with pytest.raises(ValueError):
+        task.execute({"execution_date": datetime.now()})
+
+def test_suite_query_timeout_and_threshold_cache(mocker, tmp_path):
+    queries = []
+
+    def get_records(sql):
+        queries.append(sql)
+        if sql.startswith("SET"):
+            return []
+        return get_records_mock(sql)
+
+    threshold_cache = MagicMock()
+    threshold_cache.get.side_effect = KeyError
+    task = suite_with(
+        mocker, tmp_path,
+        "test_name: test_cached\n"
+        "query_timeout: 5\n"
+        "threshold:\n"
+        "    threshold_sql: SELECT MIN(cost), MAX(cost) FROM price;\n"
+        "    threshold_conn_id: test_id\n"
+        "    cache: true\n"
+        "fields: {conn_id: test_conn, sql: SELECT MIN(value) FROM test;}\n",
+        get_records,
+        threshold_cache=threshold_cache)
+
+    result = task.execute({"execution_date": datetime.now()})
+
+    assert "SET LOCAL statement_timeout = 5000" in queries
+    assert threshold_cache.set.call_count == 1
+    assert result[0]["within_threshold"]
@@ -0,0 +1,93 @@
+from datetime import datetime
+from unittest.mock import Mock
+import pytest
+
+from airflow import AirflowException
+from airflow.hooks.base_hook import BaseHook
+from airflow.hooks.mysql_hook import MySqlHook
+from airflow.hooks.postgres_hook import PostgresHook
+from airflow.operators.data_quality_threshold_check_async_operator import DataQualityThresholdCheckAsyncOperator
+from airflow.models import Connection
+
+from plugins.data_quality_trigger import _limit_rows, _postgres_conn_args
+from .helper import get_conn_mock, dummy_dag
+
+def make_task(min_threshold, max_threshold):
+    task = DataQualityThresholdCheckAsyncOperator(
+        task_id="test_async_threshold_check",
+        conn_id="mysql",
+        sql="SELECT MIN(value) FROM test;",
+        min_threshold=min_threshold,
+        max_threshold=max_threshold,
+        dag=dummy_dag
+    )
+    task.push = Mock(return_value=None)
+    return task
+
+def test_inside_threshold_values(mocker):
+    mocker.patch.object(MySqlHook, "get_conn", side_effect=get_conn_mock)
+    mocker.patch.object(
+        BaseHook,
+        "get_connection",
+        return_value=Connection(conn_id='test_id', conn_type='mysql')
+    )
+
+    result = make_task(10, 15).execute(context={"execution_date": datetime.now()})
+
+    assert len(result) == 7
+    assert result["result"] == 12
+    assert result["within_threshold"]
+
+def test_outside_threshold_values(mocker):
+    mocker.patch.object(MySqlHook, "get_conn", side_effect=get_conn_mock)
+    mocker.patch.object(
+        BaseHook,
+        "get_connection",
+        return_value=Connection(conn_id='test_id', conn_type='mysql')
+    )
+
+    with pytest.raises(AirflowException):
+        make_task(50, 75).execute(context={"execution_date": datetime.now(), "ti": Mock()})
+
+def test_unsupported_modes():
+    with pytest.raises(ValueError):
+        DataQualityThresholdCheckAsyncOperator(
+            task_id="test_async_sampled_check",
+            conn_id="mysql",
+            sql=None,
+            sampling={"table": "test", "column": "value", "aggregate": "avg", "percent": 1},
+            min_threshold=0,
+            max_threshold=1,
+            dag=dummy_dag
+        )
+
+def test_postgres_trigger_connection_args_and_row_limit(mocker):
+    get_conn = mocker.patch.object(PostgresHook, "get_conn")
+    mocker.patch.object(
+        BaseHook,
+        "get_connection",
+        return_value=Connection(conn_id='test_id', conn_type='postgres', host="db", schema="warehouse",
+                                login="dq", password="secret", port=5432,
+                                extra='{"sslmode": "require", "cursor": "dictcursor"}')
+    )
+
+    assert _postgres_conn_args("test_id") == {
+        "host": "db", "user": "dq", "password": "secret", "dbname": "warehouse", "port": 5432,
+        "sslmode": "require"}
+    # the arguments come from the Connection, no database connection is opened for them
+    assert not get_conn.called
+    assert _limit_rows("SELECT value FROM test;", 2) == \
+        "SELECT * FROM (SELECT value FROM test) AS data_quality_query LIMIT 2"
+    assert _limit_rows("SET search_path TO dq; SELECT 1;", 2) == "SET search_path TO dq; SELECT 1;"
+
+def test_preflight_rejected():
+    with pytest.raises(ValueError, match="preflight"):
+        DataQualityThresholdCheckAsyncOperator(
+            task_id="test_async_preflight_check",
+            conn_id="postgres",
+            sql="SELECT MIN(value) FROM test;",
+            preflight={"max_cost": 1000},
+            min_threshold=0,
+            max_threshold=1,
+            dag=dummy_dag
+        )
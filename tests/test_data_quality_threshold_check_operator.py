@@ -1,12 +1,17 @@
+import math
+import threading
 from datetime import datetime
 from unittest.mock import Mock, patch
 
+import pytest
+
+from airflow import AirflowException
 from airflow.hooks.base_hook import BaseHook
 from airflow.hooks.postgres_hook import PostgresHook
 from airflow.operators.data_quality_threshold_check_operator import DataQualityThresholdCheckOperator
-from airflow.models import Connection, TaskInstance
+from airflow.models import Connection, TaskInstance, Variable
 
-from .helper import get_records_mock, dummy_dag
+from .helper import get_conn_mock, MockConnection, MockCursor, dummy_dag
 
 def test_inside_threshold_values(mocker):
     min_threshold, max_threshold = 10, 15
@@ -14,8 +19,8 @@ def test_inside_threshold_values(mocker):
 
     mocker.patch.object(
         PostgresHook,
-        "get_records",
-        side_effect=get_records_mock,
+        "get_conn",
+        side_effect=get_conn_mock,
     )
 
     mocker.patch.object(
@@ -50,8 +55,8 @@ def test_outside_threshold_values(mocker):
 
     mocker.patch.object(
         PostgresHook,
-        "get_records",
-        side_effect=get_records_mock,
+        "get_conn",
+        side_effect=get_conn_mock,
     )
 
     mocker.patch.object(
@@ -82,3 +87,303 @@ def test_outside_threshold_values(mocker):
     assert notif_mock.called
     assert len(result) == 7
     assert not result["within_threshold"]
+
+
+def test_incremental_check(mocker):
+    stored = {
+        "state": {"count": 2, "total": 30.0, "total_squares": 468.0, "minimum": 12.0, "maximum": 18.0},
+        "watermark": "2020-01-01"
+    }
+    queries = []
+
+    def get_records_delta(sql):
+        queries.append(sql)
+        return [(2, 50.0, 1300.0, 20.0, 30.0, datetime(2020, 1, 2))]
+
+    mocker.patch.object(
+        PostgresHook,
+        "get_conn",
+        return_value=MockConnection(get_records_delta),
+    )
+
+    mocker.patch.object(
+        BaseHook,
+        "get_connection",
+        return_value=Connection(conn_id='test_id', conn_type='postgres')
+    )
+
+    mocker.patch.object(Variable, "get", return_value=stored)
+    variable_set = mocker.patch.object(Variable, "set")
+
+    task = DataQualityThresholdCheckOperator(
+        task_id="test_incremental_check",
+        conn_id="postgres",
+        sql=None,
+        incremental={
+            "table": "costs",
+            "column": "cost",
+            "aggregate": "avg",
+            "watermark_column": "load_date"
+        },
+        min_threshold=15,
+        max_threshold=25,
+        dag=dummy_dag
+    )
+    task.push = Mock(return_value=None)
+    result = task.execute({"execution_date": datetime.now()})
+
+    assert "WHERE load_date > %s" in queries[0]
+    assert result["result"] == 20
+    assert result["within_threshold"]
+    assert result["incremental_rows"] == 2
+    assert result["watermark"] == "2020-01-02T00:00:00"
+    new_state = variable_set.call_args[0][1]["state"]
+    assert new_state["count"] == 4
+    assert new_state["minimum"] == 12.0
+
+
+def sampled_check(mocker, task_id, get_records):
+    mocker.patch.object(
+        PostgresHook,
+        "get_conn",
+        return_value=MockConnection(get_records),
+    )
+
+    mocker.patch.object(
+        BaseHook,
+        "get_connection",
+        return_value=Connection(conn_id='test_id', conn_type='postgres')
+    )
+
+    task = DataQualityThresholdCheckOperator(
+        task_id=task_id,
+        conn_id="postgres",
+        sql="SELECT AVG(cost) FROM costs;",
+        sampling={"table": "costs", "column": "cost", "aggregate": "avg", "percent": 1},
+        min_threshold=20,
+        max_threshold=30,
+        dag=dummy_dag
+    )
+    task.push = Mock(return_value=None)
+    return task
+
+
+def test_sampled_check_decided_by_estimate(mocker):
+    queries = []
+
+    def get_records(sql):
+        queries.append(sql)
+        # 10000 sampled rows with mean 25 and standard deviation 1
+        return [(10000, 250000.0, 10000 * (625.0 + 1.0) - 1.0, 20.0, 30.0)]
+
+    task = sampled_check(mocker, "test_sampled_check_decided_by_estimate", get_records)
+    result = task.execute({"execution_date": datetime.now()})
+
+    assert len(queries) == 1
+    assert "TABLESAMPLE BERNOULLI (1)" in queries[0]
+    assert result["within_threshold"]
+    assert result["result"] == 25
+    assert 24.9 < result["confidence_interval"][0] < 25 < result["confidence_interval"][1] < 25.1
+    assert "sample_escalated" not in result
+
+def test_block_sample_interval_widened(mocker):
+    def get_records(sql):
+        # 10000 sampled rows with mean 25 and standard deviation 1
+        return [(10000, 250000.0, 10000 * (625.0 + 1.0) - 1.0, 20.0, 30.0)]
+
+    task = sampled_check(mocker, "test_block_sample_interval_widened", get_records)
+    task.sampling["design_effect"] = 4
+    result = task.execute({"execution_date": datetime.now()})
+
+    lower, upper = result["confidence_interval"]
+    assert result["sample_design_effect"] == 4
+    assert math.isclose(upper - lower, 2 * 2 * 1.959964 * 0.01, rel_tol=1e-4)
+
+
+def test_sampled_check_escalates_ambiguous_estimate(mocker):
+    queries = []
+
+    def get_records(sql):
+        queries.append(sql)
+        if "TABLESAMPLE" in sql:
+            # 4 sampled rows 10, 20, 40, 50 with mean 30 on the upper threshold
+            return [(4, 120.0, 4600.0, 10.0, 50.0)]
+        return [(29.5,)]
+
+    task = sampled_check(mocker, "test_sampled_check_escalates_ambiguous_estimate", get_records)
+    result = task.execute({"execution_date": datetime.now()})
+
+    assert queries[1] == "SELECT AVG(cost) FROM costs;"
+    assert result["sample_escalated"]
+    assert result["sample_estimate"] == 30
+    assert result["result"] == 29.5
+    assert result["within_threshold"]
+
+def test_partitioned_check(mocker):
+    queries = []
+
+    def get_records_partition(sql):
+        queries.append(sql)
+        if "MIN(id), MAX(id)" in sql:
+            return [(1, 100)]
+        if "IS NULL" in sql:
+            return [(1, 100.0, 10000.0, 100.0, 100.0)]
+        return [(10, 50.0, 300.0, 2.0, 8.0)]
+
+    mocker.patch.object(
+        PostgresHook,
+        "get_conn",
+        return_value=MockConnection(get_records_partition),
+    )
+
+    mocker.patch.object(
+        BaseHook,
+        "get_connection",
+        return_value=Connection(conn_id='test_id', conn_type='postgres')
+    )
+
+    task = DataQualityThresholdCheckOperator(
+        task_id="test_partitioned_check",
+        conn_id="postgres",
+        sql=None,
+        partitioned={
+            "table": "costs",
+            "column": "cost",
+            "aggregate": "sum",
+            "partition_column": "id",
+            "partitions": 4
+        },
+        min_threshold=250,
+        max_threshold=350,
+        dag=dummy_dag
+    )
+    task.push = Mock(return_value=None)
+    result = task.execute({"execution_date": datetime.now()})
+
+    assert len(queries) == 6
+    assert sum("id >= %s AND id < %s" in sql for sql in queries) == 3
+    assert sum("id >= %s AND id <= %s" in sql for sql in queries) == 1
+    assert result["result"] == 300
+    assert result["within_threshold"]
+    assert result["partitions"] == 4
+
+class SlowCursor(MockCursor):
+    '''Cursor whose check query runs until cancelled'''
+    def __init__(self, get_records, statements, cancelled):
+        super().__init__(get_records)
+        self.statements = statements
+        self.cancelled = cancelled
+
+    def execute(self, sql, parameters=None):
+        self.statements.append(sql)
+        if sql.startswith("SET"):
+            return
+        if "FROM slow" in sql:
+            if not self.cancelled.wait(5):
+                raise AssertionError("query was not cancelled")
+            raise Exception("canceling statement due to user request")
+        super().execute(sql, parameters)
+
+class SlowConnection(MockConnection):
+    def __init__(self):
+        super().__init__()
+        self.statements = []
+        self.cancelled = threading.Event()
+
+    def cursor(self, *args, **kwargs):
+        return SlowCursor(self.get_records, self.statements, self.cancelled)
+
+    def cancel(self):
+        self.cancelled.set()
+
+def test_query_timeout(mocker):
+    conn = SlowConnection()
+    mocker.patch.object(PostgresHook, "get_conn", return_value=conn)
+    mocker.patch.object(
+        BaseHook,
+        "get_connection",
+        return_value=Connection(conn_id='test_id', conn_type='postgres')
+    )
+
+    task = DataQualityThresholdCheckOperator(
+        task_id="test_query_timeout",
+        conn_id="postgres",
+        sql="SELECT COUNT(1) FROM slow;",
+        query_timeout=0.2,
+        min_threshold=10,
+        max_threshold=15,
+        dag=dummy_dag
+    )
+    task.push = Mock(return_value=None)
+    with pytest.raises(AirflowException, match="timed out"):
+        task.execute({"execution_date": datetime.now()})
+
+    assert "SET LOCAL statement_timeout = 200" in conn.statements
+    pushed = task.push.call_args[0][0]
+    assert pushed["timed_out"]
+    assert pushed["result"] is None
+
+    conn.cancelled.clear()
+    task.fallback_sql = "SELECT MIN(value) FROM test;"
+    result = task.execute({"execution_date": datetime.now()})
+    assert result["timed_out"]
+    assert result["fallback"]
+    assert result["result"] == 12
+    assert result["within_threshold"]
+
+def test_preflight(mocker):
+    plans = {"cost": 50000.0}
+    queries = []
+    conn = MockConnection()
+
+    def get_records(sql):
+        queries.append(sql)
+        if sql.startswith("EXPLAIN"):
+            return [([{"Plan": {"Total Cost": plans["cost"], "Plan Rows": 1,
+                                "Plans": [{"Plan Rows": 1000000}]}}],)]
+        return [(12,)] if "test" in sql else [(10000,)]
+
+    mocker.patch.object(
+        PostgresHook,
+        "get_conn",
+        return_value=conn,
+    )
+    conn.get_records = get_records
+    mocker.patch.object(
+        BaseHook,
+        "get_connection",
+        return_value=Connection(conn_id='test_id', conn_type='postgres')
+    )
+
+    task = DataQualityThresholdCheckOperator(
+        task_id="test_preflight",
+        conn_id="postgres",
+        sql="SELECT MIN(value) FROM big_table;",
+        preflight={"max_cost": 1000},
+        min_threshold=10,
+        max_threshold=15,
+        dag=dummy_dag
+    )
+    task.push = Mock(return_value=None)
+    with pytest.raises(AirflowException, match="refused by preflight"):
+        task.execute({"execution_date": datetime.now()})
+    assert queries == ["EXPLAIN (FORMAT JSON) SELECT MIN(value) FROM big_table"]
+    # EXPLAIN cannot run in a named (server-side) cursor
+    assert conn.cursor_calls == [((), {})]
+    pushed = task.push.call_args[0][0]
+    assert pushed["result"] is None
+    assert pushed["preflight"] == {"cost": 50000.0, "rows": 1000000, "decision": "fail"}
+
+    task.preflight = {"max_cost": 1000, "action": "fallback"}
+    task.fallback_sql = "SELECT MIN(value) FROM test TABLESAMPLE SYSTEM (1);"
+    result = task.execute({"execution_date": datetime.now()})
+    assert result["preflight"]["decision"] == "fallback"
+    assert result["fallback"]
+    assert result["result"] == 12
+
+    plans["cost"] = 10.0
+    task.preflight = {"max_cost": 1000, "max_rows": 10000000}
+    with pytest.raises(AirflowException, match="not within thresholds"):
+        task.execute({"execution_date": datetime.now(), "ti": Mock()})
+    assert task.push.call_args[0][0]["preflight"]["decision"] == "run"
+    assert queries[-1] == "SELECT MIN(value) FROM big_table;"
@@ -0,0 +1,80 @@
+import time
+from datetime import datetime
+from unittest.mock import Mock
+import pytest
+
+from airflow import AirflowException
+from airflow.hooks.base_hook import BaseHook
+from airflow.hooks.mysql_hook import MySqlHook
+from airflow.operators.data_quality_threshold_sql_check_async_operator import DataQualityThresholdSQLCheckAsyncOperator
+from airflow.models import Connection
+
+from .helper import get_records_mock, MockConnection, dummy_dag
+
+def get_records_slow(sql):
+    '''Answers queries from the test table, except for the slow table'''
+    if sql.startswith("SET"):
+        return []
+    if "FROM slow" in sql:
+        time.sleep(1)
+        return [(1,)]
+    return get_records_mock(sql)
+
+def make_task(sql, **kwargs):
+    task = DataQualityThresholdSQLCheckAsyncOperator(
+        task_id="test_async_threshold_sql_check",
+        conn_id="mysql",
+        threshold_conn_id="mysql",
+        sql=sql,
+        threshold_sql="SELECT MIN(cost), MAX(cost) FROM price;",
+        dag=dummy_dag,
+        **kwargs
+    )
+    task.push = Mock(return_value=None)
+    return task
+
+def test_inside_threshold_eval(mocker):
+    mocker.patch.object(MySqlHook, "get_conn", side_effect=lambda: MockConnection(get_records_slow))
+    mocker.patch.object(
+        BaseHook,
+        "get_connection",
+        return_value=Connection(conn_id='test_id', conn_type='mysql')
+    )
+
+    result = make_task("SELECT MIN(value) FROM test;").execute(context={"execution_date": datetime.now()})
+
+    assert result["min_threshold"] == 2
+    assert result["max_threshold"] == 50
+    assert result["within_threshold"]
+
+def test_timeout_and_fallback(mocker):
+    mocker.patch.object(MySqlHook, "get_conn", side_effect=lambda: MockConnection(get_records_slow))
+    mocker.patch.object(
+        BaseHook,
+        "get_connection",
+        return_value=Connection(conn_id='test_id', conn_type='mysql')
+    )
+
+    task = make_task("SELECT COUNT(1) FROM slow;", query_timeout=0.2)
+    with pytest.raises(AirflowException, match="timed out"):
+        task.execute(context={"execution_date": datetime.now()})
+    assert task.push.call_args[0][0]["timed_out"]
+
+    task = make_task("SELECT COUNT(1) FROM slow;", query_timeout=0.2, fallback_sql="SELECT MIN(value) FROM test;")
+    result = task.execute(context={"execution_date": datetime.now()})
+    assert result["fallback"]
+    assert result["result"] == 12
+    assert result["within_threshold"]
+
+def test_preflight_rejected():
+    with pytest.raises(ValueError, match="preflight"):
+        DataQualityThresholdSQLCheckAsyncOperator(
+            task_id="test_async_sql_preflight_check",
+            conn_id="postgres",
+            threshold_conn_id="postgres",
+            sql="SELECT MIN(value) FROM test;",
+            min_threshold_sql="SELECT 0;",
+            max_threshold_sql="SELECT 1;",
+            preflight={"max_cost": 1000},
+            dag=dummy_dag
+        )
@@ -1,12 +1,15 @@
 from datetime import datetime
 from unittest.mock import Mock, patch
+import pytest
+
+from airflow import AirflowException
 
 from airflow.hooks.base_hook import BaseHook
 from airflow.hooks.postgres_hook import PostgresHook
 from airflow.operators.data_quality_threshold_sql_check_operator import DataQualityThresholdSQLCheckOperator
 from airflow.models import Connection, TaskInstance
 
-from .helper import get_records_mock, dummy_dag
+from .helper import get_conn_mock, MockConnection, dummy_dag
 
 def test_inside_threshold_eval(mocker):
     min_threshold_sql = "SELECT MIN(cost) FROM price;"
@@ -15,8 +18,8 @@ def test_inside_threshold_eval(mocker):
 
     mocker.patch.object(
         PostgresHook,
-        "get_records",
-        side_effect=get_records_mock,
+        "get_conn",
+        side_effect=get_conn_mock,
     )
 
     mocker.patch.object(
@@ -49,8 +52,8 @@ def test_outside_threshold_eval(mocker):
 
     mocker.patch.object(
         PostgresHook,
-        "get_records",
-        side_effect=get_records_mock,
+        "get_conn",
+        side_effect=get_conn_mock,
     )
 
     mocker.patch.object(
@@ -82,3 +85,134 @@ def test_outside_threshold_eval(mocker):
     assert notif_mock.called
     assert len(result) == 7
     assert not result["within_threshold"]
+
+
+def test_concurrent_queries_eval(mocker, disable_hook_cache):
+    min_threshold_sql = "SELECT MIN(cost) FROM price;"
+    max_threshold_sql = "SELECT MAX(cost) FROM price;"
+    sql = "SELECT MIN(value) FROM test;"
+
+    conn_mock = mocker.patch.object(
+        PostgresHook,
+        "get_conn",
+        side_effect=get_conn_mock,
+    )
+
+    mocker.patch.object(
+        BaseHook,
+        "get_connection",
+        return_value=Connection(conn_id='test_id', conn_type='postgres')
+    )
+
+    task = DataQualityThresholdSQLCheckOperator(
+        task_id="test_concurrent_queries_eval",
+        conn_id="test_id",
+        threshold_conn_id="test_id",
+        sql=sql,
+        min_threshold_sql=min_threshold_sql,
+        max_threshold_sql=max_threshold_sql,
+        concurrent_queries=True,
+        dag=dummy_dag
+    )
+    task.push = Mock(return_value=None)
+    task_instance = TaskInstance(task=task, execution_date=datetime.now())
+    result = task.execute(task_instance.get_template_context())
+
+    assert conn_mock.call_count == 3
+    assert len(result) == 7
+    assert result["min_threshold"] == 2
+    assert result["max_threshold"] == 50
+    assert result["within_threshold"]
+
+
+def test_concurrent_queries_failure(mocker):
+    def get_records_failing(sql):
+        if "MAX" in sql:
+            raise ValueError("relation \"price\" does not exist")
+        return [(10,)]
+
+    mocker.patch.object(
+        PostgresHook,
+        "get_conn",
+        side_effect=lambda: MockConnection(get_records_failing),
+    )
+
+    mocker.patch.object(
+        BaseHook,
+        "get_connection",
+        return_value=Connection(conn_id='test_id', conn_type='postgres')
+    )
+
+    task = DataQualityThresholdSQLCheckOperator(
+        task_id="test_concurrent_queries_failure",
+        conn_id="test_id",
+        threshold_conn_id="test_id",
+        sql="SELECT MIN(value) FROM test;",
+        min_threshold_sql="SELECT MIN(cost) FROM price;",
+        max_threshold_sql="SELECT MAX(cost) FROM price;",
+        concurrent_queries=True,
+        dag=dummy_dag
+    )
+    task.push = Mock(return_value=None)
+
+    with pytest.raises(AirflowException, match="max_threshold_sql"):
+        task.execute({"execution_date": datetime.now()})
+    assert not task.push.called
+
+
+def test_single_threshold_query_eval(mocker, disable_hook_cache):
+    threshold_sql = "SELECT MIN(cost), MAX(cost) FROM price;"
+    sql = "SELECT MIN(value) FROM test;"
+
+    conn_mock = mocker.patch.object(
+        PostgresHook,
+        "get_conn",
+        side_effect=get_conn_mock,
+    )
+
+    mocker.patch.object(
+        BaseHook,
+        "get_connection",
+        return_value=Connection(conn_id='test_id', conn_type='postgres')
+    )
+
+    task = DataQualityThresholdSQLCheckOperator(
+        task_id="test_single_threshold_query_eval",
+        conn_id="test_id",
+        threshold_conn_id="test_id",
+        sql=sql,
+        threshold_sql=threshold_sql,
+        dag=dummy_dag
+    )
+    task.push = Mock(return_value=None)
+    task_instance = TaskInstance(task=task, execution_date=datetime.now())
+    result = task.execute(task_instance.get_template_context())
+
+    assert conn_mock.call_count == 2
+    assert len(result) == 7
+    assert result["min_threshold"] == 2
+    assert result["max_threshold"] == 50
+    assert result["within_threshold"]
+
+
+def test_threshold_sql_arguments():
+    with pytest.raises(ValueError):
+        DataQualityThresholdSQLCheckOperator(
+            task_id="test_threshold_sql_arguments",
+            conn_id="test_id",
+            threshold_conn_id="test_id",
+            sql="SELECT MIN(value) FROM test;",
+            threshold_sql="SELECT MIN(cost), MAX(cost) FROM price;",
+            min_threshold_sql="SELECT MIN(cost) FROM price;",
+            dag=dummy_dag
+        )
+
+    with pytest.raises(ValueError):
+        DataQualityThresholdSQLCheckOperator(
+            task_id="test_threshold_sql_arguments",
+            conn_id="test_id",
+            threshold_conn_id="test_id",
+            sql="SELECT MIN(value) FROM test;",
+            min_threshold_sql="SELECT MIN(cost) FROM price;",
+            dag=dummy_dag
+        )
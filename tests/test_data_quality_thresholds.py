@@ -0,0 +1,17 @@
+from datetime import datetime
+from decimal import Decimal
+import numpy as np
+
+from plugins.data_quality_thresholds import within_thresholds
+
+def test_within_thresholds():
+    results = [5, 5.5, Decimal("7"), np.int64(1), None, None]
+    thresholds = [(0, 10), (None, 5), (7, 7), (2, None), (None, None), (0, 1)]
+
+    assert within_thresholds(results, thresholds) == [True, False, True, False, True, False]
+
+def test_within_thresholds_non_numeric_results():
+    results = ["b", datetime(2020, 1, 1), "b"]
+    thresholds = [(None, None), (None, None), (0, 1)]
+
+    assert within_thresholds(results, thresholds) == [True, True, False]
@@ -0,0 +1,103 @@
+from datetime import datetime
+from unittest.mock import Mock
+
+import pytest
+
+from airflow.hooks.base_hook import BaseHook
+from airflow.hooks.postgres_hook import PostgresHook
+from airflow.operators.data_quality_threshold_sql_check_operator import DataQualityThresholdSQLCheckOperator
+from airflow.models import Connection
+from airflow.settings import Stats
+
+# the operators import the top-level module, whose timer state the tests must share
+from data_quality_timing import PhaseTimer, activate, current_timer, timed
+
+from .helper import get_conn_mock, dummy_dag
+
+def test_timer_totals_phases():
+    timer = PhaseTimer()
+    activate(timer)
+    try:
+        with timed("query", "conn_a"):
+            pass
+        with timed("query", "conn_b"):
+            pass
+        with timed("push"):
+            pass
+    finally:
+        activate(None)
+
+    totals = timer.totals()
+    assert set(totals) == {"query", "push", "total"}
+    assert len(timer.entries) == 3
+    assert totals["total"] >= totals["query"]
+
+def test_timed_without_active_timer():
+    activate(None)
+    with timed("query", "conn_a"):
+        pass
+
+def test_timings_added_and_emitted(mocker):
+    mocker.patch.object(
+        PostgresHook,
+        "get_conn",
+        side_effect=get_conn_mock,
+    )
+    mocker.patch.object(
+        BaseHook,
+        "get_connection",
+        return_value=Connection(conn_id='test_id', conn_type='postgres')
+    )
+    timing = mocker.patch.object(Stats, "timing")
+
+    task = DataQualityThresholdSQLCheckOperator(
+        task_id="test_timings_added_and_emitted",
+        conn_id="postgres",
+        threshold_conn_id="postgres",
+        sql="SELECT MIN(value) FROM test;",
+        min_threshold_sql="SELECT MIN(value) FROM test;",
+        max_threshold_sql="SELECT MAX(value) FROM test;",
+        collect_timings=True,
+        dag=dummy_dag
+    )
+    task.push = Mock(return_value=None)
+    result = task.execute(context={
+        "execution_date": datetime.now(),
+    })
+
+    assert len(result) == 8
+    assert {"get_connection", "connect", "query", "threshold", "check", "total"} <= set(result["timings"])
+    metrics = {call[0][0] for call in timing.call_args_list}
+    assert f"data_quality.{dummy_dag.dag_id}.{task.task_id}.postgres.threshold" in metrics
+    assert f"data_quality.{dummy_dag.dag_id}.{task.task_id}.total" in metrics
+
+def test_timings_emitted_when_check_raises(mocker):
+    mocker.patch.object(
+        PostgresHook,
+        "get_conn",
+        side_effect=RuntimeError("database unavailable"),
+    )
+    mocker.patch.object(
+        BaseHook,
+        "get_connection",
+        return_value=Connection(conn_id='test_id', conn_type='postgres')
+    )
+    timing = mocker.patch.object(Stats, "timing")
+
+    task = DataQualityThresholdSQLCheckOperator(
+        task_id="test_timings_emitted_when_check_raises",
+        conn_id="postgres",
+        threshold_conn_id="postgres",
+        sql="SELECT MIN(value) FROM test;",
+        min_threshold_sql="SELECT MIN(value) FROM test;",
+        max_threshold_sql="SELECT MAX(value) FROM test;",
+        collect_timings=True,
+        dag=dummy_dag
+    )
+    with pytest.raises(RuntimeError, match="database unavailable"):
+        task.execute(context={"execution_date": datetime.now()})
+
+    metrics = {call[0][0] for call in timing.call_args_list}
+    assert f"data_quality.{dummy_dag.dag_id}.{task.task_id}.total" in metrics
+    assert task.timer is None
+    assert current_timer() is None
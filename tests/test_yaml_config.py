@@ -10,7 +10,7 @@ from airflow.hooks.base_hook import BaseHook
 from airflow.models import Connection, TaskInstance
 
 import yaml
-from .helper import get_records_mock, dummy_dag
+from .helper import get_conn_mock, dummy_dag
 
 YAML_PATH = Path(__file__).parents[0] / "configs" / "yaml_configs"
 
@@ -30,11 +30,12 @@ def get_data_quality_operator(conf):
         "email" : conf["notification_emails"]
     }
 
-    if conf["threshold"]["min_threshold_sql"]:
+    if conf["threshold"]["min_threshold_sql"] or conf["threshold"]["threshold_sql"]:
         task = DataQualityThresholdSQLCheckOperator(
             task_id=conf["test_name"],
             min_threshold_sql=conf["threshold"]["min_threshold_sql"],
             max_threshold_sql=conf["threshold"]["max_threshold_sql"],
+            threshold_sql=conf["threshold"]["threshold_sql"],
             threshold_conn_id=conf["threshold"]["threshold_conn_id"],
             dag=dummy_dag,
             **kwargs)
@@ -52,8 +53,8 @@ def test_inside_threshold_values(mocker):
 
     mocker.patch.object(
         PostgresHook,
-        "get_records",
-        side_effect=get_records_mock
+        "get_conn",
+        side_effect=get_conn_mock
     )
 
     mocker.patch.object(
@@ -80,8 +81,8 @@ def test_inside_threshold_sql(mocker):
 
     mocker.patch.object(
         PostgresHook,
-        "get_records",
-        side_effect=get_records_mock
+        "get_conn",
+        side_effect=get_conn_mock
     )
 
     mocker.patch.object(
@@ -108,8 +109,8 @@ def test_outside_threshold_values(mocker):
 
     mocker.patch.object(
         PostgresHook,
-        "get_records",
-        side_effect=get_records_mock
+        "get_conn",
+        side_effect=get_conn_mock
     )
 
     mocker.patch.object(
@@ -144,8 +145,8 @@ def test_outside_threshold_sql(mocker):
 
     mocker.patch.object(
         PostgresHook,
-        "get_records",
-        side_effect=get_records_mock
+        "get_conn",
+        side_effect=get_conn_mock
     )
 
     mocker.patch.object(
@@ -174,3 +175,32 @@ def test_outside_threshold_sql(mocker):
     assert notif_mock.called
     assert len(result) == 7
     assert not result["within_threshold"]
+
+def test_inside_threshold_combined_sql(mocker):
+    yaml_path = YAML_PATH / "test_inside_threshold_combined_sql.yaml"
+
+    conn_mock = mocker.patch.object(
+        PostgresHook,
+        "get_conn",
+        side_effect=get_conn_mock
+    )
+
+    mocker.patch.object(
+        BaseHook,
+        "get_connection",
+        return_value=Connection(conn_id='test_id', conn_type='postgres')
+    )
+
+    with open(yaml_path) as config:
+        conf = recursive_make_defaultdict(yaml.safe_load(config))
+    task = get_data_quality_operator(conf)
+
+    assert isinstance(task, DataQualityThresholdSQLCheckOperator)
+
+    task.push = Mock(return_value=None)
+    task_instance = TaskInstance(task=task, execution_date=datetime.now())
+    result = task.execute(task_instance.get_template_context())
+
+    assert conn_mock.call_count == 2
+    assert len(result) == 7
+    assert result["within_threshold"]